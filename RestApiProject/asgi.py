@@ -3,6 +3,10 @@ ASGI config for RestApiProject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The ZKTeco push endpoints (``/iclock/...``, see ``attendance.adms``) are async
+views, so run the project under an ASGI server (e.g. ``uvicorn
+RestApiProject.asgi:application``) to serve them without a thread per device.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -168,6 +169,68 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'  # Redis URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = None  # আমরা রেজাল্ট ব্যাকএন্ড ব্যবহার করছি না
+CELERY_BEAT_SCHEDULE = {
+    'sync-all-devices': {
+        'task': 'attendance.tasks.sync_all_devices',
+        'schedule': 300.0,  # Every 5 minutes
+    },
+    'flush-punch-buffer': {
+        'task': 'attendance.tasks.flush_punch_buffer',
+        'schedule': 5.0,  # Safety net when flush_punch_buffer is not running
+    },
+    'recompute-dirty-work-hours': {
+        'task': 'attendance.tasks.recompute_dirty_work_hours',
+        'schedule': 60.0,  # Every minute
+    },
+    'roll-shift-calendar': {
+        'task': 'attendance.tasks.roll_shift_calendar',
+        'schedule': 24 * 60 * 60.0,  # Daily
+    },
+    'detect-absences': {
+        'task': 'attendance.tasks.detect_absences',
+        'schedule': crontab(hour=2, minute=0),  # Nightly, once yesterday's night shifts are over
+    },
+}
+
+# Attendance device sync
+ATTENDANCE_DEVICE_TIMEOUT = 15  # Seconds allowed for a single device
+ATTENDANCE_DEVICE_CONCURRENCY = 200  # Devices queried at the same time
+ATTENDANCE_BULK_BATCH_SIZE = 1000  # Rows per bulk INSERT
+ATTENDANCE_BULK_MAX_ROWS = 10000  # Rows accepted by one bulk API request
+ATTENDANCE_ADMS_CACHE_TTL = 300  # Seconds a device serial lookup is kept in memory
+ATTENDANCE_ADMS_CACHE_SIZE = 10000  # Device serials kept in memory per process (least recently used are dropped)
+ATTENDANCE_FLEET_STATUS_CACHE_TTL = 30  # Seconds the fleet status scoreboard is cached
+ATTENDANCE_EMPLOYEE_CACHE_TTL = 3600  # Seconds the device user ID -> Employee map stays in the cache backend
+ATTENDANCE_OUTBOX_BATCH_SIZE = 1000  # Default rows per outbox export page
+ATTENDANCE_OUTBOX_MAX_BATCH_SIZE = 10000  # Largest outbox page / acknowledgement accepted by the API
+ATTENDANCE_WORK_HOURS_CHUNK_SIZE = 2000  # Employees loaded per query by the work hours engine
+ATTENDANCE_WORK_HOURS_DIRTY_BATCH = 10000  # Changed employee-days recomputed per recompute_dirty_work_hours run
+ATTENDANCE_WORK_HOURS_DIRTY_CLAIM_TIMEOUT = 600  # Seconds after which employee-days claimed by a lost run are claimed again
+ATTENDANCE_SHIFT_CALENDAR_PAST_DAYS = 62  # Days before today kept in the materialized shift calendar
+ATTENDANCE_SHIFT_CALENDAR_FUTURE_DAYS = 62  # Days after today kept in the materialized shift calendar
+ATTENDANCE_SHIFT_EARLY_MARGIN_MINUTES = 120  # Punches this long before a shift starts still belong to it
+ATTENDANCE_SHIFT_LATE_MARGIN_MINUTES = 240  # Punches this long after a shift ends still belong to it
+ATTENDANCE_LATE_GRACE_MINUTES = 5  # First IN this long after the shift start is not late yet
+ATTENDANCE_EARLY_LEAVE_GRACE_MINUTES = 5  # Last OUT this long before the shift end is not an early leave yet
+ATTENDANCE_REPORT_PAGE_SIZE = 100  # Default rows per page of the punctuality report
+ATTENDANCE_REPORT_MAX_PAGE_SIZE = 1000  # Largest page of the punctuality report
+ATTENDANCE_PAYROLL_EXPORT_TIMEOUT = 3600  # Seconds after which a pending or running payroll export is considered lost
+ATTENDANCE_REPORT_MAX_DAYS = 31  # Longest date range of one punctuality report request
+ATTENDANCE_CALENDAR_CACHE_TTL = 24 * 60 * 60  # Seconds a month calendar of an employee stays cached
+ATTENDANCE_CALENDAR_MAX_EMPLOYEES = 1000  # Employees per month calendar request
+ATTENDANCE_SCHEDULE_REPORT_CACHE_TTL = 60 * 60  # Seconds a rendered weekly schedule report stays cached
+ATTENDANCE_LOG_PAGE_SIZE = 100  # Default attendance logs per list page
+ATTENDANCE_LOG_MAX_PAGE_SIZE = 1000  # Largest attendance log list page
+ATTENDANCE_LOG_DEFAULT_DAYS = 31  # Days of logs-by-employee returned when no from date is given
+ATTENDANCE_LOG_STREAM_CHUNK_SIZE = 2000  # Rows per query of a streamed (NDJSON) log export
+ATTENDANCE_DEBOUNCE_REFRESH_SECONDS = 5  # How often each process loads the punches stored by other processes into its debounce index
+
+# Write-behind punch buffer (attendance.buffer)
+ATTENDANCE_PUNCH_BUFFER = False  # Append punches to the spool instead of saving them one by one
+ATTENDANCE_PUNCH_SPOOL_PATH = os.path.join(BASE_DIR, 'spool', 'punches.ndjson')
+ATTENDANCE_PUNCH_SPOOL_REDIS_URL = None  # e.g. 'redis://localhost:6379/2' to spool in Redis instead
+ATTENDANCE_PUNCH_FLUSH_INTERVAL_MS = 500  # Flush at least this often
+ATTENDANCE_PUNCH_FLUSH_MAX_RECORDS = 1000  # ...or as soon as this many punches are waiting
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS Middleware
@@ -7,6 +7,7 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 from django.conf.urls.i18n import i18n_patterns
+from attendance import adms
 
 # Swagger API ডকুমেন্টেশন সেটআপ
 schema_view = get_schema_view(
@@ -39,6 +40,11 @@ urlpatterns = [
     
     path('attendance/', include('attendance.urls')),
 
+    # ZKTeco ADMS push protocol (device paths are fixed by the firmware)
+    path('iclock/cdata', adms.cdata_view, name='iclock_cdata'),
+    path('iclock/getrequest', adms.getrequest_view, name='iclock_getrequest'),
+    path('iclock/devicecmd', adms.devicecmd_view, name='iclock_devicecmd'),
+
     path('set_language/', include('django.conf.urls.i18n')),
 
 ] 
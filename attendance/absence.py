@@ -0,0 +1,103 @@
+"""
+Nightly absence detection.
+
+For one company and date, the employees scheduled to work (ShiftCalendar
+workdays that are not holidays) minus the employees with punches (a
+WorkHours row for that business day, or any punch on that local day) minus
+the employees on HR-approved leave are absent. Each side is one query
+loaded into a set, so a company of 50,000 employees costs a handful of
+queries and set differences, not a query per employee.
+
+Absence rows are written with bulk_create; rows of employees who are no
+longer absent (late punches, leave approved afterwards) are removed, so the
+job can be run again for the same date.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication.models import Company
+
+from . import monthly_summary
+from .ingest import batch_size
+from .models import Absence, AttendanceLog, Employee, Holiday, LeaveRequest, ShiftCalendar, WorkHours
+from .workhours import chunk_size, day_bounds
+
+
+def on_leave(company, day):
+    """
+    IDs of the employees of a company on approved leave on ``day``.
+    """
+    users = LeaveRequest.objects.filter(
+        company=company, hr_approved='approved', start_date__lte=day, end_date__gte=day
+    ).values_list('user_id', flat=True)
+    return set(Employee.objects.filter(company=company, user_id__in=users).values_list('id', flat=True))
+
+
+def punched(company, day):
+    """
+    IDs of the employees of a company with punches on ``day``.
+    """
+    start, end = day_bounds(day, day)
+    employees = set(
+        WorkHours.objects.filter(company=company, date=day).values_list('employee_id', flat=True)
+    )
+    # WorkHours may not have caught up with the latest punches yet
+    employees.update(
+        AttendanceLog.objects.filter(
+            company=company, employee__isnull=False, punch_time__gte=start, punch_time__lt=end
+        ).order_by().values_list('employee_id', flat=True).distinct()
+    )
+    return employees
+
+
+def detect(company, day):
+    """
+    Record the absences of a company on ``day``.
+    Returns {"scheduled", "absent", "removed"}.
+    """
+    company_id = getattr(company, 'pk', company)
+    if Holiday.objects.filter(Q(company=company_id) | Q(company__isnull=True), date=day).exists():
+        scheduled = {}
+    else:
+        scheduled = dict(
+            ShiftCalendar.objects.filter(company=company_id, date=day, is_workday=True, is_holiday=False)
+            .values_list('employee_id', 'shift_id')
+        )
+    absent = set(scheduled) - punched(company_id, day) - on_leave(company_id, day)
+
+    existing = set(Absence.objects.filter(company=company_id, date=day).values_list('employee_id', flat=True))
+    stale = sorted(existing - absent)
+    removed = 0
+    size = chunk_size()
+    for offset in range(0, len(stale), size):
+        removed += Absence.objects.filter(
+            company=company_id, date=day, employee_id__in=stale[offset:offset + size]
+        ).delete()[0]
+    Absence.objects.bulk_create(
+        [
+            Absence(company_id=company_id, employee_id=employee_id, date=day, shift_id=scheduled[employee_id])
+            for employee_id in sorted(absent - existing)
+        ],
+        batch_size=batch_size(),
+        ignore_conflicts=True,
+    )
+    return {'scheduled': len(scheduled), 'absent': len(absent), 'removed': removed}
+
+
+def detect_all(day=None):
+    """
+    Record the absences of every active company on ``day`` (default:
+    yesterday) and refresh the monthly summaries of all their employees for
+    the month of ``day`` and the current month. Returns {company_id: number
+    of absences}.
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    months = sorted({monthly_summary.month_key(day), monthly_summary.month_key(timezone.localdate())})
+    absences = {}
+    for company in Company.objects.filter(is_active=True):
+        absences[company.pk] = detect(company, day)['absent']
+        for year_month in months:
+            monthly_summary.refresh_company(company, year_month)
+    return absences
@@ -666,4 +666,29 @@ class LeaveRequestAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         if request.user.is_superuser:
             return qs
-        return qs.filter(company=request.user.company)
\ No newline at end of file
+        return qs.filter(company=request.user.company)
+
+from .models import Absence
+
+@admin.register(Absence)
+class AbsenceAdmin(admin.ModelAdmin):
+    """
+    Absences recorded by the nightly detection job (read-only).
+    """
+    list_display = ('employee', 'date', 'shift', 'company', 'detected_at')
+    search_fields = ('employee__name', 'employee__employee_id')
+    list_filter = ('date',)
+    list_select_related = ('employee', 'shift', 'company')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if request.user.is_superuser:
+            return qs
+        return qs.filter(company=request.user.company)
@@ -0,0 +1,159 @@
+"""
+Receiver for the ZKTeco ADMS push protocol ("iclock").
+
+Devices configured with this server push their punches over HTTP instead of
+being polled on TCP port 4370:
+
+    GET  /iclock/cdata?SN=...               handshake, returns device options
+    POST /iclock/cdata?SN=...&table=ATTLOG  tab separated attendance records
+    GET  /iclock/getrequest?SN=...          command polling (no commands queued)
+    POST /iclock/devicecmd?SN=...           command results
+
+The views are async and are meant to be served by the ASGI application.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from .ingest import DevicePunchWriter
+from .models import Device
+from .zk import PUNCH_STATES, VERIFY_TYPES
+
+# serial number -> (expires_at, (device_pk, company_id)), least recently used first
+_device_cache = OrderedDict()
+
+
+def cache_ttl():
+    return getattr(settings, 'ATTENDANCE_ADMS_CACHE_TTL', 300)
+
+
+def cache_size():
+    return getattr(settings, 'ATTENDANCE_ADMS_CACHE_SIZE', 10000)
+
+
+async def get_device(serial_number):
+    """
+    Return (device_pk, company_id) for a serial number, or None if unknown.
+    """
+    now = time.monotonic()
+    cached = _device_cache.get(serial_number)
+    if cached is not None and cached[0] > now:
+        _device_cache.move_to_end(serial_number)
+        return cached[1]
+
+    device = await Device.objects.filter(serial_number=serial_number).values_list('id', 'company_id').afirst()
+    if device is None:
+        # Unknown serials are not kept: anyone can send them, and the
+        # device may be registered at any moment
+        _device_cache.pop(serial_number, None)
+        return None
+    _device_cache[serial_number] = (now + cache_ttl(), device)
+    _device_cache.move_to_end(serial_number)
+    while len(_device_cache) > cache_size():
+        _device_cache.popitem(last=False)
+    return device
+
+
+def parse_attlog(line):
+    """
+    Parse one ATTLOG line: PIN, "YYYY-MM-DD HH:MM:SS", status, verify, work code, ...
+    Returns None for lines that cannot be parsed.
+    """
+    fields = line.decode(errors='ignore').rstrip('\r\n').split('\t')
+    if len(fields) < 2 or not fields[0].strip():
+        return None
+    try:
+        punch_time = datetime.strptime(fields[1].strip(), '%Y-%m-%d %H:%M:%S')
+        punch_state = int(fields[2]) if len(fields) > 2 and fields[2].strip() else 0
+        verify = int(fields[3]) if len(fields) > 3 and fields[3].strip() else 1
+    except ValueError:
+        return None
+    work_code = fields[4].strip() if len(fields) > 4 and fields[4].strip() not in ('', '0') else None
+    return (
+        fields[0].strip(),
+        punch_time,
+        PUNCH_STATES.get(punch_state, 'IN'),
+        VERIFY_TYPES.get(verify, 'FP'),
+        work_code,
+    )
+
+
+def device_options(serial_number):
+    return "\n".join([
+        f"GET OPTION FROM: {serial_number}",
+        "ATTLOGStamp=None",
+        "OPERLOGStamp=9999",
+        "ATTPHOTOStamp=None",
+        "ErrorDelay=30",
+        "Delay=10",
+        "TransTimes=00:00;14:05",
+        "TransInterval=1",
+        "TransFlag=TransData AttLog",
+        "Realtime=1",
+        "Encrypt=None",
+    ]) + "\n"
+
+
+def text_response(content, status=200):
+    return HttpResponse(content, content_type='text/plain', status=status)
+
+
+@csrf_exempt
+async def cdata_view(request):
+    serial_number = request.GET.get('SN')
+    if not serial_number:
+        return text_response("SN is required", status=400)
+
+    device = await get_device(serial_number)
+    if device is None:
+        return text_response("Unknown device", status=404)
+    device_pk, company_id = device
+
+    if request.method == 'GET':
+        return text_response(device_options(serial_number))
+
+    if request.method != 'POST':
+        return text_response("Method not allowed", status=405)
+
+    if request.GET.get('table') != 'ATTLOG':
+        # Operation logs, user data and photos are acknowledged and ignored
+        return text_response("OK")
+
+    writer = DevicePunchWriter(company_id, device_pk)
+    default_tz = timezone.get_default_timezone()
+    received = 0
+
+    # Read the body line by line instead of loading the whole payload
+    for line in request:
+        record = parse_attlog(line)
+        if record is None:
+            continue
+        received += 1
+        user_id, punch_time, in_out_status, verification_method, work_code = record
+        if writer.add(user_id, timezone.make_aware(punch_time, default_tz), in_out_status, verification_method, work_code):
+            await sync_to_async(writer.flush)()
+    await sync_to_async(writer.flush)()
+
+    now = timezone.now()
+    await Device.objects.filter(pk=device_pk).aupdate(
+        last_sync_time=now, last_sync_attempt=now, sync_error_count=0, last_sync_error=None
+    )
+    return text_response(f"OK: {received}")
+
+
+@csrf_exempt
+async def getrequest_view(request):
+    if await get_device(request.GET.get('SN', '')) is None:
+        return text_response("Unknown device", status=404)
+    return text_response("OK")
+
+
+@csrf_exempt
+async def devicecmd_view(request):
+    return text_response("OK")
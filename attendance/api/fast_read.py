@@ -0,0 +1,222 @@
+"""
+Read-only fast path for list endpoints.
+
+A ModelSerializer builds a model instance per row and resolves every field
+through get_attribute() and to_representation(). For plain column fields
+that is mostly overhead: ValuesReader selects exactly the serializer's
+readable fields with .values() and turns each row into the same dict the
+serializer would produce, with converters picked once per serializer:
+
+* foreign keys (PrimaryKeyRelatedField) and columns that already hold the
+  output type are copied as they are;
+* ISO 8601 datetimes are converted to the current timezone, looked up
+  once per page instead of once per value as DateTimeField does;
+* everything else (times, durations, dates, decimals, ...) goes through the
+  serializer field's own to_representation(), so formats and settings are
+  honoured exactly.
+
+Nested sources such as ``company.name`` are read through the join
+(``company__name``); when the foreign key is null the key is left out or set
+to null the way DRF does. Serializers that cannot be expressed this way
+(custom to_representation(), method fields, nested serializers, properties)
+get no reader and the caller falls back to the serializer.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+
+# Left out of the output when a foreign key on its source is null
+SKIP = object()
+
+# DRF fields whose to_representation() returns a value of the column's own
+# type unchanged, for the model fields listed
+PASS_THROUGH = {
+    drf_fields.CharField.to_representation: (models.CharField, models.TextField),
+    drf_fields.IntegerField.to_representation: (models.IntegerField,),
+    drf_fields.FloatField.to_representation: (models.FloatField,),
+    drf_fields.ChoiceField.to_representation: (models.CharField,),
+}
+
+# DRF fields whose to_representation() works on the column value
+CONVERTED = (
+    drf_fields.BooleanField, drf_fields.CharField, drf_fields.IntegerField, drf_fields.FloatField,
+    drf_fields.DecimalField, drf_fields.DateTimeField, drf_fields.DateField, drf_fields.TimeField,
+    drf_fields.DurationField, drf_fields.ChoiceField, drf_fields.UUIDField,
+)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def model_field(model, source_attrs):
+    """
+    The model field at the end of a source path, and the values() names of
+    the foreign keys it goes through.
+    """
+    opts = model._meta
+    hops = []
+    try:
+        for attr in source_attrs[:-1]:
+            field = opts.get_field(attr)
+            if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                raise Unsupported(attr)
+            hops.append('__'.join(source_attrs[:len(hops) + 1]))
+            opts = field.related_model._meta
+        field = opts.get_field(source_attrs[-1])
+    except FieldDoesNotExist as e:
+        raise Unsupported(str(e))
+    if not field.concrete or field.many_to_many:
+        raise Unsupported(source_attrs[-1])
+    return field, tuple(hops)
+
+
+def converter(field, column):
+    """
+    A function of the current timezone returning None to copy the value, or
+    a callable taking a non-null value.
+    """
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is not None or not (column.many_to_one or column.one_to_one):
+            raise Unsupported(field.field_name)
+        return copy
+    if isinstance(field, drf_fields.ReadOnlyField):
+        return copy
+    if not isinstance(field, CONVERTED) or column.is_relation:
+        raise Unsupported(field.field_name)
+    if type(field).to_representation is drf_fields.DateTimeField.to_representation:
+        return datetime_converter(field)
+    method = type(field).to_representation
+    if isinstance(column, PASS_THROUGH.get(method, ())):
+        if not isinstance(field, drf_fields.ChoiceField) or all(isinstance(key, str) for key in field.choice_strings_to_values.values()):
+            return copy
+    return lambda zone: field.to_representation
+
+
+def copy(zone):
+    return None
+
+
+def datetime_converter(field):
+    """
+    DateTimeField.to_representation() for aware datetimes in ISO 8601, with
+    the timezone resolved once.
+    """
+    def make(zone):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if zone is None or hasattr(field, 'timezone') or output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        def convert(value):
+            if not timezone.is_aware(value):
+                return field.to_representation(value)
+            try:
+                value = value.astimezone(zone).isoformat()
+            except OverflowError:
+                return field.to_representation(value)
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return make
+
+
+class ValuesReader:
+    """
+    Serializes querysets for one ModelSerializer from .values() rows.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class()
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise Unsupported(serializer_class.__name__)
+        model = serializer_class.Meta.model
+
+        self.fields = []
+        columns = {}
+        for field in serializer._readable_fields:
+            if fields is not None and field.field_name not in fields:
+                continue
+            if field.source == '*' or not field.source_attrs:
+                raise Unsupported(field.field_name)
+            column, hops = model_field(model, field.source_attrs)
+            missing = None
+            if hops:
+                if field.default is not drf_fields.empty:
+                    raise Unsupported(field.field_name)
+                if field.allow_null:
+                    missing = None
+                elif not field.required:
+                    missing = SKIP
+                else:
+                    raise Unsupported(field.field_name)
+            name = '__'.join(field.source_attrs)
+            columns.update(dict.fromkeys(hops + (name,)))
+            self.fields.append((field.field_name, name, converter(field, column), hops, missing))
+        self.columns = tuple(columns)
+
+    def values(self, queryset, *extra):
+        # extra: columns the caller needs besides the output, e.g. a pagination key
+        return queryset.values(*dict.fromkeys(self.columns + extra or ('pk',)))
+
+    def convert(self, rows):
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+        fields = [(name, column, make(zone), hops, missing) for name, column, make, hops, missing in self.fields]
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert, hops, missing in fields:
+                if hops and any(row[hop] is None for hop in hops):
+                    if missing is not SKIP:
+                        item[name] = missing
+                    continue
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def data(self, queryset):
+        return self.convert(self.values(queryset))
+
+
+@lru_cache(maxsize=256)
+def reader_for(serializer_class, fields=None):
+    """
+    The ValuesReader of a serializer class, optionally for a subset of its
+    fields, or None when it needs the serializer.
+    """
+    try:
+        return ValuesReader(serializer_class, fields)
+    except Unsupported:
+        return None
+
+
+def list_data(view, queryset):
+    """
+    Response data of a list of objects, the fast way when possible. The view
+    is a SparseFieldsetMixin: only the fields it selects are read.
+    """
+    reader = reader_for(view.get_serializer_class(), view.sparse_fields())
+    if reader is None:
+        return view.get_serializer(view.project(queryset), many=True).data
+    return reader.data(queryset)
+
+
+def list_page(view, queryset):
+    """
+    The page of a paginated list and its response data, the fast way when
+    possible. Pages hold values() rows then, not model instances.
+    """
+    reader = reader_for(view.get_serializer_class(), view.sparse_fields())
+    if reader is None:
+        page = view.paginate_queryset(view.project(queryset))
+        return page, view.get_serializer(page, many=True).data
+    page = view.paginate_queryset(reader.values(queryset, *getattr(view.paginator, 'columns', ())))
+    return page, reader.convert(page)
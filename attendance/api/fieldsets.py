@@ -0,0 +1,123 @@
+"""
+Sparse fieldsets: ``?fields=id,employee,punch_time`` or ``?exclude=latitude,longitude``.
+
+Read requests get only the selected serializer fields, and list querysets
+load only the columns those fields read: ``.only()`` on the selected
+columns plus ``select_related`` for the foreign keys that fields such as
+``company_name`` (``company.name``) go through. Fields that are not plain
+columns (method fields, properties) leave the queryset unprojected.
+"""
+from functools import lru_cache
+
+from django.utils.translation import gettext_lazy as _
+from drf_yasg import openapi
+from rest_framework.exceptions import ValidationError
+
+from .fast_read import Unsupported, model_field
+
+FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, description=_("Comma-separated fields to return (default: all)."), type=openapi.TYPE_STRING),
+    openapi.Parameter('exclude', openapi.IN_QUERY, description=_("Comma-separated fields to leave out."), type=openapi.TYPE_STRING),
+]
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+@lru_cache(maxsize=None)
+def readable_fields(serializer_class):
+    return tuple(field.field_name for field in serializer_class()._readable_fields)
+
+
+def split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def select_fields(params, serializer_class):
+    """
+    The readable fields of serializer_class that the fields/exclude query
+    parameters select, in serializer order, or None for all of them.
+    """
+    fields, exclude = params.get('fields'), params.get('exclude')
+    if not fields and not exclude:
+        return None
+    available = readable_fields(serializer_class)
+    selected = split(fields) if fields else set(available)
+    excluded = split(exclude or '')
+    unknown = (selected | excluded) - set(available)
+    if unknown:
+        raise ValidationError({"detail": _("Unknown fields: %(fields)s.") % {"fields": ', '.join(sorted(unknown))}})
+    return tuple(name for name in available if name in selected and name not in excluded)
+
+
+def projection(serializer_class, fields):
+    """
+    The .only() paths and select_related() joins that the given fields read,
+    or None when one of them is not a plain column.
+    """
+    by_name = {field.field_name: field for field in serializer_class()._readable_fields}
+    model = serializer_class.Meta.model
+    columns, joins = {}, {}
+    try:
+        for name in fields:
+            field = by_name[name]
+            if field.source == '*' or not field.source_attrs:
+                return None
+            column, hops = model_field(model, field.source_attrs)
+            columns.update(dict.fromkeys(hops + ('__'.join(field.source_attrs[:-1] + [column.name]),)))
+            if hops:
+                joins[hops[-1]] = None
+    except Unsupported:
+        return None
+    return tuple(columns), tuple(joins)
+
+
+class SparseFieldsetMixin:
+    """
+    Viewset support for the fields/exclude query parameters.
+
+    The serializer is trimmed for every read; list views pass their
+    queryset through project().
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Reject unknown field names before the action runs
+        self.sparse_fields()
+
+    def sparse_fields(self):
+        """Selected serializer field names, or None for all of them."""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            if self.request.method in SAFE_METHODS:
+                self._sparse_fields = select_fields(self.request.query_params, self.get_serializer_class())
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
+
+    def project(self, queryset):
+        """Load only the columns of the selected fields."""
+        fields = self.sparse_fields()
+        if fields is None:
+            return queryset
+        selected = projection(self.get_serializer_class(), fields)
+        if selected is None:
+            return queryset
+        columns, joins = selected
+        # Keyset pagination reads its key from every row
+        columns += getattr(self.paginator, 'columns', ())
+        queryset = queryset.select_related(None)
+        if joins:
+            queryset = queryset.select_related(*joins)
+        return queryset.only(*columns or ('pk',))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.project(queryset) if self.action == 'list' else queryset
@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.translation import gettext_lazy as _
+from drf_yasg import openapi
+from rest_framework.exceptions import ValidationError
+
+from ..models import AttendanceLog
+
+# Integer filters: query parameter -> lookup
+ID_FILTERS = {
+    'employee': 'employee_id',
+    'device': 'device_id',
+    'department': 'employee__department_id',
+}
+
+# Swagger parameters of filter_attendance_logs()
+ATTENDANCE_LOG_FILTER_PARAMETERS = [
+    openapi.Parameter('from', openapi.IN_QUERY, description=_("Punches at or after this date (YYYY-MM-DD) or ISO datetime."), type=openapi.TYPE_STRING),
+    openapi.Parameter('to', openapi.IN_QUERY, description=_("Punches up to this date (inclusive) or before this ISO datetime."), type=openapi.TYPE_STRING),
+    openapi.Parameter('employee', openapi.IN_QUERY, description=_("Employee ID."), type=openapi.TYPE_INTEGER),
+    openapi.Parameter('device', openapi.IN_QUERY, description=_("Device ID."), type=openapi.TYPE_INTEGER),
+    openapi.Parameter('department', openapi.IN_QUERY, description=_("Department ID of the employee."), type=openapi.TYPE_INTEGER),
+    openapi.Parameter('in_out_status', openapi.IN_QUERY, description=_("IN, OUT, BREAK_IN or BREAK_OUT."), type=openapi.TYPE_STRING),
+    openapi.Parameter('verification_method', openapi.IN_QUERY, description=_("FP, FACE, CARD, PWD, GPS or MANUAL."), type=openapi.TYPE_STRING),
+]
+
+
+def parse_bound(value, end=False):
+    """
+    Aware datetime of a from/to parameter. A plain date stands for the
+    start of that local day, or for ``to`` the start of the next one.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_attendance_logs(queryset, params):
+    """
+    Apply the from/to, employee, device, department, in_out_status and
+    verification_method query parameters. Every filter is a range or
+    equality on an indexed column: (company, punch_time, id),
+    (employee, punch_time) or (device, punch_time).
+    """
+    try:
+        if params.get('from'):
+            queryset = queryset.filter(punch_time__gte=parse_bound(params['from']))
+        if params.get('to'):
+            queryset = queryset.filter(punch_time__lt=parse_bound(params['to'], end=True))
+    except ValueError:
+        raise ValidationError({"detail": _("from and to must be dates (YYYY-MM-DD) or ISO datetimes.")})
+
+    for param, lookup in ID_FILTERS.items():
+        value = params.get(param)
+        if value:
+            if not value.isdigit():
+                raise ValidationError({"detail": _("%(param)s must be an integer.") % {"param": param}})
+            queryset = queryset.filter(**{lookup: int(value)})
+
+    in_out_status = params.get('in_out_status')
+    if in_out_status:
+        if in_out_status not in dict(AttendanceLog.STATUS_CHOICES):
+            raise ValidationError({"detail": _("Invalid in_out_status.")})
+        queryset = queryset.filter(in_out_status=in_out_status)
+    verification_method = params.get('verification_method')
+    if verification_method:
+        if verification_method not in dict(AttendanceLog.VERIFICATION_CHOICES):
+            raise ValidationError({"detail": _("Invalid verification_method.")})
+        queryset = queryset.filter(verification_method=verification_method)
+    return queryset
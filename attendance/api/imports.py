@@ -9,7 +9,7 @@ from django.views.decorators.csrf import csrf_exempt,csrf_protect
 
 # DRF imports
 from rest_framework import viewsets, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import ValidationError
@@ -23,7 +23,8 @@ from drf_yasg import openapi
 # Custom imports (adjust as needed for your project)
 from .utils import success_response, error_response, validation_error_response
 from .permission import AttendanceHasDynamicModelPermission,CustomPermissionCheckUp
-from ..models import Employee, Device, AttendanceLog, Shift, Schedule, WorkHours
+from .fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
+from ..models import Employee, Device, AttendanceLog, Shift, Schedule, WorkHours, MonthlyAttendanceSummary, PayrollExport
 from .serializers import (
     EmployeeSerializer,
     DeviceSerializer,
@@ -31,4 +32,6 @@ from .serializers import (
     ShiftSerializer,
     ScheduleSerializer,
     WorkHoursSerializer,
+    MonthlyAttendanceSummarySerializer,
+    PayrollExportSerializer,
 )
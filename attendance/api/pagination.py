@@ -0,0 +1,112 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PunchTimeCursorPagination(BasePagination):
+    """
+    Keyset pagination of attendance logs, newest first, on (punch_time, id).
+
+    A page is ``WHERE (punch_time, id) < cursor ORDER BY punch_time DESC, id DESC
+    LIMIT n`` (served by the (company, punch_time, id) index), so its cost does
+    not depend on how deep the client pages. Cursors are opaque base64 tokens;
+    ``previous`` walks the same key the other way.
+    """
+    cursor_query_param = 'cursor'
+    # Read from every row of a page to build the cursors
+    columns = ('punch_time', 'id')
+    page_size_query_param = 'page_size'
+    # Largest primary key a cursor may carry (a signed 64-bit column)
+    max_id = 2 ** 63 - 1
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'ATTENDANCE_LOG_PAGE_SIZE', 100)
+        limit = getattr(settings, 'ATTENDANCE_LOG_MAX_PAGE_SIZE', 1000)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except ValueError:
+            return default
+        return min(max(size, 1), limit)
+
+    @staticmethod
+    def position(log):
+        # A model instance, or a values() row of the fast read path
+        if isinstance(log, dict):
+            return log['punch_time'], log['id']
+        return log.punch_time, log.pk
+
+    def encode_cursor(self, log, reverse):
+        punch_time, pk = self.position(log)
+        position = {'t': punch_time.isoformat(), 'i': pk, 'r': int(reverse)}
+        token = base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode()))
+            punch_time = parse_datetime(position['t'])
+            pk = int(position['i'])
+            if punch_time is None or not 0 <= pk <= self.max_id:
+                raise ValueError
+            return punch_time, pk, bool(position['r'])
+        except (TypeError, ValueError, KeyError):
+            # A client error, whatever the token was tampered with
+            raise ValidationError({"detail": _("Invalid cursor.")})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        reverse = bool(cursor and cursor[2])
+        if cursor:
+            punch_time, pk = cursor[0], cursor[1]
+            if reverse:
+                queryset = queryset.filter(Q(punch_time__gt=punch_time) | Q(punch_time=punch_time, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(punch_time__lt=punch_time) | Q(punch_time=punch_time, id__lt=pk))
+        ordering = ('punch_time', 'id') if reverse else ('-punch_time', '-id')
+        rows = list(queryset.order_by(*ordering)[:size + 1])
+        has_more = len(rows) > size
+        page = rows[:size]
+        if reverse:
+            page.reverse()
+
+        self.next = self.previous = None
+        if page:
+            # Walking back, the page the client came from always follows
+            if has_more or reverse:
+                self.next = self.encode_cursor(page[-1], reverse=False)
+            if (has_more and reverse) or (cursor and not reverse):
+                self.previous = self.encode_cursor(page[0], reverse=True)
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            "detail": _("Attendance logs retrieved successfully."),
+            "next": self.next,
+            "previous": self.previous,
+            "data": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'detail': {'type': 'string'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'data': schema,
+            },
+        }
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..models import  Employee, Device, AttendanceLog, Shift, Schedule, WorkHours
+from ..models import  Employee, Device, AttendanceLog, Shift, Schedule, WorkHours, MonthlyAttendanceSummary, PayrollExport
 from datetime import datetime
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -113,30 +113,32 @@ class AttendanceLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendanceLog
         fields = [
-            'id', 'employee', 'company', 'device', 'timestamp', 
-            'status', 'mode', 'locationName', 'latitude', 'longitude'
+            'id', 'employee', 'company', 'device', 'punch_time', 'in_out_status',
+            'verification_method', 'punch_mode', 'work_code', 'locationName', 'latitude', 'longitude'
         ]
 
     def validate(self, data):
         """
-        Validate the employee's active status in the company and ensure that the timestamp is valid.
+        Validate the employee's active status in the company and ensure that the punch time is valid.
         """
-        employee = data.get('employee')
+        # Fall back to the stored values on partial updates
+        employee = data.get('employee', getattr(self.instance, 'employee', None))
+        company = data.get('company', getattr(self.instance, 'company', None))
 
         # Ensure the employee is active under the company
-        if not employee.is_active or not employee.company == data.get('company'):
+        if not employee or employee.status != 'Active' or not employee.company == company:
             raise serializers.ValidationError("Employee is not active or does not belong to the specified company.")
 
         # Use timezone.now() to get the current time in a timezone-aware manner
         current_time = timezone.now()
 
-        # Ensure the timestamp is not in the future
-        if data['timestamp'] > current_time:
-            raise serializers.ValidationError("Timestamp cannot be set in the future.")
+        # Ensure the punch time is not in the future
+        if data.get('punch_time') and data['punch_time'] > current_time:
+            raise serializers.ValidationError("Punch time cannot be set in the future.")
 
         return data
 
-    def validate_status(self, value):
+    def validate_in_out_status(self, value):
         """
         Ensure that the attendance status is valid.
         """
@@ -163,13 +165,14 @@ class ShiftSerializer(serializers.ModelSerializer):
     # Custom validation for start and end time
     def validate(self, data):
         """
-        Ensure start time is before end time.
+        Ensure start time and end time differ. An end time before the start
+        time is a night shift running past midnight.
         """
         start_time = data.get('start_time')
         end_time = data.get('end_time')
 
-        if start_time >= end_time:
-            raise serializers.ValidationError("Start time must be before end time.")
+        if start_time and end_time and start_time == end_time:
+            raise serializers.ValidationError("Start time and end time must differ.")
 
         return data
 
@@ -214,3 +217,38 @@ class WorkHoursSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Overtime hours cannot be negative.")
         
         return data
+
+
+# Read-only serializer for MonthlyAttendanceSummary
+class MonthlyAttendanceSummarySerializer(serializers.ModelSerializer):
+    employee_code = serializers.CharField(source='employee.employee_id', read_only=True)
+    employee_name = serializers.CharField(source='employee.name', read_only=True)
+    department = serializers.IntegerField(source='employee.department_id', read_only=True)
+
+    class Meta:
+        model = MonthlyAttendanceSummary
+        fields = [
+            'id', 'employee', 'employee_code', 'employee_name', 'department', 'year_month',
+            'present_days', 'absent_days', 'leave_days', 'late_days', 'early_leave_days', 'overtime_days',
+            'worked_hours', 'overtime_hours', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+# Read-only serializer for PayrollExport jobs
+class PayrollExportSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollExport
+        fields = [
+            'id', 'year_month', 'file_format', 'status', 'total_rows', 'processed_rows', 'progress',
+            'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Percentage of the employees written so far."""
+        if obj.status == 'done':
+            return 100
+        return int(obj.processed_rows * 100 / obj.total_rows) if obj.total_rows else 0
@@ -20,6 +20,12 @@ from .views.schedule_views import ScheduleViewSet
 # Import WorkHoursViewSet from workhours_views.py
 from .views.workhours_views import WorkHoursViewSet
 
+# Import MonthlyAttendanceSummaryViewSet from monthly_summary_views.py
+from .views.monthly_summary_views import MonthlyAttendanceSummaryViewSet
+
+# Import PayrollExportViewSet from payroll_export_views.py
+from .views.payroll_export_views import PayrollExportViewSet
+
 
 
 
@@ -34,6 +40,8 @@ router.register(r'attendance-logs', AttendanceLogViewSet)
 router.register(r'shifts', ShiftViewSet)
 router.register(r'schedules', ScheduleViewSet)
 router.register(r'work-hours', WorkHoursViewSet)
+router.register(r'monthly-summaries', MonthlyAttendanceSummaryViewSet)
+router.register(r'payroll-exports', PayrollExportViewSet)
 
 # Include all the router URLs
 urlpatterns = [
@@ -1,24 +1,45 @@
 from ..imports import *
 from django.utils.translation import gettext_lazy as _  # Importing translation functions
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.parsers import JSONParser
+from ..parsers import NDJSONParser
+from ..pagination import PunchTimeCursorPagination
+from .. import fast_read
+from ..filters import ATTENDANCE_LOG_FILTER_PARAMETERS, filter_attendance_logs
+from ...ingest import ingest_rows
+from django.utils import timezone
+from ... import buffer, debounce, log_stream, outbox, punctuality
+from datetime import date, timedelta
 
 @method_decorator(csrf_protect, name='dispatch')
-class AttendanceLogViewSet(viewsets.ModelViewSet):
+class AttendanceLogViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = AttendanceLog.objects.all()
     serializer_class = AttendanceLogSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, AttendanceHasDynamicModelPermission]
     throttle_classes = [UserRateThrottle]
+    pagination_class = PunchTimeCursorPagination
 
 
 
     @swagger_auto_schema(
         operation_summary=_("List Attendance Logs"),
-        operation_description=_("Retrieve a list of attendance logs for the user's company."),
+        operation_description=_(
+            "Retrieve the attendance logs of the user's company, newest first, one page at a time. "
+            "Follow the opaque next/previous links to page through the logs. "
+            "The filters are applied in the database."
+        ),
+        manual_parameters=ATTENDANCE_LOG_FILTER_PARAMETERS + FIELDSET_PARAMETERS + [
+            openapi.Parameter('cursor', openapi.IN_QUERY, description=_("Opaque cursor from a next/previous link."), type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description=_("Logs per page (bounded by the server)."), type=openapi.TYPE_INTEGER),
+        ],
         responses={
             200: openapi.Response(
                 description=_("A list of attendance logs"),
                 schema=AttendanceLogSerializer(many=True)
             ),
+            400: openapi.Response(description=_("Invalid filter")),
             403: openapi.Response(
                 description=_("Permission denied")
             )
@@ -26,16 +47,18 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
         tags=[_("Attendance Logs")]
     )
     def list(self, request, *args, **kwargs):
-        """Return a list of attendance logs for the user's company."""
+        """Return one page of attendance logs of the user's company."""
         try:
             # Filter to get attendance logs belonging to the user's company
             queryset = self.get_queryset().filter(company=request.user.company)
+            queryset = filter_attendance_logs(queryset, request.query_params)
 
-            if queryset.exists():
-                serializer = self.get_serializer(queryset, many=True)
-                return Response({"detail": _("Attendance logs retrieved successfully."), "data": serializer.data}, status=status.HTTP_200_OK)
-            else:
+            page, data = fast_read.list_page(self, queryset)
+            if not page and not request.query_params.get('cursor'):
                 return Response({"detail": _("No attendance logs found.")}, status=status.HTTP_404_NOT_FOUND)
+            return self.get_paginated_response(data)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except DatabaseError as e:
             return Response({"detail": _("Database error occurred."), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -70,7 +93,16 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
 
         try:
             serializer.is_valid(raise_exception=True)
+            if buffer.buffer_enabled():
+                # Write-behind: the punch is stored durably and flushed in a batch later
+                buffer.record_punch(**serializer.validated_data)
+                return Response({"detail": _("Attendance log accepted."), "data": serializer.data}, status=status.HTTP_202_ACCEPTED)
+            data = serializer.validated_data
+            if not debounce.accept(user.company.pk, data['employee'].pk, data.get('punch_time') or timezone.now()):
+                debounce.count_suppressed(user.company.pk, 1)
+                return Response({"detail": _("Duplicate punch ignored (inside the debounce window).")}, status=status.HTTP_200_OK)
             self.perform_create(serializer)
+            debounce.remember([serializer.instance])
             return Response({"detail": _("Attendance log created successfully."), "data": serializer.data}, status=status.HTTP_201_CREATED)
         except ValidationError as e:
             return Response({"detail": _("Validation error."), "error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
@@ -81,9 +113,203 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
         """Save the user and their company when creating attendance log."""
         serializer.save()
 
+    @swagger_auto_schema(
+        operation_summary=_("Bulk Create Attendance Logs"),
+        operation_description=_(
+            "Create many attendance logs at once from a JSON array or an NDJSON body "
+            "(application/x-ndjson). Duplicate punches are skipped without failing the batch. "
+            "Returns an accepted/duplicate/suppressed/rejected report for every row."
+        ),
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        responses={
+            200: openapi.Response(description=_("Per-row ingest report")),
+            400: openapi.Response(description=_("Validation error")),
+            403: openapi.Response(description=_("Permission denied")),
+        },
+        tags=[_("Attendance Logs")]
+    )
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Create attendance logs in bulk and report the outcome per row."""
+        user = request.user
+
+        if not user.company.is_active or not user.is_active:
+            return Response(
+                {"detail": _("You or your company is inactive, and attendance logs cannot be submitted.")},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"detail": _("Request body must be a JSON array or NDJSON.")}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = getattr(settings, 'ATTENDANCE_BULK_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            return Response({"detail": _("Too many rows in one request. The limit is %(limit)s.") % {"limit": max_rows}}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = ingest_rows(user.company, rows)
+        except DatabaseError as e:
+            return Response({"detail": _("Server error while creating attendance logs."), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        accepted = sum(1 for row in report if row['status'] == 'accepted')
+        duplicates = sum(1 for row in report if row['status'] == 'duplicate')
+        suppressed = sum(1 for row in report if row['status'] == 'suppressed')
+        return Response({
+            "detail": _("Bulk attendance logs processed."),
+            "accepted": accepted,
+            "duplicates": duplicates,
+            "suppressed": suppressed,
+            "rejected": len(report) - accepted - duplicates - suppressed,
+            "data": report,
+        }, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_summary=_("Punch Buffer Metrics"),
+        operation_description=_(
+            "Return the depth of the write-behind punch buffer, the latency of the last flush and the number of "
+            "duplicate punches suppressed for your company. The buffer is shared by every company, so only staff "
+            "users may read it."
+        ),
+        responses={
+            200: openapi.Response(description=_("Punch buffer metrics")),
+            403: openapi.Response(description=_("Permission denied")),
+        },
+        tags=[_("Attendance Logs")]
+    )
+    @action(detail=False, methods=['get'], url_path='buffer-metrics', permission_classes=[IsAuthenticated, IsAdminUser])
+    def buffer_metrics(self, request):
+        """Return the write-behind buffer metrics (staff only)."""
+        data = buffer.metrics()
+        data['suppressed_duplicates'] = debounce.suppressed_count(request.user.company.pk)
+        return Response({"detail": _("Punch buffer metrics retrieved successfully."), "data": data}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_summary=_("Export Unsynced Attendance Logs"),
+        operation_description=_(
+            "Stream attendance logs that have not been synced yet as NDJSON, oldest first. "
+            "Pass the id of the last row received as cursor to get the next page, "
+            "and acknowledge stored rows with outbox/ack."
+        ),
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, description=_("Return rows with an id greater than this."), type=openapi.TYPE_INTEGER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=_("Maximum number of rows."), type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(description=_("NDJSON stream of attendance logs")),
+            400: openapi.Response(description=_("Invalid cursor or limit")),
+            403: openapi.Response(description=_("Permission denied")),
+        },
+        tags=[_("Attendance Logs")]
+    )
+    @action(detail=False, methods=['get'], url_path='outbox')
+    def outbox(self, request):
+        """Stream unsynced attendance logs as NDJSON."""
+        try:
+            cursor = int(request.query_params.get('cursor', 0))
+            limit = int(request.query_params.get('limit', outbox.batch_limit()))
+        except ValueError:
+            return Response({"detail": _("cursor and limit must be integers.")}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor < 0 or not 0 < limit <= outbox.max_batch_limit():
+            return Response(
+                {"detail": _("limit must be between 1 and %(limit)s.") % {"limit": outbox.max_batch_limit()}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return StreamingHttpResponse(
+            outbox.iter_ndjson(request.user.company, cursor, limit),
+            content_type='application/x-ndjson'
+        )
+
+    @swagger_auto_schema(
+        operation_summary=_("Acknowledge Exported Attendance Logs"),
+        operation_description=_("Mark the attendance logs with the given ids as synced."),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER))},
+            required=['ids'],
+        ),
+        responses={
+            200: openapi.Response(description=_("Number of attendance logs marked as synced")),
+            400: openapi.Response(description=_("Validation error")),
+            403: openapi.Response(description=_("Permission denied")),
+        },
+        tags=[_("Attendance Logs")]
+    )
+    @action(detail=False, methods=['post'], url_path='outbox/ack')
+    def outbox_ack(self, request):
+        """Mark a batch of exported attendance logs as synced."""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            return Response({"detail": _("ids must be a list of attendance log ids.")}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > outbox.max_batch_limit():
+            return Response(
+                {"detail": _("Too many ids in one request. The limit is %(limit)s.") % {"limit": outbox.max_batch_limit()}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            synced = outbox.acknowledge(request.user.company, ids)
+        except DatabaseError as e:
+            return Response({"detail": _("Database error occurred."), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"detail": _("Attendance logs marked as synced."), "synced": synced}, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_summary=_("Late Arrival / Early Leave Report"),
+        operation_description=_(
+            "First IN and last OUT per employee and day, compared in the database with the planned shift "
+            "(with the configured grace periods). Ordered by date and employee, paginated."
+        ),
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, description=_("First day, YYYY-MM-DD (default: today)."), type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description=_("Last day, YYYY-MM-DD (default: from)."), type=openapi.TYPE_STRING),
+            openapi.Parameter('status', openapi.IN_QUERY, description=_("all, late, early or exceptions (late or early, default)."), type=openapi.TYPE_STRING),
+            openapi.Parameter('department', openapi.IN_QUERY, description=_("Only employees of this department ID."), type=openapi.TYPE_INTEGER),
+            openapi.Parameter('employee', openapi.IN_QUERY, description=_("Only this employee ID."), type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page', openapi.IN_QUERY, description=_("Page number, starting at 1."), type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description=_("Rows per page."), type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(description=_("One page of the punctuality report")),
+            400: openapi.Response(description=_("Invalid filter")),
+            403: openapi.Response(description=_("Permission denied")),
+        },
+        tags=[_("Attendance Logs")]
+    )
+    @action(detail=False, methods=['get'], url_path='punctuality')
+    def punctuality(self, request):
+        """Return late arrivals and early leaves of the user's company."""
+        params = request.query_params
+        try:
+            start_date = date.fromisoformat(params['from']) if params.get('from') else timezone.localdate()
+            end_date = date.fromisoformat(params['to']) if params.get('to') else start_date
+            page = int(params.get('page', 1))
+            size = int(params.get('page_size', punctuality.page_size()))
+            department = int(params['department']) if params.get('department') else None
+            employee_ids = [int(params['employee'])] if params.get('employee') else None
+        except ValueError:
+            return Response({"detail": _("Invalid date, page or ID parameter.")}, status=status.HTTP_400_BAD_REQUEST)
+        report_status = params.get('status', 'exceptions')
+        if report_status not in punctuality.STATUSES:
+            return Response({"detail": _("status must be one of: %(statuses)s.") % {"statuses": ", ".join(punctuality.STATUSES)}}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end_date - start_date).days < punctuality.max_days():
+            return Response({"detail": _("The date range must cover 1 to %(days)s days.") % {"days": punctuality.max_days()}}, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or not 0 < size <= punctuality.max_page_size():
+            return Response({"detail": _("page must be positive and page_size between 1 and %(limit)s.") % {"limit": punctuality.max_page_size()}}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = punctuality.report_page(
+                request.user.company, start_date, end_date, page, size,
+                employee_ids=employee_ids, department=department, status=report_status,
+            )
+        except DatabaseError as e:
+            return Response({"detail": _("Database error occurred."), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"detail": _("Punctuality report retrieved successfully."), "data": data}, status=status.HTTP_200_OK)
+
     @swagger_auto_schema(
         operation_summary=_("Retrieve Attendance Log"),
         operation_description=_("Retrieve a specific attendance log."),
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description=_("Attendance log details retrieved successfully"),
@@ -111,22 +337,24 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary=_("Retrieve Attendance Logs by Employee ID"),
-        operation_description=_("Retrieve attendance logs for a specific employee by their ID."),
-        manual_parameters=[
-            openapi.Parameter(
-                'employee_id',
-                openapi.IN_QUERY,
-                description=_("ID of the employee whose attendance logs you want to retrieve."),
-                type=openapi.TYPE_INTEGER,
-                required=True
-            ),
+        operation_description=_(
+            "Attendance logs of one employee of the user's company, newest first. Without from/to the last "
+            "ATTENDANCE_LOG_DEFAULT_DAYS days are returned. Pages are cursor-paginated like the list; "
+            "with stream=ndjson the whole range is streamed as NDJSON instead."
+        ),
+        manual_parameters=FIELDSET_PARAMETERS + [
+            openapi.Parameter('from', openapi.IN_QUERY, description=_("Punches at or after this date (YYYY-MM-DD) or ISO datetime."), type=openapi.TYPE_STRING),
+            openapi.Parameter('to', openapi.IN_QUERY, description=_("Punches up to this date (inclusive) or before this ISO datetime."), type=openapi.TYPE_STRING),
+            openapi.Parameter('stream', openapi.IN_QUERY, description=_("ndjson to stream every log of the range."), type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description=_("Opaque cursor from a next/previous link."), type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description=_("Logs per page (bounded by the server)."), type=openapi.TYPE_INTEGER),
         ],
         responses={
             200: openapi.Response(
                 description=_("Attendance logs retrieved successfully"),
                 schema=AttendanceLogSerializer(many=True)
             ),
-            400: openapi.Response(description=_("employee_id parameter is required.")),
+            400: openapi.Response(description=_("Invalid filter")),
             404: openapi.Response(description=_("Employee not found or does not belong to your company.")),
             403: openapi.Response(description=_("Permission denied")),
         },
@@ -136,18 +364,32 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
     @method_decorator(csrf_protect)  # CSRF সুরক্ষা সক্রিয় করা
 
     def get_logs_by_employee(self, request, employee_id=None):
-        if not employee_id:
-            return Response({"error": _("employee_id parameter is required.")}, status=status.HTTP_400_BAD_REQUEST)
+        """Return or stream the attendance logs of one employee of the user's company."""
+        if not employee_id or not employee_id.isdigit():
+            return Response({"detail": _("employee_id must be an integer.")}, status=status.HTTP_400_BAD_REQUEST)
+        if not Employee.objects.filter(pk=employee_id, company=request.user.company).exists():
+            return Response({"detail": _("Employee not found or does not belong to your company.")}, status=status.HTTP_404_NOT_FOUND)
+
+        params = request.query_params.copy()
+        params.pop('employee', None)
+        if not params.get('from'):
+            days = getattr(settings, 'ATTENDANCE_LOG_DEFAULT_DAYS', 31)
+            params['from'] = (timezone.localdate() - timedelta(days=days - 1)).isoformat()
+        try:
+            logs = filter_attendance_logs(
+                AttendanceLog.objects.filter(company=request.user.company, employee_id=int(employee_id)), params
+            )
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
+        reader = fast_read.reader_for(self.get_serializer_class(), self.sparse_fields())
+        if request.query_params.get('stream') == 'ndjson' and reader is not None:
+            return StreamingHttpResponse(log_stream.iter_ndjson(logs, reader), content_type='application/x-ndjson')
         try:
-            # Filter logs by the employee_id
-            logs = AttendanceLog.objects.filter(employee_id=employee_id)  # Use a valid field
-            serializer = AttendanceLogSerializer(logs, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except AttendanceLog.DoesNotExist:
-            return Response({"error": _("No logs found for this employee.")}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            page, data = fast_read.list_page(self, logs)
+            return self.get_paginated_response(data)
+        except DatabaseError as e:
+            return Response({"detail": _("Database error occurred."), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @swagger_auto_schema(
         operation_summary=_("Update Attendance Log"),
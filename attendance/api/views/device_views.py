@@ -1,7 +1,9 @@
 from ..imports import *
+from ... import fleet
+from .. import fast_read
 
 # ViewSet for Device
-class DeviceViewSet(viewsets.ModelViewSet):
+class DeviceViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Device.objects.all()
     serializer_class = DeviceSerializer
     authentication_classes = [JWTAuthentication]
@@ -16,7 +18,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
         response = super().dispatch(*args, **kwargs)
 
         # Applying CSRF protection
-        CsrfViewMiddleware().process_view(self.request, None, (), {})
+        CsrfViewMiddleware(lambda request: None).process_view(self.request, None, (), {})
 
         return response
         
@@ -24,6 +26,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="List Devices",
         operation_description="Retrieve a list of devices belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="A list of devices",
@@ -42,8 +45,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
             queryset = self.get_queryset().filter(company=request.user.company)
 
             if queryset.exists():
-                serializer = self.get_serializer(queryset, many=True)
-                return success_response("Device list retrieved successfully.", serializer.data)
+                return success_response("Device list retrieved successfully.", fast_read.list_data(self, queryset))
             else:
                 return success_response("No devices found.", [])
         except DatabaseError as e:
@@ -52,6 +54,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="Retrieve Device",
         operation_description="Retrieve details of a single device belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Device details retrieved successfully",
@@ -219,6 +222,27 @@ class DeviceViewSet(viewsets.ModelViewSet):
         except DatabaseError as e:
             return error_response("Server error while partially updating device.", str(e), error_type="ServerError", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @swagger_auto_schema(
+        operation_summary="Fleet Sync Status",
+        operation_description=(
+            "Return the sync health of every device of the user's company: last sync age bucket "
+            "(never, online, delayed, stale, offline), punches received in the last hour and day, "
+            "and failed sync attempts since the last success. Cached for a short time."
+        ),
+        responses={
+            200: openapi.Response(description="Fleet sync status"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Devices"]
+    )
+    @action(detail=False, methods=['get'], url_path='fleet-status')
+    def fleet_status(self, request):
+        """Return the sync health scoreboard of the company's devices."""
+        try:
+            return success_response("Fleet status retrieved successfully.", fleet.fleet_status(request.user.company))
+        except DatabaseError as e:
+            return error_response("Database error occurred.", str(e), error_type="ServerError", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @swagger_auto_schema(
         operation_summary="Delete Device",
         operation_description="Delete a device.",
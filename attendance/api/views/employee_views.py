@@ -1,8 +1,9 @@
 # views/employee_views.py
 from ..imports import *
+from .. import fast_read
 
 # ViewSet for Employee
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     authentication_classes = [JWTAuthentication]
@@ -13,6 +14,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="List Employees",
         operation_description="Retrieve a list of employees belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="A list of employees",
@@ -31,8 +33,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             queryset = self.get_queryset().filter(user__company=request.user.company)
 
             if queryset.exists():
-                serializer = self.get_serializer(queryset, many=True)
-                return success_response("Employee list retrieved successfully.", serializer.data)
+                return success_response("Employee list retrieved successfully.", fast_read.list_data(self, queryset))
             else:
                 return success_response("No employees found.", [])
         except DatabaseError as e:
@@ -40,6 +41,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="Retrieve Employee",
         operation_description="Retrieve details of a single employee belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Employee details retrieved successfully",
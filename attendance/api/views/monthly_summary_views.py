@@ -0,0 +1,152 @@
+import re
+
+from ..imports import *
+from django.utils import timezone
+
+from ... import month_calendar
+
+YEAR_MONTH = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+# Read-only ViewSet for MonthlyAttendanceSummary
+class MonthlyAttendanceSummaryViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = MonthlyAttendanceSummary.objects.all()
+    serializer_class = MonthlyAttendanceSummarySerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, AttendanceHasDynamicModelPermission]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        """Summaries of the user's company, read through the (company, year_month) index."""
+        return (
+            MonthlyAttendanceSummary.objects.filter(company=self.request.user.company)
+            .select_related('employee')
+            .order_by('employee_id')
+        )
+
+    @swagger_auto_schema(
+        operation_summary="List Monthly Attendance Summaries",
+        operation_description=(
+            "Present, absent, leave, late, early-leave and overtime days plus worked and overtime hours "
+            "per employee for one month of the user's company."
+        ),
+        manual_parameters=FIELDSET_PARAMETERS + [
+            openapi.Parameter('year_month', openapi.IN_QUERY, description="Month as YYYY-MM (default: current month).", type=openapi.TYPE_STRING),
+            openapi.Parameter('department', openapi.IN_QUERY, description="Only employees of this department ID.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('employee', openapi.IN_QUERY, description="Only this employee ID.", type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Monthly attendance summaries",
+                schema=MonthlyAttendanceSummarySerializer(many=True)
+            ),
+            400: openapi.Response(description="Invalid filter"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Monthly Attendance Summaries"]
+    )
+    def list(self, request, *args, **kwargs):
+        """Return the monthly summaries of the user's company, optionally filtered by department or employee."""
+        year_month = request.query_params.get('year_month') or timezone.localdate().strftime('%Y-%m')
+        if not YEAR_MONTH.match(year_month):
+            return error_response("year_month must be formatted as YYYY-MM.", error_type="ValidationError")
+        filters = {'year_month': year_month}
+        for param, field in (('department', 'employee__department_id'), ('employee', 'employee_id')):
+            value = request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    return error_response(f"{param} must be an integer.", error_type="ValidationError")
+                filters[field] = int(value)
+
+        try:
+            serializer = self.get_serializer(self.project(self.get_queryset().filter(**filters)), many=True)
+            return success_response("Monthly attendance summaries retrieved successfully.", serializer.data)
+        except DatabaseError as e:
+            return error_response("Database error occurred.", str(e), error_type="ServerError", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve Monthly Attendance Summary",
+        operation_description="Retrieve one monthly attendance summary of the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={
+            200: openapi.Response(
+                description="Monthly attendance summary",
+                schema=MonthlyAttendanceSummarySerializer()
+            ),
+            404: openapi.Response(description="Summary not found"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Monthly Attendance Summaries"]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """Return a single monthly summary of the user's company."""
+        return success_response("Monthly attendance summary retrieved successfully.", self.get_serializer(self.get_object()).data)
+
+    @swagger_auto_schema(
+        operation_summary="Compact Month Calendar",
+        operation_description=(
+            "Present, absent, leave and holiday days of employees for one month. With encoding=bitset (default) "
+            "every state is an integer whose bit d-1 stands for day d; with encoding=rle every employee gets a "
+            "run-length string such as \"2H5P1A\" (P present, A absent, L leave, H holiday, - nothing)."
+        ),
+        manual_parameters=[
+            openapi.Parameter('year_month', openapi.IN_QUERY, description="Month as YYYY-MM (default: current month).", type=openapi.TYPE_STRING),
+            openapi.Parameter('employees', openapi.IN_QUERY, description="Comma-separated employee IDs (default: all employees).", type=openapi.TYPE_STRING),
+            openapi.Parameter('department', openapi.IN_QUERY, description="Only employees of this department ID.", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('encoding', openapi.IN_QUERY, description="bitset (default) or rle.", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(description="Month calendars"),
+            400: openapi.Response(description="Invalid filter"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Monthly Attendance Summaries"]
+    )
+    @action(detail=False, methods=['get'], url_path='calendar')
+    def calendar(self, request):
+        """Return the compact month calendars of employees of the user's company."""
+        year_month = request.query_params.get('year_month') or timezone.localdate().strftime('%Y-%m')
+        if not YEAR_MONTH.match(year_month):
+            return error_response("year_month must be formatted as YYYY-MM.", error_type="ValidationError")
+        encoding = request.query_params.get('encoding', 'bitset')
+        if encoding not in ('bitset', 'rle'):
+            return error_response("encoding must be bitset or rle.", error_type="ValidationError")
+
+        employees = Employee.objects.filter(company=request.user.company)
+        employee_param = request.query_params.get('employees')
+        if employee_param:
+            employee_ids = employee_param.split(',')
+            if not all(value.isdigit() for value in employee_ids):
+                return error_response("employees must be comma-separated integers.", error_type="ValidationError")
+            employees = employees.filter(pk__in=[int(value) for value in employee_ids])
+        department = request.query_params.get('department')
+        if department:
+            if not department.isdigit():
+                return error_response("department must be an integer.", error_type="ValidationError")
+            employees = employees.filter(department_id=int(department))
+
+        try:
+            employee_ids = list(employees.order_by('id').values_list('id', flat=True)[:month_calendar.max_employees() + 1])
+            if len(employee_ids) > month_calendar.max_employees():
+                return error_response(
+                    f"At most {month_calendar.max_employees()} employees per request; filter by employees or department.",
+                    error_type="ValidationError",
+                )
+            calendars = month_calendar.month_calendars(request.user.company, employee_ids, year_month)
+        except DatabaseError as e:
+            return error_response("Database error occurred.", str(e), error_type="ServerError", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if encoding == 'rle':
+            rows = [
+                {'employee': employee_id, 'days': month_calendar.encode_rle(calendar, year_month)}
+                for employee_id, calendar in calendars.items()
+            ]
+        else:
+            rows = [{'employee': employee_id, **calendar} for employee_id, calendar in calendars.items()]
+        data = {
+            'year_month': year_month,
+            'days': month_calendar.month_bounds(year_month)[1].day,
+            'encoding': encoding,
+            'employees': rows,
+        }
+        return success_response("Month calendars retrieved successfully.", data)
@@ -0,0 +1,114 @@
+from ..imports import *
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from ... import payroll_export
+from .monthly_summary_views import YEAR_MONTH
+
+
+# ViewSet for background payroll exports
+class PayrollExportViewSet(SparseFieldsetMixin, viewsets.GenericViewSet):
+    queryset = PayrollExport.objects.all()
+    serializer_class = PayrollExportSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, AttendanceHasDynamicModelPermission]
+    throttle_classes = [UserRateThrottle]
+
+    def get_queryset(self):
+        """Exports of the user's company, newest first."""
+        return PayrollExport.objects.filter(company=self.request.user.company).order_by('-created_at')
+
+    def get_export(self, pk):
+        # Scoped to the user's company; exports carry no per-object permissions
+        return get_object_or_404(self.get_queryset(), pk=pk)
+
+    @swagger_auto_schema(
+        operation_summary="List Payroll Exports",
+        operation_description="List the payroll exports of the user's company, newest first.",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={
+            200: openapi.Response(description="Payroll exports", schema=PayrollExportSerializer(many=True)),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Payroll Exports"]
+    )
+    def list(self, request):
+        """Return the payroll exports of the user's company."""
+        return success_response("Payroll exports retrieved successfully.", self.get_serializer(self.project(self.get_queryset()), many=True).data)
+
+    @swagger_auto_schema(
+        operation_summary="Start Payroll Export",
+        operation_description=(
+            "Queue an export of one month of work hours with the employees' salary and bank details. "
+            "If the data of that month did not change since an earlier export, that export is returned instead."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'year_month': openapi.Schema(type=openapi.TYPE_STRING, description="Month as YYYY-MM (default: current month)."),
+                'file_format': openapi.Schema(type=openapi.TYPE_STRING, description="csv (default) or xlsx."),
+            },
+        ),
+        responses={
+            202: openapi.Response(description="Export queued", schema=PayrollExportSerializer()),
+            200: openapi.Response(description="Existing export for unchanged data", schema=PayrollExportSerializer()),
+            400: openapi.Response(description="Invalid request"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Payroll Exports"]
+    )
+    def create(self, request):
+        """Queue a payroll export, or return the one built from the same data."""
+        year_month = request.data.get('year_month') or timezone.localdate().strftime('%Y-%m')
+        if not YEAR_MONTH.match(year_month):
+            return error_response("year_month must be formatted as YYYY-MM.", error_type="ValidationError")
+        file_format = request.data.get('file_format', 'csv')
+        if file_format not in payroll_export.WRITERS:
+            return error_response("file_format must be csv or xlsx.", error_type="ValidationError")
+
+        try:
+            export, created = payroll_export.request_export(request.user.company, year_month, file_format, request.user)
+        except DatabaseError as e:
+            return error_response("Database error occurred.", str(e), error_type="ServerError", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if created:
+            return success_response("Payroll export queued.", self.get_serializer(export).data, status.HTTP_202_ACCEPTED)
+        return success_response("Payroll export for unchanged data found.", self.get_serializer(export).data)
+
+    @swagger_auto_schema(
+        operation_summary="Payroll Export Status",
+        operation_description="Status and progress of a payroll export.",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={
+            200: openapi.Response(description="Payroll export", schema=PayrollExportSerializer()),
+            404: openapi.Response(description="Export not found"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Payroll Exports"]
+    )
+    def retrieve(self, request, pk=None):
+        """Return the status and progress of a payroll export."""
+        return success_response("Payroll export retrieved successfully.", self.get_serializer(self.get_export(pk)).data)
+
+    @swagger_auto_schema(
+        operation_summary="Download Payroll Export",
+        operation_description="Download the file of a finished payroll export.",
+        responses={
+            200: openapi.Response(description="Export file"),
+            404: openapi.Response(description="Export not found"),
+            409: openapi.Response(description="Export not finished"),
+            403: openapi.Response(description="Permission denied")
+        },
+        tags=["Payroll Exports"]
+    )
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        """Stream the file of a finished payroll export."""
+        export = self.get_export(pk)
+        if export.status != 'done' or not export.file:
+            return error_response("The export is not finished yet.", error_type="Conflict", status_code=status.HTTP_409_CONFLICT)
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f"payroll-{export.year_month}.{export.file_format}",
+        )
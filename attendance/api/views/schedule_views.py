@@ -2,7 +2,7 @@
 from ..imports import *  # Assuming you have a centralized imports module
 
 # ViewSet for Schedule
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
     authentication_classes = [JWTAuthentication]
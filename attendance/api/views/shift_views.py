@@ -1,9 +1,10 @@
 # Import everything from your imports module
 from ..imports import *  # Assuming you have a centralized imports module
+from .. import fast_read
 
 
 # ViewSet for Shift
-class ShiftViewSet(viewsets.ModelViewSet):
+class ShiftViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Shift.objects.all()
     serializer_class = ShiftSerializer
     authentication_classes = [JWTAuthentication]
@@ -25,6 +26,7 @@ class ShiftViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="List Shifts",
         operation_description="Retrieve a list of shifts belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="A list of shifts",
@@ -46,8 +48,7 @@ class ShiftViewSet(viewsets.ModelViewSet):
             queryset = self.get_queryset().filter(company=user.company)
 
             if queryset.exists():
-                serializer = self.get_serializer(queryset, many=True)
-                return success_response("Shift list retrieved successfully.", serializer.data)
+                return success_response("Shift list retrieved successfully.", fast_read.list_data(self, queryset))
             else:
                 return success_response("No shifts found.", [])
         except DatabaseError as e:
@@ -56,6 +57,7 @@ class ShiftViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary="Retrieve Shift",
         operation_description="Retrieve details of a single shift belonging to the user's company.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Shift details retrieved successfully",
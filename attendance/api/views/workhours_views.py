@@ -1,7 +1,7 @@
 # Import everything from your centralized imports module
 from ..imports import *  # Assuming you have a centralized imports module
 # ViewSet for WorkHours
-class WorkHoursViewSet(viewsets.ModelViewSet):
+class WorkHoursViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = WorkHours.objects.all()
     serializer_class = WorkHoursSerializer
     authentication_classes = [JWTAuthentication]
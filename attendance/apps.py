@@ -8,3 +8,6 @@ class AttendanceConfig(AppConfig):
 
     icon = 'fas fa-blog'
 
+    def ready(self):
+        from . import signals  # noqa: F401  (registers the signal receivers)
+
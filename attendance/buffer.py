@@ -0,0 +1,370 @@
+"""
+Write-behind buffer for punches.
+
+Instead of committing one transaction per punch, requests append the punch
+to a durable spool and return. A flusher (``manage.py flush_punch_buffer``
+or the ``flush_punch_buffer`` Celery task) drains the spool in batches with
+a single bulk_create.
+
+The spool is an append-only NDJSON file by default, or a Redis list when
+ATTENDANCE_PUNCH_SPOOL_REDIS_URL is set. Punches are converted to their
+column types before they are spooled; a record that still cannot be
+written is moved to a dead-letter spool (``<path>.dead`` or the
+``<key>:dead`` list) instead of failing its batch.
+"""
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import debounce
+from .ingest import write_logs
+from .models import AttendanceLog
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+METRICS_CACHE_KEY = 'attendance:punch_buffer:metrics'
+COUNTER_CACHE_KEY = 'attendance:punch_buffer:{}'
+COUNTERS = ('flushes', 'flushed_records', 'dead_lettered')
+
+# AttendanceLog attributes stored for every buffered punch
+PUNCH_FIELDS = (
+    'employee_id', 'company_id', 'device_id', 'punch_time', 'in_out_status',
+    'verification_method', 'punch_mode', 'work_code', 'locationName', 'latitude', 'longitude',
+)
+
+
+def buffer_enabled():
+    return getattr(settings, 'ATTENDANCE_PUNCH_BUFFER', False)
+
+
+class _FileLock:
+    """
+    Exclusive flock on an open file (no-op where fcntl is unavailable).
+    """
+
+    def __init__(self, handle, blocking=True):
+        self.handle = handle
+        self.blocking = blocking
+        self.acquired = False
+
+    def __enter__(self):
+        if fcntl is None:
+            self.acquired = True
+            return self
+        flags = fcntl.LOCK_EX if self.blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.handle, flags)
+            self.acquired = True
+        except BlockingIOError:
+            self.acquired = False
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None and self.acquired:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+
+
+class FileSpool:
+    """
+    Append-only NDJSON file. The read position is kept in ``<path>.offset``
+    and the file is truncated once everything in it has been flushed.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.offset_path = self.path + '.offset'
+        self.lock_path = self.path + '.lock'
+        self.dead_path = self.path + '.dead'
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+    def _append_lines(self, path, lines):
+        with open(path, 'ab') as handle, _FileLock(handle):
+            handle.write(b''.join(lines))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def append(self, record):
+        self._append_lines(self.path, [(json.dumps(record, separators=(',', ':')) + '\n').encode()])
+
+    def dead_letter(self, lines):
+        self._append_lines(self.dead_path, [line if line.endswith(b'\n') else line + b'\n' for line in lines])
+
+    def _read_offset(self):
+        try:
+            with open(self.offset_path) as handle:
+                return int(handle.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        tmp_path = self.offset_path + '.tmp'
+        with open(tmp_path, 'w') as handle:
+            handle.write(str(offset))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.offset_path)
+
+    def pending(self):
+        try:
+            return os.path.getsize(self.path) > self._read_offset()
+        except FileNotFoundError:
+            return False
+
+    def depth(self, limit=None):
+        """
+        Number of waiting records; with ``limit``, counting stops there.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        with open(self.path, 'rb') as handle:
+            handle.seek(self._read_offset())
+            for chunk in iter(lambda: handle.read(1 << 16), b''):
+                count += chunk.count(b'\n')
+                if limit is not None and count >= limit:
+                    return limit
+        return count
+
+    def consume(self, limit, handler):
+        """
+        Pass up to ``limit`` records to ``handler`` and drop them from the
+        spool once it returns. Lines that are not JSON and the records the
+        handler returns as unwritable go to the dead-letter file. Returns
+        the number of records handled, or None if another flusher is
+        already running.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.lock_path, 'a') as lock_handle, _FileLock(lock_handle, blocking=False) as lock:
+            if not lock.acquired:
+                return None
+
+            offset = self._read_offset()
+            records, dead = [], []
+            with open(self.path, 'rb') as handle:
+                handle.seek(offset)
+                while len(records) + len(dead) < limit:
+                    line = handle.readline()
+                    if not line.endswith(b'\n'):
+                        break  # Nothing left, or a write still in progress
+                    offset += len(line)
+                    if line.strip():
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            dead.append(line)
+
+            if not records and not dead:
+                return 0
+            handled = len(records) + len(dead)
+            if records:
+                dead += [json.dumps(record, separators=(',', ':')).encode() for record in handler(records)]
+            if dead:
+                self.dead_letter(dead)
+                count_dead_lettered(len(dead))
+            self._write_offset(offset)
+
+            # Compact the spool when it has been drained completely
+            with open(self.path, 'r+b') as handle, _FileLock(handle):
+                if os.fstat(handle.fileno()).st_size == offset:
+                    handle.truncate(0)
+                    self._write_offset(0)
+            return handled
+
+
+class RedisSpool:
+    """
+    Redis list spool. Durability follows the Redis persistence settings
+    (use appendonly with appendfsync everysec or always).
+    """
+
+    def __init__(self, url, key='attendance:punch_buffer'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def append(self, record):
+        self.client.rpush(self.key, json.dumps(record, separators=(',', ':')))
+
+    def pending(self):
+        return self.client.llen(self.key) > 0
+
+    def depth(self, limit=None):
+        return self.client.llen(self.key)
+
+    def consume(self, limit, handler):
+        lock = self.client.lock(self.key + ':lock', timeout=300)
+        if not lock.acquire(blocking=False):
+            return None
+        try:
+            items = self.client.lrange(self.key, 0, limit - 1)
+            if not items:
+                return 0
+            records, dead = [], []
+            for item in items:
+                try:
+                    records.append(json.loads(item))
+                except ValueError:
+                    dead.append(item)
+            if records:
+                dead += [json.dumps(record, separators=(',', ':')) for record in handler(records)]
+            if dead:
+                self.client.rpush(self.key + ':dead', *dead)
+                count_dead_lettered(len(dead))
+            self.client.ltrim(self.key, len(items), -1)
+            return len(items)
+        finally:
+            lock.release()
+
+
+_spool = None
+
+
+def get_spool():
+    global _spool
+    if _spool is None:
+        redis_url = getattr(settings, 'ATTENDANCE_PUNCH_SPOOL_REDIS_URL', None)
+        if redis_url:
+            _spool = RedisSpool(redis_url)
+        else:
+            _spool = FileSpool(getattr(
+                settings, 'ATTENDANCE_PUNCH_SPOOL_PATH', os.path.join(settings.BASE_DIR, 'spool', 'punches.ndjson')
+            ))
+    return _spool
+
+
+def serialize_punch(log):
+    record = {field: getattr(log, field) for field in PUNCH_FIELDS}
+    record['punch_time'] = log.punch_time.isoformat()
+    return record
+
+
+def clean_punch(fields):
+    """
+    Convert punch fields to their column types: '' becomes None for
+    nullable columns and text is checked against max_length. Raises
+    ValidationError for values that cannot be stored.
+    """
+    cleaned = {}
+    for name, value in fields.items():
+        field = AttendanceLog._meta.get_field(name)
+        if not field.is_relation or name == field.attname:
+            if value == '' and field.null:
+                value = None
+            elif value is not None:
+                value = field.to_python(value)
+            if field.max_length and value is not None and len(value) > field.max_length:
+                raise ValidationError(f"{name} is longer than {field.max_length} characters.")
+        cleaned[name] = value
+    return cleaned
+
+
+def record_punch(**fields):
+    """
+    Store a punch. With the buffer enabled the punch is appended to the
+    spool (durably) and None is returned; the debounce window is applied
+    when the spool is flushed. Otherwise it is saved right away and the
+    AttendanceLog is returned, or None if it fell inside the debounce window.
+    Raises ValidationError for fields that cannot be stored.
+    """
+    log = AttendanceLog(**clean_punch(fields))
+    if not buffer_enabled():
+        if not debounce.accept(log.company_id, log.employee_id, log.punch_time):
+            debounce.count_suppressed(log.company_id, 1)
+            return None
+        log.save()
+        debounce.remember([log])
+        return log
+    get_spool().append(serialize_punch(log))
+    return None
+
+
+def _write_records(records):
+    """
+    Write spooled punches and return the records that can never be written.
+    """
+    logs, rejected = [], []
+    for record in records:
+        try:
+            # Missing fields take the model defaults
+            fields = {field: record[field] for field in PUNCH_FIELDS if field in record}
+            fields['punch_time'] = parse_datetime(fields.get('punch_time') or '')
+            if fields['punch_time'] is None:
+                raise ValidationError("punch_time is required.")
+            logs.append((AttendanceLog(**clean_punch(fields)), record))
+        except (AttributeError, TypeError, ValueError, ValidationError):
+            rejected.append(record)
+
+    try:
+        with transaction.atomic():
+            write_logs([log for log, _record in logs])
+    except (DataError, IntegrityError):
+        # One bad row fails the whole INSERT: find it by writing them one by one
+        for log, record in logs:
+            try:
+                with transaction.atomic():
+                    write_logs([log])
+            except (DataError, IntegrityError):
+                rejected.append(record)
+    return rejected
+
+
+def _count(name, amount=1):
+    key = COUNTER_CACHE_KEY.format(name)
+    cache.add(key, 0, None)
+    cache.incr(key, amount)
+
+
+def count_dead_lettered(count):
+    _count('dead_lettered', count)
+
+
+def flush(limit=None):
+    """
+    Write one batch from the spool to the database and record metrics.
+    Returns the number of punches written (None if another flusher holds the spool).
+    """
+    limit = limit or getattr(settings, 'ATTENDANCE_PUNCH_FLUSH_MAX_RECORDS', 1000)
+    started = time.monotonic()
+    written = get_spool().consume(limit, _write_records)
+    if written:
+        _count('flushes')
+        _count('flushed_records', written)
+        cache.set(METRICS_CACHE_KEY, {
+            'last_flush_at': timezone.now().isoformat(),
+            'last_flush_size': written,
+            'last_flush_latency_ms': round((time.monotonic() - started) * 1000, 2),
+        }, None)
+    return written
+
+
+def drain(limit=None):
+    """
+    Flush until the spool is empty.
+    """
+    total = 0
+    while True:
+        written = flush(limit)
+        if not written:
+            return total
+        total += written
+
+
+def metrics():
+    counters = cache.get_many([COUNTER_CACHE_KEY.format(name) for name in COUNTERS])
+    data = {name: counters.get(COUNTER_CACHE_KEY.format(name), 0) for name in COUNTERS}
+    data.update(cache.get(METRICS_CACHE_KEY) or {})
+    data['depth'] = get_spool().depth()
+    data['backend'] = type(get_spool()).__name__
+    return data
@@ -0,0 +1,193 @@
+"""
+Debounce-window duplicate punch suppression.
+
+A punch is dropped when the same employee already has a punch within the
+company's ``punch_debounce_seconds`` window. Recent punch times are kept in
+an in-process, per-employee sorted index, so checking a punch costs a
+bisect instead of a database query.
+
+Checking a punch does not record it: a punch enters the index only once
+the transaction that stored it has committed (remember()), so a failed
+write can be retried without its punches suppressing themselves.
+
+The index is per process. Every ATTENDANCE_DEBOUNCE_REFRESH_SECONDS it
+loads the punches of the last window that other processes stored since the
+last refresh, so a duplicate sent to two workers within that interval can
+still be stored twice.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import Company
+
+from .models import AttendanceLog
+
+SUPPRESSED_CACHE_KEY = 'attendance:debounce:suppressed:{}'
+WINDOW_TTL = 300  # Seconds a company's debounce window is cached in process
+
+
+class PunchIndex:
+    """
+    Sorted recent punch times per employee, bounded in size (LRU on employees).
+    """
+
+    def __init__(self, max_employees=100000, per_employee=32):
+        self.max_employees = max_employees
+        self.per_employee = per_employee
+        self.times = OrderedDict()
+        self.lock = threading.Lock()
+
+    def conflicts(self, employee_id, punch_time, window):
+        """
+        Return True if another punch of the employee lies within ``window``
+        of punch_time. The index is not changed.
+        """
+        with self.lock:
+            times = self.times.get(employee_id)
+            if not times:
+                return False
+            index = bisect.bisect_left(times, punch_time)
+            if index < len(times) and times[index] - punch_time <= window:
+                return True
+            return index > 0 and punch_time - times[index - 1] <= window
+
+    def add(self, employee_id, punch_time):
+        """
+        Record a stored punch.
+        """
+        with self.lock:
+            times = self.times.get(employee_id)
+            if times is None:
+                times = self.times[employee_id] = []
+                if len(self.times) > self.max_employees:
+                    self.times.popitem(last=False)
+            else:
+                self.times.move_to_end(employee_id)
+
+            index = bisect.bisect_left(times, punch_time)
+            if index < len(times) and times[index] == punch_time:
+                return
+            times.insert(index, punch_time)
+            if len(times) > self.per_employee:
+                del times[0]
+
+    def clear(self):
+        with self.lock:
+            self.times.clear()
+
+
+_index = PunchIndex(getattr(settings, 'ATTENDANCE_DEBOUNCE_MAX_EMPLOYEES', 100000))
+_windows = {}  # company_id -> (expires_at, timedelta)
+_refreshed = {}  # company_id -> (monotonic time, createdAt) of the last load
+
+
+def company_window(company_id):
+    """
+    Return the company's debounce window as a timedelta (zero when disabled).
+    """
+    now = time.monotonic()
+    cached = _windows.get(company_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    seconds = Company.objects.filter(pk=company_id).values_list('punch_debounce_seconds', flat=True).first() or 0
+    window = timedelta(seconds=seconds)
+    _windows[company_id] = (now + WINDOW_TTL, window)
+    return window
+
+
+def _refresh(company_id, window):
+    """
+    Load the punches of the last window on first use, then every
+    ATTENDANCE_DEBOUNCE_REFRESH_SECONDS the ones stored since the last load
+    (by any process).
+    """
+    now = time.monotonic()
+    loaded = _refreshed.get(company_id)
+    if loaded is not None and now - loaded[0] < getattr(settings, 'ATTENDANCE_DEBOUNCE_REFRESH_SECONDS', 5):
+        return
+    started = timezone.now()
+    recent = AttendanceLog.objects.filter(company_id=company_id, punch_time__gte=started - window)
+    if loaded is not None:
+        # Slack for transactions that committed after our last load began
+        recent = recent.filter(createdAt__gte=loaded[1] - timedelta(seconds=1))
+    for employee_id, punch_time in recent.values_list('employee_id', 'punch_time'):
+        _index.add(employee_id, punch_time)
+    _refreshed[company_id] = (now, started)
+
+
+def accept(company_id, employee_id, punch_time, batch=None):
+    """
+    Return True if the punch should be stored, False if it is a duplicate
+    inside the company's debounce window. ``batch`` is a PunchIndex of the
+    punches accepted so far in the same write; an accepted punch is added
+    to it. The shared index only learns of the punch through remember().
+    """
+    if company_id is None or employee_id is None:
+        return True
+    window = company_window(company_id)
+    if not window:
+        return True
+    _refresh(company_id, window)
+    if _index.conflicts(employee_id, punch_time, window):
+        return False
+    if batch is not None:
+        if batch.conflicts(employee_id, punch_time, window):
+            return False
+        batch.add(employee_id, punch_time)
+    return True
+
+
+def remember(logs):
+    """
+    Add stored AttendanceLogs to the index once the current transaction
+    commits (right away outside of one).
+    """
+    punches = [(log.employee_id, log.punch_time) for log in logs if log.company_id is not None and log.employee_id is not None]
+    if not punches:
+        return
+
+    def add():
+        for employee_id, punch_time in punches:
+            _index.add(employee_id, punch_time)
+    transaction.on_commit(add)
+
+
+def count_suppressed(company_id, count):
+    if not count:
+        return
+    key = SUPPRESSED_CACHE_KEY.format(company_id)
+    cache.add(key, 0, None)
+    cache.incr(key, count)
+
+
+def suppressed_count(company_id):
+    return cache.get(SUPPRESSED_CACHE_KEY.format(company_id), 0)
+
+
+def filter_logs(logs):
+    """
+    Split AttendanceLog instances into (kept, suppressed). Earlier punches
+    win, so the batch is checked in punch time order.
+    """
+    kept, suppressed = [], []
+    batch = PunchIndex()
+    for log in sorted(logs, key=lambda log: log.punch_time):
+        if accept(log.company_id, log.employee_id, log.punch_time, batch):
+            kept.append(log)
+        else:
+            suppressed.append(log)
+
+    per_company = {}
+    for log in suppressed:
+        per_company[log.company_id] = per_company.get(log.company_id, 0) + 1
+    for company_id, count in per_company.items():
+        count_suppressed(company_id, count)
+    return kept, suppressed
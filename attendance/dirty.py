@@ -0,0 +1,105 @@
+"""
+Queue of employee-days whose punches changed.
+
+Every path that writes or removes punches marks the affected
+(employee, date) keys here: the AttendanceLog signals (single saves
+and deletes, including the API's update/partial_update/destroy) and
+ingest.write_logs (device sync, ADMS, the punch buffer, bulk API and
+imports). workhours.recompute_dirty then recomputes only those days.
+
+A run claims its keys by stamping claimed_at and deletes them only once
+they are recomputed, so a killed worker loses nothing: its claim is taken
+over after ATTENDANCE_WORK_HOURS_DIRTY_CLAIM_TIMEOUT seconds. Overlapping
+runs skip each other's rows. Marking a claimed key again clears its claim,
+so a change made during the recomputation is not deleted with it.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DirtyWorkDay
+from .punch_assignment import business_dates
+
+
+def local_date(value):
+    return timezone.localtime(value).date()
+
+
+def mark(keys):
+    """
+    Queue (company_id, employee_id, date) keys. Keys already queued stay
+    queued once; a claim on them is cleared.
+    """
+    DirtyWorkDay.objects.bulk_create(
+        [DirtyWorkDay(company_id=company_id, employee_id=employee_id, date=day) for company_id, employee_id, day in keys],
+        update_conflicts=True,
+        unique_fields=['employee_id', 'date'],
+        update_fields=['claimed_at'],
+    )
+
+
+def mark_logs(logs):
+    """
+    Queue the employee-days of AttendanceLog instances: their local date and,
+    for night shifts, the business date of the shift they belong to.
+    """
+    by_company = {}
+    for log in logs:
+        if log.employee_id and log.company_id and log.punch_time:
+            by_company.setdefault(log.company_id, []).append((log.employee_id, log.punch_time))
+
+    keys = set()
+    for company_id, punches in by_company.items():
+        employee_ids, punch_times = zip(*punches)
+        days = business_dates(company_id, employee_ids, punch_times)
+        for employee_id, punch_time, day in zip(employee_ids, punch_times, days):
+            keys.add((company_id, employee_id, local_date(punch_time)))
+            keys.add((company_id, employee_id, day))
+    mark(keys)
+
+
+def claim_timeout():
+    return getattr(settings, 'ATTENDANCE_WORK_HOURS_DIRTY_CLAIM_TIMEOUT', 600)
+
+
+def claim(limit):
+    """
+    Claim up to ``limit`` queued keys, including keys whose claim has timed
+    out. Returns (token, {company_id: {(employee_id, date), ...}}); pass the
+    token to release() or unclaim().
+    """
+    token = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            DirtyWorkDay.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=token - timedelta(seconds=claim_timeout())))
+            .order_by('id')
+            .values_list('id', 'company_id', 'employee_id', 'date')[:limit]
+        )
+        DirtyWorkDay.objects.filter(id__in=[row[0] for row in rows]).update(claimed_at=token)
+    claimed = {}
+    for _pk, company_id, employee_id, day in rows:
+        claimed.setdefault(company_id, set()).add((employee_id, day))
+    return token, claimed
+
+
+def release(token, company_id):
+    """
+    Remove the keys of a company claimed with ``token`` once they are
+    recomputed. Keys marked again meanwhile are no longer claimed and stay.
+    """
+    DirtyWorkDay.objects.filter(company_id=company_id, claimed_at=token).delete()
+
+
+def unclaim(token):
+    """
+    Queue the keys still claimed with ``token`` again, e.g. after a failure.
+    """
+    DirtyWorkDay.objects.filter(claimed_at=token).update(claimed_at=None)
+
+
+def pending_count():
+    return DirtyWorkDay.objects.count()
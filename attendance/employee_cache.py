@@ -0,0 +1,90 @@
+"""
+Per-company cache mapping device-side user IDs (Employee.employee_id) to
+employees.
+
+The map is loaded with a single values_list query and kept both in process
+and in the configured cache backend. A version token in the cache backend
+lets every process notice when the map was invalidated by the Employee
+post_save/post_delete signals (see attendance.signals). The same employees
+keyed by primary key are derived from the map once per process and version.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Employee
+
+MAP_CACHE_KEY = 'attendance:employee_map:{}'
+VERSION_CACHE_KEY = 'attendance:employee_map_version:{}'
+
+# company_id -> [version, {employee_id: (pk, status)}, {str(pk): (pk, status)} or None]
+_local = {}
+
+
+def cache_timeout():
+    return getattr(settings, 'ATTENDANCE_EMPLOYEE_CACHE_TTL', 3600)
+
+
+def _company_id(company):
+    return getattr(company, 'pk', company)
+
+
+def version(company):
+    """
+    Token that changes whenever an employee of the company is saved or deleted.
+    """
+    return cache.get_or_set(VERSION_CACHE_KEY.format(_company_id(company)), time.time_ns, None)
+
+
+def get_employee_map(company):
+    """
+    Return {employee_id: (pk, status)} for every employee of the company.
+    """
+    company_id = _company_id(company)
+    map_version = version(company_id)
+
+    local = _local.get(company_id)
+    if local is not None and local[0] == map_version:
+        return local[1]
+
+    shared = cache.get(MAP_CACHE_KEY.format(company_id))
+    if shared is not None and shared['version'] == map_version:
+        employee_map = shared['map']
+    else:
+        employee_map = {
+            employee_id: (pk, employee_status)
+            for pk, employee_id, employee_status in Employee.objects.filter(company_id=company_id)
+            .values_list('id', 'employee_id', 'status')
+        }
+        cache.set(MAP_CACHE_KEY.format(company_id), {'version': map_version, 'map': employee_map}, cache_timeout())
+
+    _local[company_id] = [map_version, employee_map, None]
+    return employee_map
+
+
+def get_employee_pk_map(company):
+    """
+    Return {str(pk): (pk, status)} for every employee of the company, built
+    once per version of the employee map.
+    """
+    company_id = _company_id(company)
+    employee_map = get_employee_map(company_id)
+    local = _local.get(company_id)
+    if local is not None and local[1] is employee_map and local[2] is not None:
+        return local[2]
+    by_pk = {str(employee[0]): employee for employee in employee_map.values()}
+    # Another thread may have replaced or dropped the entry meanwhile
+    if local is not None and local[1] is employee_map:
+        local[2] = by_pk
+    return by_pk
+
+
+def invalidate(company):
+    """
+    Drop the cached map of a company in every process.
+    """
+    company_id = _company_id(company)
+    _local.pop(company_id, None)
+    cache.set(VERSION_CACHE_KEY.format(company_id), time.time_ns(), None)
+    cache.delete(MAP_CACHE_KEY.format(company_id))
@@ -0,0 +1,95 @@
+"""
+Sync health of a company's device fleet, computed in the database.
+
+Every device gets a last-sync age bucket, the number of punches it sent in
+the last hour and day, and its failed sync attempts since the last success.
+The whole fleet is read with one query and cached for a short time.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AttendanceLog, Device
+
+CACHE_KEY = 'attendance:fleet_status:{}'
+
+# (bucket, maximum age of the last successful sync); older devices are 'offline'
+AGE_BUCKETS = (
+    ('online', timedelta(minutes=15)),
+    ('delayed', timedelta(hours=1)),
+    ('stale', timedelta(days=1)),
+)
+BUCKETS = ('never', *(bucket for bucket, _age in AGE_BUCKETS), 'offline')
+
+
+def cache_timeout():
+    return getattr(settings, 'ATTENDANCE_FLEET_STATUS_CACHE_TTL', 30)
+
+
+def punch_count(since):
+    """
+    Correlated subquery counting a device's punches since ``since``
+    (an index range scan on (device, punch_time)).
+    """
+    return Coalesce(
+        Subquery(
+            AttendanceLog.objects.filter(device=OuterRef('pk'), punch_time__gte=since)
+            .order_by()
+            .values('device')
+            .annotate(count=Count('id'))
+            .values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def fleet_queryset(company, now=None):
+    now = now or timezone.now()
+    return (
+        Device.objects.filter(company=company)
+        .annotate(
+            age_bucket=Case(
+                When(last_sync_time__isnull=True, then=Value('never')),
+                *(When(last_sync_time__gte=now - age, then=Value(bucket)) for bucket, age in AGE_BUCKETS),
+                default=Value('offline'),
+                output_field=CharField(),
+            ),
+            punches_last_hour=punch_count(now - timedelta(hours=1)),
+            punches_last_day=punch_count(now - timedelta(days=1)),
+        )
+        .order_by('device_id')
+        .values(
+            'id', 'device_id', 'location', 'ip_address', 'port', 'last_sync_time', 'last_sync_attempt',
+            'sync_error_count', 'last_sync_error', 'age_bucket', 'punches_last_hour', 'punches_last_day',
+        )
+    )
+
+
+def fleet_status(company):
+    """
+    Return {"generated_at", "summary": {bucket: devices}, "failing", "devices": [...]} for a company.
+    """
+    key = CACHE_KEY.format(company.pk)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    now = timezone.now()
+    devices = list(fleet_queryset(company, now))
+    summary = dict.fromkeys(BUCKETS, 0)
+    for device in devices:
+        summary[device['age_bucket']] += 1
+
+    data = {
+        'generated_at': now,
+        'summary': summary,
+        'failing': sum(1 for device in devices if device['sync_error_count']),
+        'devices': devices,
+    }
+    cache.set(key, data, cache_timeout())
+    return data
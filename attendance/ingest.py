@@ -0,0 +1,285 @@
+"""
+Shared helpers for writing punches coming from devices and integrations.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import dirty
+from .debounce import filter_logs, remember
+from .employee_cache import get_employee_map, get_employee_pk_map
+from .models import AttendanceLog, Device
+
+IN_OUT_STATUSES = {choice for choice, _label in AttendanceLog.STATUS_CHOICES}
+VERIFICATION_METHODS = {choice for choice, _label in AttendanceLog.VERIFICATION_CHOICES}
+PUNCH_MODES = {'AUTO', 'MANUAL'}
+TEXT_FIELDS = {name: AttendanceLog._meta.get_field(name).max_length for name in ('work_code', 'locationName')}
+
+
+def batch_size():
+    return getattr(settings, 'ATTENDANCE_BULK_BATCH_SIZE', 1000)
+
+
+def resolve_employees(company, employee_ids):
+    """
+    Map device-side user IDs to Employee primary keys for a company
+    using the cached employee map.
+    """
+    employee_ids = {str(employee_id) for employee_id in employee_ids if employee_id}
+    if not employee_ids:
+        return {}
+    employee_map = get_employee_map(company)
+    return {
+        employee_id: employee_map[employee_id][0]
+        for employee_id in employee_ids if employee_id in employee_map
+    }
+
+
+def write_logs(logs, debounce=True):
+    """
+    Insert AttendanceLog instances in chunks. Punches inside the company's
+    debounce window are dropped first, and rows that already exist (same
+    employee and punch time) are skipped by the database. The employee-days
+    are queued for WorkHours recomputation.
+    Returns the number of rows sent to the database.
+    """
+    if debounce:
+        logs, _suppressed = filter_logs(logs)
+    size = batch_size()
+    for start in range(0, len(logs), size):
+        AttendanceLog.objects.bulk_create(logs[start:start + size], ignore_conflicts=True)
+    remember(logs)
+    dirty.mark_logs(logs)
+    return len(logs)
+
+
+class DevicePunchWriter:
+    """
+    Collect raw device punches for one device and write them in batches.
+
+    Employees are resolved once per batch, so a flush costs one SELECT and
+    one INSERT no matter how many punches it carries.
+    """
+
+    def __init__(self, company_id, device_id=None, size=None):
+        self.company_id = company_id
+        self.device_id = device_id
+        self.size = size or batch_size()
+        self.pending = []
+        self.written = 0
+        self.suppressed = 0
+        self.unknown_employees = 0
+
+    def add(self, user_id, punch_time, in_out_status='IN', verification_method='FP', work_code=None):
+        """
+        Queue a punch (punch_time is aware). Returns True when the batch is full.
+        """
+        self.pending.append((user_id, punch_time, in_out_status, verification_method, work_code))
+        return len(self.pending) >= self.size
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        employees = resolve_employees(self.company_id, {row[0] for row in pending})
+
+        logs = []
+        for user_id, punch_time, in_out_status, verification_method, work_code in pending:
+            employee_id = employees.get(user_id)
+            if employee_id is None:
+                self.unknown_employees += 1
+                continue
+            logs.append(AttendanceLog(
+                employee_id=employee_id,
+                company_id=self.company_id,
+                device_id=self.device_id,
+                punch_time=punch_time,
+                in_out_status=in_out_status,
+                verification_method=verification_method,
+                work_code=work_code,
+            ))
+        written = write_logs(logs)
+        self.written += written
+        self.suppressed += len(logs) - written
+        return written
+
+
+def _lookup(rows, pk_field, code_field):
+    """
+    Collect the primary keys and codes referenced by the rows.
+    """
+    pks, codes = set(), set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if row.get(pk_field) not in (None, ''):
+            pks.add(str(row[pk_field]))
+        if row.get(code_field) not in (None, ''):
+            codes.add(str(row[code_field]))
+    return pks, codes
+
+
+def _existing(logs):
+    """
+    (employee_id, punch_time) keys of the logs that are already stored.
+    """
+    existing = set()
+    size = batch_size()
+    for start in range(0, len(logs), size):
+        chunk = logs[start:start + size]
+        existing.update(AttendanceLog.objects.filter(
+            employee_id__in={log.employee_id for log in chunk},
+            punch_time__in={log.punch_time for log in chunk},
+        ).values_list('employee_id', 'punch_time'))
+    return existing
+
+
+def _numeric(values):
+    return [value for value in values if value.isdigit()]
+
+
+def _float(value):
+    if value in (None, ''):
+        return None
+    return float(value)
+
+
+def ingest_rows(company, rows):
+    """
+    Validate and insert a batch of raw punch dicts for ``company``.
+
+    Each row references its employee by primary key (``employee``) or by
+    company employee code (``employee_id``) and optionally its device by
+    primary key (``device``) or device code (``device_id``). All references
+    are resolved from the cached employee map and one query for devices.
+
+    Returns a per-row report: [{"index": i, "status": "accepted"|"duplicate"|"suppressed"|"rejected", "errors": [...]}].
+    Duplicate rows are already stored for the same employee and punch time;
+    suppressed rows fall inside the company's debounce window of another punch.
+    """
+    employees_by_code = get_employee_map(company)
+    employees_by_pk = get_employee_pk_map(company)
+
+    device_pks, device_codes = _lookup(rows, 'device', 'device_id')
+    devices_by_pk, devices_by_code = {}, {}
+    if device_pks or device_codes:
+        for pk, code in Device.objects.filter(company=company).filter(
+            Q(pk__in=_numeric(device_pks)) | Q(device_id__in=device_codes)
+        ).values_list('id', 'device_id'):
+            devices_by_pk[str(pk)] = pk
+            devices_by_code[code] = pk
+
+    now = timezone.now()
+    default_tz = timezone.get_default_timezone()
+    report = []
+    logs = []
+    accepted_rows = {}
+    seen = set()
+
+    for index, row in enumerate(rows):
+        errors = []
+        if not isinstance(row, dict):
+            report.append({'index': index, 'status': 'rejected', 'errors': ["Row must be a JSON object."]})
+            continue
+
+        employee = None
+        if row.get('employee') not in (None, ''):
+            employee = employees_by_pk.get(str(row['employee']))
+        elif row.get('employee_id') not in (None, ''):
+            employee = employees_by_code.get(str(row['employee_id']))
+        else:
+            errors.append("employee or employee_id is required.")
+        if employee is None and not errors:
+            errors.append("Employee not found in your company.")
+        elif employee is not None and employee[1] != 'Active':
+            errors.append("Employee is not active.")
+
+        device_id = None
+        if row.get('device') not in (None, ''):
+            device_id = devices_by_pk.get(str(row['device']))
+            if device_id is None:
+                errors.append("Device not found in your company.")
+        elif row.get('device_id') not in (None, ''):
+            device_id = devices_by_code.get(str(row['device_id']))
+            if device_id is None:
+                errors.append("Device not found in your company.")
+
+        punch_time = row.get('punch_time')
+        if not punch_time:
+            errors.append("punch_time is required.")
+        else:
+            try:
+                punch_time = parse_datetime(str(punch_time))
+            except ValueError:
+                # Well formatted but out of range, e.g. February 30th
+                punch_time = None
+            if punch_time is None:
+                errors.append("punch_time is not a valid datetime.")
+            else:
+                if timezone.is_naive(punch_time):
+                    punch_time = timezone.make_aware(punch_time, default_tz)
+                if punch_time > now:
+                    errors.append("punch_time cannot be set in the future.")
+
+        in_out_status = row.get('in_out_status', 'IN')
+        if not isinstance(in_out_status, str) or in_out_status not in IN_OUT_STATUSES:
+            errors.append(f"Invalid in_out_status. Must be one of {sorted(IN_OUT_STATUSES)}.")
+        verification_method = row.get('verification_method', 'FP')
+        if not isinstance(verification_method, str) or verification_method not in VERIFICATION_METHODS:
+            errors.append(f"Invalid verification_method. Must be one of {sorted(VERIFICATION_METHODS)}.")
+        punch_mode = row.get('punch_mode', 'AUTO')
+        if not isinstance(punch_mode, str) or punch_mode not in PUNCH_MODES:
+            errors.append(f"Invalid punch_mode. Must be one of {sorted(PUNCH_MODES)}.")
+        for name, max_length in TEXT_FIELDS.items():
+            value = row.get(name)
+            if value is not None and (not isinstance(value, str) or len(value) > max_length):
+                errors.append(f"{name} must be a string of at most {max_length} characters.")
+
+        try:
+            latitude = _float(row.get('latitude'))
+            longitude = _float(row.get('longitude'))
+        except (TypeError, ValueError):
+            errors.append("latitude and longitude must be numbers.")
+        else:
+            if (latitude is None) != (longitude is None):
+                errors.append("Both latitude and longitude must be provided together.")
+
+        if not errors:
+            key = (employee[0], punch_time)
+            if key in seen:
+                errors.append("Duplicate punch in request.")
+            seen.add(key)
+
+        if errors:
+            report.append({'index': index, 'status': 'rejected', 'errors': errors})
+            continue
+
+        logs.append(AttendanceLog(
+            employee_id=employee[0],
+            company_id=company.pk,
+            device_id=device_id,
+            punch_time=punch_time,
+            in_out_status=in_out_status,
+            verification_method=verification_method,
+            punch_mode=punch_mode,
+            work_code=row.get('work_code'),
+            locationName=row.get('locationName'),
+            latitude=latitude,
+            longitude=longitude,
+        ))
+        report.append({'index': index, 'status': 'accepted', 'errors': []})
+        accepted_rows[id(logs[-1])] = len(report) - 1
+
+    # The database would skip these silently
+    existing = _existing(logs)
+    for log in logs:
+        if (log.employee_id, log.punch_time) in existing:
+            report[accepted_rows[id(log)]]['status'] = 'duplicate'
+    logs = [log for log in logs if (log.employee_id, log.punch_time) not in existing]
+
+    logs, suppressed = filter_logs(logs)
+    for log in suppressed:
+        report[accepted_rows[id(log)]]['status'] = 'suppressed'
+    write_logs(logs, debounce=False)
+    return report
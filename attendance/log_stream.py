@@ -0,0 +1,55 @@
+"""
+NDJSON streaming of attendance logs in constant memory.
+
+Rows are read newest first in keyset chunks on (punch_time, id), each
+chunk with .iterator(): MySQL drivers buffer a whole result set, so one
+iterator over a 5-year history would still hold it in memory, while a chunk
+never holds more than ATTENDANCE_LOG_STREAM_CHUNK_SIZE rows. Every chunk is
+an index range scan that starts where the previous one stopped.
+
+Each chunk is converted by the serializer's values() reader
+(attendance.api.fast_read), so a streamed line is the same object as the
+matching entry of the paginated JSON response.
+"""
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+
+def chunk_size():
+    return getattr(settings, 'ATTENDANCE_LOG_STREAM_CHUNK_SIZE', 2000)
+
+
+def iter_chunks(queryset, reader):
+    """
+    Yield the values() rows of an AttendanceLog queryset that ``reader``
+    needs, newest first, in lists of at most chunk_size().
+    """
+    size = chunk_size()
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(Q(punch_time__lt=last[0]) | Q(punch_time=last[0], id__lt=last[1]))
+        # The keyset needs punch_time and id even when they are not sent
+        rows = list(reader.values(chunk.order_by('-punch_time', '-id'), 'punch_time', 'id')[:size].iterator(chunk_size=size))
+        if rows:
+            last = (rows[-1]['punch_time'], rows[-1]['id'])
+            yield rows
+        if len(rows) < size:
+            return
+
+
+def iter_ndjson(queryset, reader):
+    """
+    Yield one JSON line per log, rendered like DRF's JSONRenderer.
+    """
+    for rows in iter_chunks(queryset, reader):
+        for item in reader.convert(rows):
+            yield json.dumps(
+                item, cls=encoders.JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+                allow_nan=not api_settings.STRICT_JSON, separators=(',', ':'),
+            ) + '\n'
@@ -0,0 +1,114 @@
+import random
+import time
+from datetime import datetime, time as day_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from authentication.models import Company
+from attendance.api import fast_read
+from attendance.api.serializers import AttendanceLogSerializer, DeviceSerializer, EmployeeSerializer, ShiftSerializer
+from attendance.models import AttendanceLog, Device, Employee, Shift
+
+BENCH_PREFIX = 'BENCH'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the list endpoints' ModelSerializer output against the values() fast read path "
+        "on pages of --rows rows and check that both render to the same JSON bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, required=True)
+        parser.add_argument('--rows', type=int, default=10000, help="Rows per page.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per path; the best one is reported.")
+        parser.add_argument('--seed', action='store_true',
+                            help="Top every table up to --rows synthetic rows for the run; they are rolled back afterwards.")
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(company, options['rows'])
+                self.benchmark(company, options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def benchmark(self, company, rows, repeat):
+        pages = [
+            ("employees", EmployeeSerializer, Employee.objects.filter(company=company)),
+            ("devices", DeviceSerializer, Device.objects.filter(company=company)),
+            ("shifts", ShiftSerializer, Shift.objects.filter(company=company)),
+            ("attendance logs", AttendanceLogSerializer, AttendanceLog.objects.filter(company=company).order_by('-punch_time', '-id')),
+        ]
+        renderer = JSONRenderer()
+        for label, serializer_class, queryset in pages:
+            queryset = queryset[:rows]
+            reader = fast_read.reader_for(serializer_class)
+            if reader is None:
+                self.stdout.write(f"{label}: {serializer_class.__name__} has no fast read path.")
+                continue
+
+            serializer_time, serializer_data = self.best(repeat, lambda: serializer_class(queryset, many=True).data)
+            reader_time, reader_data = self.best(repeat, lambda: reader.data(queryset))
+            if renderer.render(serializer_data) != renderer.render(reader_data):
+                raise CommandError(f"{label}: the fast read path renders different JSON than {serializer_class.__name__}.")
+
+            self.stdout.write(
+                f"{label}: {len(reader_data)} rows, serializer {serializer_time * 1000:.1f}ms, "
+                f"values() {reader_time * 1000:.1f}ms ({serializer_time / max(reader_time, 1e-9):.1f}x), identical JSON."
+            )
+
+    def best(self, repeat, read):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            data = read()
+            timings.append(time.perf_counter() - started)
+        return min(timings), data
+
+    def seed(self, company, rows):
+        missing = rows - Employee.objects.filter(company=company).count()
+        Employee.objects.bulk_create(
+            Employee(company=company, employee_id=f'{BENCH_PREFIX}{i}', name=f"Benchmark {i}", position="Operator",
+                     salary_type='Monthly', date_of_joining=timezone.localdate() - timedelta(days=i % 3650))
+            for i in range(max(missing, 0))
+        )
+        missing = rows - Device.objects.filter(company=company).count()
+        Device.objects.bulk_create(
+            Device(company=company, device_id=f'{BENCH_PREFIX}{i}', serial_number=f'{BENCH_PREFIX}{i}', location="Benchmark",
+                   last_sync_time=timezone.now() - timedelta(minutes=i))
+            for i in range(max(missing, 0))
+        )
+        missing = rows - Shift.objects.filter(company=company).count()
+        Shift.objects.bulk_create(
+            Shift(company=company, name=f"Benchmark {i}", start_time=day_time(i % 24, 0), end_time=day_time((i + 8) % 24, 30),
+                  break_duration=timedelta(minutes=30) if i % 2 else None)
+            for i in range(max(missing, 0))
+        )
+
+        missing = rows - AttendanceLog.objects.filter(company=company).count()
+        employee_ids = list(Employee.objects.filter(company=company).values_list('pk', flat=True)[:1000])
+        device_ids = list(Device.objects.filter(company=company).values_list('pk', flat=True)[:100])
+        start = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=30), day_time.min))
+        AttendanceLog.objects.bulk_create(
+            (
+                AttendanceLog(company=company, employee_id=random.choice(employee_ids), device_id=random.choice(device_ids),
+                              punch_time=start + timedelta(seconds=i * 37, microseconds=i % 1000),
+                              in_out_status='IN' if i % 2 else 'OUT', verification_method='FP', latitude=23.8 + i / 1e6)
+                for i in range(max(missing, 0))
+            ),
+            batch_size=2000,
+        )
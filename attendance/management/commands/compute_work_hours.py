@@ -0,0 +1,39 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from authentication.models import Company
+from attendance.workhours import compute_work_hours
+
+
+class Command(BaseCommand):
+    help = "Compute WorkHours from attendance punches for a date range (default: the current month so far)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Company ID (default: every active company).")
+        parser.add_argument('--from', dest='start', type=date.fromisoformat, help="First day, YYYY-MM-DD.")
+        parser.add_argument('--to', dest='end', type=date.fromisoformat, help="Last day, YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = options['start'] or today.replace(day=1)
+        end = options['end'] or today
+        if start > end:
+            raise CommandError("--from must not be after --to.")
+
+        companies = Company.objects.filter(is_active=True)
+        if options['company']:
+            companies = Company.objects.filter(pk=options['company'])
+            if not companies.exists():
+                raise CommandError(f"Company {options['company']} does not exist.")
+
+        for company in companies:
+            started = time.monotonic()
+            summary = compute_work_hours(company, start, end)
+            self.stdout.write(
+                f"{company.name}: {summary['days']} employee-days from {summary['punches']} punches "
+                f"({summary['employees']} employees), {summary['removed']} without punches removed "
+                f"in {time.monotonic() - started:.2f}s."
+            )
@@ -0,0 +1,55 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import Company
+from attendance import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Export unsynced attendance logs of a company as NDJSON, batch by batch, "
+        "and mark each batch synced once it has been written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, required=True, help="Company ID to export.")
+        parser.add_argument('--output', default='-', help="NDJSON file to append to ('-' for stdout).")
+        parser.add_argument('--batch-size', type=int, default=outbox.batch_limit(), help="Rows per batch.")
+        parser.add_argument('--max-batches', type=int, default=0, help="Stop after this many batches (default: until drained).")
+        parser.add_argument('--no-ack', action='store_true', help="Export without marking the rows synced.")
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size must be positive.")
+
+        to_stdout = options['output'] == '-'
+        handle = sys.stdout if to_stdout else open(options['output'], 'a')
+        cursor = 0
+        exported = synced = batches = 0
+        try:
+            while not options['max_batches'] or batches < options['max_batches']:
+                rows = list(outbox.pending(company, cursor, options['batch_size']))
+                if not rows:
+                    break
+                handle.write(''.join(outbox.ndjson_line(row) for row in rows))
+                handle.flush()
+                if not to_stdout:
+                    os.fsync(handle.fileno())
+
+                # Only acknowledge rows that are safely written
+                ids = [row['id'] for row in rows]
+                if not options['no_ack']:
+                    synced += outbox.acknowledge(company, ids)
+                cursor = ids[-1]
+                exported += len(rows)
+                batches += 1
+        finally:
+            if not to_stdout:
+                handle.close()
+
+        self.stderr.write(f"Exported {exported} attendance logs in {batches} batches, marked {synced} synced.")
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from attendance import buffer
+
+
+class Command(BaseCommand):
+    help = "Flush buffered punches to AttendanceLog every N ms or every M records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval-ms', type=int,
+            default=getattr(settings, 'ATTENDANCE_PUNCH_FLUSH_INTERVAL_MS', 500),
+            help="Flush at least this often while punches are waiting.",
+        )
+        parser.add_argument(
+            '--max-records', type=int,
+            default=getattr(settings, 'ATTENDANCE_PUNCH_FLUSH_MAX_RECORDS', 1000),
+            help="Flush as soon as this many punches are waiting.",
+        )
+        parser.add_argument('--once', action='store_true', help="Drain the buffer once and exit.")
+
+    def handle(self, *args, **options):
+        max_records = options['max_records']
+        interval = options['interval_ms'] / 1000
+
+        if options['once']:
+            self.stdout.write(f"Flushed {buffer.drain(max_records)} punches.")
+            return
+
+        self.stdout.write(f"Flushing punch buffer every {options['interval_ms']} ms or {max_records} records.")
+        spool = buffer.get_spool()
+        last_flush = time.monotonic()
+        while True:
+            # pending() is a stat; only a waiting spool is counted, and never past max_records
+            due = spool.pending() and (
+                time.monotonic() - last_flush >= interval or spool.depth(max_records) >= max_records
+            )
+            if due:
+                buffer.flush(max_records)
+                last_flush = time.monotonic()
+                continue
+            time.sleep(min(interval, 0.05))
@@ -0,0 +1,147 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from authentication.models import Company
+from attendance.ingest import IN_OUT_STATUSES, VERIFICATION_METHODS, DevicePunchWriter, batch_size
+from attendance.models import Device
+from attendance.zk import PUNCH_STATES, VERIFY_TYPES
+
+
+def parse_dat_line(line):
+    """
+    attlog.dat line: user ID, "YYYY-MM-DD HH:MM:SS", machine no, punch state, verify type, work code.
+    """
+    fields = line.split('\t')
+    if len(fields) < 2 or not fields[0].strip():
+        return None
+    try:
+        punch_time = datetime.strptime(fields[1].strip(), '%Y-%m-%d %H:%M:%S')
+        punch_state = int(fields[3]) if len(fields) > 3 and fields[3].strip() else 0
+        verify = int(fields[4]) if len(fields) > 4 and fields[4].strip() else 1
+    except ValueError:
+        return None
+    work_code = fields[5].strip() if len(fields) > 5 and fields[5].strip() not in ('', '0') else None
+    return fields[0].strip(), punch_time, PUNCH_STATES.get(punch_state, 'IN'), VERIFY_TYPES.get(verify, 'FP'), work_code
+
+
+def parse_csv_line(line, columns):
+    """
+    CSV line with a header naming employee_id, punch_time and optionally
+    in_out_status, verification_method and work_code.
+    """
+    values = next(csv.reader([line]), None)
+    if not values:
+        return None
+    row = dict(zip(columns, (value.strip() for value in values)))
+    punch_time = parse_datetime(row.get('punch_time', ''))
+    if not row.get('employee_id') or punch_time is None:
+        return None
+    in_out_status = row.get('in_out_status') or 'IN'
+    verification_method = row.get('verification_method') or 'FP'
+    if in_out_status not in IN_OUT_STATUSES or verification_method not in VERIFICATION_METHODS:
+        return None
+    return row['employee_id'], punch_time, in_out_status, verification_method, row.get('work_code') or None
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a device attendance dump (attlog .dat or CSV) into AttendanceLog. "
+        "Progress is checkpointed after every chunk so an interrupted import resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the attlog .dat or CSV file.")
+        parser.add_argument('--company', type=int, required=True, help="Company ID the punches belong to.")
+        parser.add_argument('--device', help="Device ID (Device.device_id) the dump came from.")
+        parser.add_argument('--format', choices=['auto', 'dat', 'csv'], default='auto')
+        parser.add_argument('--chunk-size', type=int, default=batch_size(), help="Rows per bulk INSERT and checkpoint.")
+        parser.add_argument('--checkpoint', help="Checkpoint file (defaults to <path>.checkpoint).")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start from the beginning.")
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.isfile(path):
+            raise CommandError(f"File not found: {path}")
+
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+
+        device_pk = None
+        if options['device']:
+            device_pk = Device.objects.filter(company=company, device_id=options['device']).values_list('id', flat=True).first()
+            if device_pk is None:
+                raise CommandError(f"Device {options['device']} does not exist in {company.name}.")
+
+        file_format = options['format']
+        if file_format == 'auto':
+            file_format = 'csv' if path.lower().endswith('.csv') else 'dat'
+
+        checkpoint_path = options['checkpoint'] or path + '.checkpoint'
+        checkpoint = {'path': path, 'offset': 0, 'rows': 0, 'written': 0, 'skipped': 0}
+        if os.path.exists(checkpoint_path) and not options['restart']:
+            with open(checkpoint_path) as handle:
+                checkpoint = json.load(handle)
+            if checkpoint.get('path') != path or checkpoint['offset'] > os.path.getsize(path):
+                raise CommandError(f"Checkpoint {checkpoint_path} does not match {path}. Use --restart to start over.")
+            self.stdout.write(f"Resuming at byte {checkpoint['offset']} ({checkpoint['rows']} rows already read).")
+
+        writer = DevicePunchWriter(company.pk, device_pk, size=options['chunk_size'])
+        default_tz = timezone.get_default_timezone()
+        started = time.monotonic()
+        rows_at_start = checkpoint['rows']
+        written_at_start = checkpoint['written']
+
+        def flush(offset):
+            writer.flush()
+            checkpoint['offset'] = offset
+            checkpoint['written'] = written_at_start + writer.written
+            tmp_path = checkpoint_path + '.tmp'
+            with open(tmp_path, 'w') as handle:
+                json.dump(checkpoint, handle)
+            os.replace(tmp_path, checkpoint_path)
+
+        with open(path, 'rb') as handle:
+            columns = None
+            if file_format == 'csv':
+                header = handle.readline()
+                columns = [column.strip().lower() for column in next(csv.reader([header.decode('utf-8-sig')]))]
+                if 'employee_id' not in columns or 'punch_time' not in columns:
+                    raise CommandError("CSV header must contain employee_id and punch_time columns.")
+                checkpoint['offset'] = max(checkpoint['offset'], len(header))
+
+            offset = checkpoint['offset']
+            handle.seek(offset)
+            for line in handle:
+                offset += len(line)
+                text = line.decode('utf-8', errors='ignore').strip('\r\n')
+                if not text.strip():
+                    continue
+                checkpoint['rows'] += 1
+
+                record = parse_csv_line(text, columns) if columns else parse_dat_line(text)
+                if record is None:
+                    checkpoint['skipped'] += 1
+                    continue
+
+                user_id, punch_time, in_out_status, verification_method, work_code = record
+                if timezone.is_naive(punch_time):
+                    punch_time = timezone.make_aware(punch_time, default_tz)
+                if writer.add(user_id, punch_time, in_out_status, verification_method, work_code):
+                    flush(offset)
+            flush(offset)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rows = checkpoint['rows'] - rows_at_start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {path}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/sec). "
+            f"Written: {checkpoint['written']}, suppressed: {writer.suppressed}, "
+            f"unknown employees: {writer.unknown_employees}, unparseable lines: {checkpoint['skipped']}."
+        ))
@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import Company
+from attendance.models import Device, Employee
+from attendance.simulator import start_fleet
+from attendance.sync import sync_company_devices
+
+try:
+    import resource
+except ImportError:  # Windows development machines
+    resource = None
+
+SIMULATOR_LOCATION = "Simulator"
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a fleet of simulated ZKTeco devices serving synthetic punches for a company, "
+        "optionally register them as Device rows, push over ADMS, or benchmark the sync pipeline against them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, required=True, help="Company whose employees the punches belong to.")
+        parser.add_argument('--count', type=int, default=10, help="Number of simulated devices.")
+        parser.add_argument('--records', type=int, default=1000, help="Punches stored on every device at start.")
+        parser.add_argument('--days', type=int, default=1, help="Days the initial punches are spread over.")
+        parser.add_argument('--rate', type=float, default=0, help="New punches per minute per device while running.")
+        parser.add_argument('--latency-ms', type=int, default=0, help="Delay before every device reply.")
+        parser.add_argument('--failure-rate', type=float, default=0, help="Probability (0-1) that a connection fails.")
+        parser.add_argument('--base-ip', default='127.1.0.1', help="Address of the first device; each device takes the next one.")
+        parser.add_argument('--port', type=int, default=4370)
+        parser.add_argument('--prefix', default='SIM', help="Device ID and serial number prefix.")
+        parser.add_argument('--register', action='store_true', help="Create or update matching Device rows.")
+        parser.add_argument('--adms-url', help="Base URL of the server to push punches to over ADMS, e.g. http://127.0.0.1:8000.")
+        parser.add_argument('--adms-interval', type=float, default=10, help="Seconds between ADMS pushes.")
+        parser.add_argument('--benchmark', type=int, default=0, metavar='ROUNDS',
+                            help="Run the device sync this many times against the fleet, print timings and exit.")
+        parser.add_argument('--duration', type=float, default=0, help="Stop after this many seconds (default: run until interrupted).")
+
+    def handle(self, *args, **options):
+        company = Company.objects.filter(pk=options['company']).first()
+        if company is None:
+            raise CommandError(f"Company {options['company']} does not exist.")
+        if options['benchmark'] and not options['register']:
+            raise CommandError("--benchmark needs --register so the sync can find the devices.")
+
+        employee_ids = list(Employee.objects.filter(company=company, status='Active').values_list('employee_id', flat=True))
+        if not employee_ids:
+            raise CommandError(f"{company.name} has no active employees to generate punches for.")
+
+        if resource is not None:
+            # Every device holds a listening socket plus one per open connection
+            _soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+        try:
+            asyncio.run(self.run(company, employee_ids, options))
+        except KeyboardInterrupt:
+            self.stdout.write("Simulator stopped.")
+
+    async def run(self, company, employee_ids, options):
+        devices = await start_fleet(
+            options['count'],
+            employee_ids,
+            base_ip=options['base_ip'],
+            port=options['port'],
+            prefix=options['prefix'],
+            records=options['records'],
+            days=options['days'],
+            rate=options['rate'],
+            latency=options['latency_ms'] / 1000,
+            failure_rate=options['failure_rate'],
+        )
+        self.stdout.write(
+            f"Started {len(devices)} simulated devices on {devices[0].host}-{devices[-1].host}:{options['port']} "
+            f"with {options['records']} punches each."
+        )
+
+        if options['register']:
+            try:
+                await asyncio.to_thread(self.register, company, devices)
+            except CommandError:
+                await asyncio.gather(*(device.stop() for device in devices))
+                raise
+
+        pushers = []
+        if options['adms_url']:
+            pushers = [asyncio.create_task(device.push(options['adms_url'], options['adms_interval'])) for device in devices]
+
+        try:
+            if options['benchmark']:
+                await self.benchmark(company, devices, options['benchmark'])
+            elif options['duration']:
+                await asyncio.sleep(options['duration'])
+            else:
+                await asyncio.Event().wait()
+        finally:
+            for task in pushers:
+                task.cancel()
+            await asyncio.gather(*(device.stop() for device in devices))
+
+    def register(self, company, devices):
+        hosts = [device.host for device in devices]
+        serial_numbers = [device.serial_number for device in devices]
+        taken = Device.objects.filter(company=company, ip_address__in=hosts).exclude(device_id__in=serial_numbers)
+        if taken.exclude(location=SIMULATOR_LOCATION).exists():
+            raise CommandError("Some simulator addresses belong to real devices of this company; pick another --base-ip.")
+
+        # Addresses left over from an earlier fleet with another prefix are released
+        taken.update(ip_address=None)
+        Device.objects.bulk_create(
+            [
+                Device(
+                    device_id=device.serial_number,
+                    serial_number=device.serial_number,
+                    location=SIMULATOR_LOCATION,
+                    description="Simulated device (simulate_devices)",
+                    ip_address=device.host,
+                    port=device.port,
+                    company=company,
+                )
+                for device in devices
+            ],
+            update_conflicts=True,
+            unique_fields=['device_id'],
+            update_fields=['serial_number', 'ip_address', 'port', 'company'],
+        )
+        self.stdout.write(f"Registered {len(devices)} devices for {company.name}.")
+
+    async def benchmark(self, company, devices, rounds):
+        for round_number in range(1, rounds + 1):
+            started = time.monotonic()
+            # sync_company_devices runs its own event loop, so give it a thread
+            summary = await asyncio.to_thread(sync_company_devices, company)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Round {round_number}: {summary['devices']} devices, {summary['synced']} synced, "
+                f"{len(summary['failed'])} failed, {summary['records']} records written, {summary['suppressed']} suppressed in {elapsed:.2f}s "
+                f"({summary['records'] / max(elapsed, 1e-6):,.0f} records/sec)."
+            )
+        self.stdout.write(
+            f"Served {sum(device.connections for device in devices)} connections, "
+            f"{sum(device.failures for device in devices)} injected failures."
+        )
@@ -0,0 +1,239 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('authentication', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancelog',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_logs', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='device',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.device'),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='employee',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.employee'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departments', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='device',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='company_employees', to='authentication.company', verbose_name='Company'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='attendance.department', verbose_name='Department'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='employees', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='employeedocument',
+            name='employee',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.employee'),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='company',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='leavebalance',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='leavebalance',
+            name='leave_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='attendance.leavetype'),
+        ),
+        migrations.AddField(
+            model_name='leavebalance',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='department_approved_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='department_approved_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='hr_approved_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='hr_approved_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='leave_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='attendance.leavetype'),
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='leavetype',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notices', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='department',
+            field=models.ManyToManyField(blank=True, related_name='notices', to='attendance.department'),
+        ),
+        migrations.AddField(
+            model_name='notice',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='user_notices', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='employee',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.employee'),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='shift',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.shift'),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='workdays',
+            field=models.ManyToManyField(to='attendance.workday'),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='temporaryshift',
+            name='company',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='temp_shifts', to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='temporaryshift',
+            name='employee',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.employee'),
+        ),
+        migrations.AddField(
+            model_name='temporaryshift',
+            name='shift',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.shift'),
+        ),
+        migrations.AddField(
+            model_name='workhours',
+            name='company',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='authentication.company'),
+        ),
+        migrations.AddField(
+            model_name='workhours',
+            name='employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='attendance.employee'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='department',
+            unique_together={('name', 'company')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='leavebalance',
+            unique_together={('user', 'leave_type')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='leavetype',
+            unique_together={('company', 'name')},
+        ),
+        migrations.AddConstraint(
+            model_name='attendancelog',
+            constraint=models.UniqueConstraint(fields=('employee', 'punch_time'), name='unique_attendance_log_per_user_per_day_per_checkin'),
+        ),
+        migrations.AddConstraint(
+            model_name='device',
+            constraint=models.CheckConstraint(condition=models.Q(('port__gte', 1), ('port__lte', 65535)), name='check_valid_port_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='device',
+            constraint=models.UniqueConstraint(fields=('company', 'ip_address'), name='unique_ip_per_company'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(fields=('company', 'employee_id'), name='unique_employee_per_company'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(fields=('contact_number',), name='unique_contact_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(fields=('email',), name='unique_email'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.CheckConstraint(condition=models.Q(('date_of_birth__lt', models.F('date_of_joining'))), name='check_birth_before_joining'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.CheckConstraint(condition=models.Q(('employee_id__regex', '^[a-zA-Z0-9]+$')), name='check_employee_id_alphanumeric'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.CheckConstraint(condition=models.Q(('contact_number__regex', '^[0-9]+$')), name='check_contact_number_numeric'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.CheckConstraint(condition=models.Q(('email__contains', '@')), name='check_valid_email'),
+        ),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.CheckConstraint(condition=models.Q(('date_of_birth__gt', '1900-01-01')), name='check_valid_birth_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='shift',
+            constraint=models.UniqueConstraint(fields=('company', 'name'), name='unique_shift_per_company'),
+        ),
+    ]
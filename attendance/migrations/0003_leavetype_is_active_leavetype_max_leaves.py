@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavetype',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='leavetype',
+            name='max_leaves',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
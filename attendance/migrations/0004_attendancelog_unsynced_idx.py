@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_leavetype_is_active_leavetype_max_leaves'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(condition=models.Q(('sync', False)), fields=['company', 'id'], name='attendance_log_unsynced_idx'),
+        ),
+    ]
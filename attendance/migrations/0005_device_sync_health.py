@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendancelog_unsynced_idx'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='last_sync_attempt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='device',
+            name='last_sync_error',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='device',
+            name='sync_error_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['device', 'punch_time'], name='attendance_log_device_time_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_work_hours(apps, schema_editor):
+    """
+    Delete hand-entered duplicates (from the admin) so the unique constraint
+    can be added: per employee and date only the newest row, the one with
+    the highest id, is kept.
+    """
+    WorkHours = apps.get_model('attendance', 'WorkHours')
+    duplicates = (
+        WorkHours.objects.filter(employee__isnull=False)
+        .order_by()
+        .values('employee', 'date')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = WorkHours.objects.filter(employee=duplicate['employee'], date=duplicate['date'])
+        newest = rows.order_by('-id').values_list('id', flat=True).first()
+        rows.exclude(pk=newest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_device_sync_health'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_work_hours, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workhours',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='unique_work_hours_per_employee_per_day'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_workhours_unique_employee_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyWorkDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_id', models.BigIntegerField()),
+                ('employee_id', models.BigIntegerField()),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('employee_id', 'date'), name='unique_dirty_work_day')],
+            },
+        ),
+    ]
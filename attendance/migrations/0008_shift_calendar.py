@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_dirtyworkday'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('is_workday', models.BooleanField(default=False)),
+                ('is_holiday', models.BooleanField(default=False)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_calendar', to='authentication.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_calendar', to='attendance.employee')),
+                ('shift', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='attendance.shift')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'date'], name='shift_calendar_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'employee', 'date'), name='unique_shift_calendar_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:39
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_shift_calendar'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workhours',
+            name='is_early_leave',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='workhours',
+            name='is_late',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='MonthlyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year_month', models.CharField(max_length=7)),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('absent_days', models.PositiveIntegerField(default=0)),
+                ('leave_days', models.PositiveIntegerField(default=0)),
+                ('late_days', models.PositiveIntegerField(default=0)),
+                ('early_leave_days', models.PositiveIntegerField(default=0)),
+                ('overtime_days', models.PositiveIntegerField(default=0)),
+                ('worked_hours', models.DurationField(default=datetime.timedelta)),
+                ('overtime_hours', models.DurationField(default=datetime.timedelta)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='authentication.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='attendance.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'year_month'], name='monthly_summary_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'employee', 'year_month'), name='unique_monthly_summary')],
+            },
+        ),
+    ]
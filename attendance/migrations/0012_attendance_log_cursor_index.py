@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_absence'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['company', 'punch_time', 'id'], name='attendance_log_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0012_attendance_log_cursor_index'),
+        ('authentication', '0002_company_punch_debounce_seconds'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendancelog',
+            name='attendance_log_unsynced_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['company', 'sync', 'id'], name='attendance_log_outbox_idx'),
+        ),
+    ]
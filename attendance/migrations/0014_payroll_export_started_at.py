@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0013_attendance_log_outbox_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollexport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-17 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0014_payroll_export_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dirtyworkday',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='dirtyworkday',
+            index=models.Index(fields=['claimed_at'], name='dirty_work_day_claimed_idx'),
+        ),
+    ]
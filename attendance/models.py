@@ -222,6 +222,9 @@ class Device(models.Model):
     serial_number = models.CharField(max_length=255, unique=True,null=True)  
     company = models.ForeignKey(Company, on_delete=models.CASCADE,null=True)  
     port = models.IntegerField(default=4370)  # মেশিনের পোর্ট
+    last_sync_attempt = models.DateTimeField(null=True, blank=True)
+    sync_error_count = models.PositiveIntegerField(default=0)  # Failed sync attempts since the last successful one
+    last_sync_error = models.CharField(max_length=255, null=True, blank=True)
 
     class Meta:
         verbose_name = "Device"
@@ -327,6 +330,15 @@ class AttendanceLog(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['employee', 'punch_time'], name='unique_attendance_log_per_user_per_day_per_checkin')
         ]
+        indexes = [
+            # Outbox scan: unsynced rows of a company in id order. A plain
+            # composite index, as MySQL ignores partial index conditions
+            models.Index(fields=['company', 'sync', 'id'], name='attendance_log_outbox_idx'),
+            # Recent punches per device (fleet status)
+            models.Index(fields=['device', 'punch_time'], name='attendance_log_device_time_idx'),
+            # Keyset pages of a company's logs on (punch_time, id)
+            models.Index(fields=['company', 'punch_time', 'id'], name='attendance_log_cursor_idx'),
+        ]
 
     def clean(self):
         """
@@ -373,6 +385,13 @@ class Shift(models.Model):
     def __str__(self):
         return f"{self.name} ({self.company.name}) - Status: {self.status}"  # Return shift details
 
+    @property
+    def crosses_midnight(self):
+        """
+        Shifts ending at or before their start time end on the next day.
+        """
+        return bool(self.start_time and self.end_time and self.end_time <= self.start_time)
+
     @property
     def duration(self):
         """
@@ -383,6 +402,8 @@ class Shift(models.Model):
         if self.start_time and self.end_time:
             shift_start = timezone.datetime.combine(timezone.now().date(), self.start_time)
             shift_end = timezone.datetime.combine(timezone.now().date(), self.end_time)
+            if self.crosses_midnight:
+                shift_end += timezone.timedelta(days=1)  # Night shift ends the next day
             shift_duration = shift_end - shift_start
 
             if self.break_duration:
@@ -392,12 +413,23 @@ class Shift(models.Model):
 
         return None  # Return None if start_time or end_time is None
 
+    def window_on(self, day):
+        """
+        Aware start and end datetimes of the shift starting on ``day``.
+        """
+        start = timezone.make_aware(timezone.datetime.combine(day, self.start_time))
+        end = timezone.make_aware(timezone.datetime.combine(day, self.end_time))
+        if self.crosses_midnight:
+            end = timezone.make_aware(timezone.datetime.combine(day + timezone.timedelta(days=1), self.end_time))
+        return start, end
+
     def clean(self):
         """
-        Custom validation to ensure that the end time is after the start time.
+        Custom validation to ensure that the shift has a length. An end time
+        before the start time is a night shift running past midnight.
         """
-        if self.end_time <= self.start_time:
-            raise ValidationError("End time must be after start time.")
+        if self.start_time and self.end_time and self.end_time == self.start_time:
+            raise ValidationError("End time must differ from start time.")
 
     def is_active(self):
         """
@@ -443,10 +475,156 @@ class WorkHours(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE,null=True, blank=True)  
     date = models.DateField()  
     total_hours = models.DurationField() 
-    overtime_hours = models.DurationField(null=True, blank=True)  
+    overtime_hours = models.DurationField(null=True, blank=True)
+    is_late = models.BooleanField(default=False)  # First IN after shift start + grace
+    is_early_leave = models.BooleanField(default=False)  # Last OUT before shift end - grace
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='unique_work_hours_per_employee_per_day')
+        ]
+
+    def __str__(self):
+        return f"{self.employee.user.username} - {self.date} - {self.total_hours}"
+
+
+class MonthlyAttendanceSummary(models.Model):
+    """
+    Attendance totals of an employee for one month, maintained from WorkHours
+    by the work hours engine (see attendance.monthly_summary).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='monthly_summaries')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_summaries')
+    year_month = models.CharField(max_length=7)  # YYYY-MM
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)  # Scheduled, not a holiday, no punches, no approved leave
+    leave_days = models.PositiveIntegerField(default=0)  # Scheduled days covered by approved leave
+    late_days = models.PositiveIntegerField(default=0)
+    early_leave_days = models.PositiveIntegerField(default=0)
+    overtime_days = models.PositiveIntegerField(default=0)
+    worked_hours = models.DurationField(default=timezone.timedelta)
+    overtime_hours = models.DurationField(default=timezone.timedelta)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'employee', 'year_month'], name='unique_monthly_summary')
+        ]
+        indexes = [
+            models.Index(fields=['company', 'year_month'], name='monthly_summary_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.year_month}"
+
+
+class DirtyWorkDay(models.Model):
+    """
+    Employee-day whose punches changed and whose WorkHours must be recomputed
+    (see attendance.dirty). Plain IDs instead of foreign keys: rows are queued
+    while punches are deleted, including when the employee is deleted.
+    """
+    company_id = models.BigIntegerField()
+    employee_id = models.BigIntegerField()
+    date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)  # Being recomputed since; None while queued
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee_id', 'date'], name='unique_dirty_work_day')
+        ]
+        indexes = [
+            models.Index(fields=['claimed_at'], name='dirty_work_day_claimed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date}"
+
+
+class ShiftCalendar(models.Model):
+    """
+    Effective shift of an employee on a date, resolved from Schedule,
+    TemporaryShift and Holiday (see attendance.shift_calendar).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='shift_calendar')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='shift_calendar')
+    date = models.DateField()
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True)
+    is_workday = models.BooleanField(default=False)  # Scheduled weekday or temporary shift
+    is_holiday = models.BooleanField(default=False)  # Company (or global) holiday
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'employee', 'date'], name='unique_shift_calendar_day')
+        ]
+        indexes = [
+            models.Index(fields=['company', 'date'], name='shift_calendar_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} - {self.shift_id}"
+
+
+class Absence(models.Model):
+    """
+    Scheduled workday on which an employee did not punch, was not on
+    approved leave and had no holiday (see attendance.absence).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='absences')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='absences')
+    date = models.DateField()
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True)
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='unique_absence_day')
+        ]
+        indexes = [
+            models.Index(fields=['company', 'date'], name='absence_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date}"
+
+
+class PayrollExport(models.Model):
+    """
+    Background export of a company-month of WorkHours with the employees'
+    salary and bank fields (see attendance.payroll_export).
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='payroll_exports')
+    requested_by = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True, blank=True)
+    year_month = models.CharField(max_length=7)  # YYYY-MM
+    file_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    fingerprint = models.CharField(max_length=64)  # Digest of the source data; unchanged periods reuse the file
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='payroll_exports/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)  # Claimed by a worker
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'year_month', 'file_format'], name='payroll_export_period_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.employee.user.username} - {self.date} - {self.total_hours}"      
+        return f"{self.company_id} - {self.year_month} - {self.file_format} - {self.status}"
 
 
 class Holiday(models.Model):
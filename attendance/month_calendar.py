@@ -0,0 +1,154 @@
+"""
+Compact month calendar of present / absent / leave / holiday days.
+
+For one employee and month the calendar is four bitmasks, bit ``d - 1``
+standing for day ``d``:
+
+* present: the employee has WorkHours (punches) on that business day,
+* leave: HR-approved LeaveRequest covering the day (and no punches),
+* holiday: Holiday of the company or a global one (and no punches),
+* absent: a scheduled workday of the shift calendar that is over, without
+  punches, leave or holiday.
+
+encode_rle() turns the same masks into a run-length string such as
+"2H5P1A" (P, A, L, H, "-" for nothing) for clients that prefer text.
+
+Calendars are cached per employee-month. Changed WorkHours and leave
+requests drop the affected employee-months (invalidate); schedule and
+holiday changes bump the company's version (invalidate_company). The cache
+key of the current month contains today's date, so yesterday becomes
+absent once it is over.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Employee, Holiday, ShiftCalendar, WorkHours
+from .monthly_summary import leave_days, month_bounds, month_key
+
+STATES = ('present', 'absent', 'leave', 'holiday')
+RLE_CODES = {'present': 'P', 'absent': 'A', 'leave': 'L', 'holiday': 'H', None: '-'}
+
+CALENDAR_CACHE_KEY = 'attendance:month_calendar:{}:{}:{}:{}:{}'
+VERSION_CACHE_KEY = 'attendance:month_calendar_version:{}'
+
+
+def cache_timeout():
+    return getattr(settings, 'ATTENDANCE_CALENDAR_CACHE_TTL', 24 * 60 * 60)
+
+
+def max_employees():
+    return getattr(settings, 'ATTENDANCE_CALENDAR_MAX_EMPLOYEES', 1000)
+
+
+def _company_id(company):
+    return getattr(company, 'pk', company)
+
+
+def company_version(company):
+    return cache.get_or_set(VERSION_CACHE_KEY.format(_company_id(company)), time.time_ns, None)
+
+
+def cache_key(company, version, employee_id, year_month):
+    # Months that are not over yet depend on today's date
+    cutoff = min(month_bounds(year_month)[1], timezone.localdate())
+    return CALENDAR_CACHE_KEY.format(_company_id(company), version, employee_id, year_month, cutoff.isoformat())
+
+
+def build(company, employee_ids, year_month):
+    """
+    {employee_id: {"present", "absent", "leave", "holiday"}} bitmasks of
+    some employees of a company for one month, computed from the database.
+    """
+    start_date, end_date = month_bounds(year_month)
+    last_closed = min(end_date, timezone.localdate() - timedelta(days=1))
+
+    present = {}
+    for employee_id, day in WorkHours.objects.filter(
+        employee_id__in=employee_ids, date__range=(start_date, end_date)
+    ).values_list('employee_id', 'date'):
+        present[employee_id] = present.get(employee_id, 0) | 1 << day.day - 1
+    scheduled = {}
+    for employee_id, day in ShiftCalendar.objects.filter(
+        company=company, employee_id__in=employee_ids, date__range=(start_date, last_closed), is_workday=True,
+    ).values_list('employee_id', 'date'):
+        scheduled[employee_id] = scheduled.get(employee_id, 0) | 1 << day.day - 1
+    holidays = 0
+    for day in Holiday.objects.filter(
+        Q(company=company) | Q(company__isnull=True), date__range=(start_date, end_date)
+    ).values_list('date', flat=True):
+        holidays |= 1 << day.day - 1
+    leave = {
+        employee_id: sum(1 << day.day - 1 for day in days)
+        for employee_id, days in leave_days(company, employee_ids, start_date, end_date).items()
+    }
+
+    calendars = {}
+    for employee_id in employee_ids:
+        present_mask = present.get(employee_id, 0)
+        leave_mask = leave.get(employee_id, 0) & ~present_mask
+        holiday_mask = holidays & ~present_mask & ~leave_mask
+        calendars[employee_id] = {
+            'present': present_mask,
+            'absent': scheduled.get(employee_id, 0) & ~(present_mask | leave_mask | holiday_mask),
+            'leave': leave_mask,
+            'holiday': holiday_mask,
+        }
+    return calendars
+
+
+def month_calendars(company, employee_ids, year_month):
+    """
+    Cached calendars of some employees of a company; only employee-months
+    missing from the cache are computed (in one batch).
+    """
+    employee_ids = list(Employee.objects.filter(
+        company=company, pk__in=list(employee_ids)
+    ).order_by('id').values_list('id', flat=True))
+    version = company_version(company)
+    keys = {employee_id: cache_key(company, version, employee_id, year_month) for employee_id in employee_ids}
+    cached = cache.get_many(list(keys.values()))
+
+    missing = [employee_id for employee_id, key in keys.items() if key not in cached]
+    if missing:
+        built = build(company, missing, year_month)
+        cache.set_many({keys[employee_id]: built[employee_id] for employee_id in missing}, cache_timeout())
+        cached.update({keys[employee_id]: built[employee_id] for employee_id in missing})
+    return {employee_id: cached[keys[employee_id]] for employee_id in employee_ids}
+
+
+def encode_rle(calendar, year_month):
+    """
+    Run-length string of a calendar, one code per day: "3P1A..." .
+    """
+    start_date, end_date = month_bounds(year_month)
+    runs = []
+    for day in range(end_date.day):
+        bit = 1 << day
+        code = RLE_CODES[next((state for state in STATES if calendar[state] & bit), None)]
+        if runs and runs[-1][1] == code:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, code])
+    return ''.join(f"{count}{code}" for count, code in runs)
+
+
+def invalidate(company, days):
+    """
+    Drop the cached calendars of the months touched by (employee_id, date) keys.
+    """
+    version = company_version(company)
+    cache.delete_many(list({
+        cache_key(company, version, employee_id, month_key(day)) for employee_id, day in days
+    }))
+
+
+def invalidate_company(company):
+    """
+    Drop every cached calendar of a company.
+    """
+    cache.set(VERSION_CACHE_KEY.format(_company_id(company)), time.time_ns(), None)
@@ -0,0 +1,150 @@
+"""
+Monthly attendance totals per employee (MonthlyAttendanceSummary).
+
+The work hours engine calls refresh() with the employee-days it wrote or
+removed, and the signals do the same for shift calendar and leave changes.
+Only the affected (employee, month) rows are rebuilt, each from one
+aggregate over WorkHours plus the scheduled days of the shift calendar and
+the approved leave of that month, so a monthly report is one indexed read
+on (company, year_month) instead of a scan of AttendanceLog.
+
+Absent and leave days only count days that are over, so the nightly
+absence job calls refresh_company() to close yesterday for every employee,
+including the ones without a single punch that month.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .ingest import batch_size
+from .models import Employee, LeaveRequest, MonthlyAttendanceSummary, ShiftCalendar, WorkHours
+
+SUMMARY_FIELDS = [
+    'present_days', 'absent_days', 'leave_days', 'late_days', 'early_leave_days', 'overtime_days',
+    'worked_hours', 'overtime_hours',
+]
+
+
+def month_key(day):
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_bounds(year_month):
+    year, month = map(int, year_month.split('-'))
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def leave_days(company, employee_ids, start_date, end_date):
+    """
+    {employee_id: set of dates} covered by HR-approved leave.
+    """
+    users = dict(
+        Employee.objects.filter(pk__in=employee_ids, user__isnull=False).values_list('user_id', 'id')
+    )
+    days = {}
+    for user_id, first, last in LeaveRequest.objects.filter(
+        company=company, user_id__in=list(users), hr_approved='approved',
+        start_date__lte=end_date, end_date__gte=start_date,
+    ).values_list('user_id', 'start_date', 'end_date'):
+        day, last = max(first, start_date), min(last, end_date)
+        while day <= last:
+            days.setdefault(users[user_id], set()).add(day)
+            day += timedelta(days=1)
+    return days
+
+
+def refresh_month(company, employee_ids, year_month):
+    """
+    Rebuild the summaries of some employees for one month.
+    """
+    if not employee_ids:
+        return 0
+    start_date, end_date = month_bounds(year_month)
+    # Absence is only counted for days that are over
+    last_closed = min(end_date, timezone.localdate() - timedelta(days=1))
+
+    totals = {
+        row['employee_id']: row
+        for row in WorkHours.objects.filter(employee_id__in=employee_ids, date__range=(start_date, end_date))
+        .values('employee_id')
+        .annotate(
+            present_days=Count('id'),
+            late_days=Count('id', filter=Q(is_late=True)),
+            early_leave_days=Count('id', filter=Q(is_early_leave=True)),
+            overtime_days=Count('id', filter=Q(overtime_hours__gt=timedelta(0))),
+            worked_hours=Sum('total_hours'),
+            overtime_hours=Sum('overtime_hours'),
+        )
+    }
+    present = {}
+    for employee_id, day in WorkHours.objects.filter(
+        employee_id__in=employee_ids, date__range=(start_date, last_closed)
+    ).values_list('employee_id', 'date'):
+        present.setdefault(employee_id, set()).add(day)
+    scheduled = {}
+    for employee_id, day in ShiftCalendar.objects.filter(
+        company=company, employee_id__in=employee_ids, date__range=(start_date, last_closed),
+        is_workday=True, is_holiday=False,
+    ).values_list('employee_id', 'date'):
+        scheduled.setdefault(employee_id, set()).add(day)
+    leave = leave_days(company, employee_ids, start_date, end_date)
+
+    rows = []
+    for employee_id in employee_ids:
+        row = totals.get(employee_id, {})
+        missed = scheduled.get(employee_id, set()) - present.get(employee_id, set())
+        on_leave = missed & leave.get(employee_id, set())
+        rows.append(MonthlyAttendanceSummary(
+            company_id=getattr(company, 'pk', company),
+            employee_id=employee_id,
+            year_month=year_month,
+            present_days=row.get('present_days', 0),
+            absent_days=len(missed - on_leave),
+            leave_days=len(on_leave),
+            late_days=row.get('late_days', 0),
+            early_leave_days=row.get('early_leave_days', 0),
+            overtime_days=row.get('overtime_days', 0),
+            worked_hours=row.get('worked_hours') or timedelta(0),
+            overtime_hours=row.get('overtime_hours') or timedelta(0),
+        ))
+
+    MonthlyAttendanceSummary.objects.bulk_create(
+        rows,
+        batch_size=batch_size(),
+        update_conflicts=True,
+        unique_fields=['company', 'employee', 'year_month'],
+        update_fields=SUMMARY_FIELDS + ['updated_at'],
+    )
+    return len(rows)
+
+
+def refresh(company, days):
+    """
+    Rebuild the summaries touched by a set of (employee_id, date) keys.
+    Returns the number of summaries written.
+    """
+    months = {}
+    for employee_id, day in days:
+        months.setdefault(month_key(day), set()).add(employee_id)
+    employees = set(Employee.objects.filter(
+        company=company, pk__in={employee_id for employee_id, _day in days}
+    ).values_list('id', flat=True))
+    return sum(
+        refresh_month(company, sorted(employee_ids & employees), year_month)
+        for year_month, employee_ids in sorted(months.items())
+    )
+
+
+def refresh_company(company, year_month):
+    """
+    Rebuild the summaries of every employee of a company for one month.
+    Returns the number of summaries written.
+    """
+    employee_ids = sorted(Employee.objects.filter(company=company).values_list('id', flat=True))
+    size = batch_size()
+    return sum(
+        refresh_month(company, employee_ids[offset:offset + size], year_month)
+        for offset in range(0, len(employee_ids), size)
+    )
@@ -0,0 +1,76 @@
+"""
+Outbox export of attendance logs that have not been synced to payroll yet.
+
+Consumers page through unsynced rows with a keyset cursor on ``id``
+(``WHERE company = ? AND sync = false AND id > cursor ORDER BY id``), which
+is a range scan of the (company, sync, id) index, and acknowledge each
+batch once it has been stored on their side. Acknowledging marks the batch
+synced with a single ``UPDATE ... WHERE id IN (...)``.
+
+Saving a synced row with changed export columns marks it unsynced again
+(see attendance.signals), so it is exported on the consumer's next pass
+from cursor 0. Bulk ``QuerySet.update()`` calls bypass this and must reset
+``sync`` themselves.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import AttendanceLog
+
+# Columns exported for every row
+OUTBOX_FIELDS = (
+    'id', 'employee', 'employee__employee_id', 'company', 'device', 'device__device_id', 'punch_time',
+    'in_out_status', 'verification_method', 'punch_mode', 'work_code', 'locationName', 'latitude', 'longitude',
+)
+
+# Columns of the log itself; a change to one of them re-exports the row
+EXPORTED_COLUMNS = tuple(field for field in OUTBOX_FIELDS if '__' not in field and field != 'id')
+
+# Export names of the joined columns
+OUTBOX_RENAMED = {'employee__employee_id': 'employee_code', 'device__device_id': 'device_code'}
+
+
+def batch_limit():
+    return getattr(settings, 'ATTENDANCE_OUTBOX_BATCH_SIZE', 1000)
+
+
+def max_batch_limit():
+    return getattr(settings, 'ATTENDANCE_OUTBOX_MAX_BATCH_SIZE', 10000)
+
+
+def pending(company, cursor=0, limit=None):
+    """
+    Unsynced rows of ``company`` with an id greater than ``cursor``, oldest first.
+    """
+    return (
+        AttendanceLog.objects.filter(company=company, sync=False, id__gt=cursor)
+        .order_by('id')
+        .values(*OUTBOX_FIELDS)[:limit or batch_limit()]
+    )
+
+
+def ndjson_line(row):
+    row = {OUTBOX_RENAMED.get(field, field): value for field, value in row.items()}
+    return json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n'
+
+
+def iter_ndjson(company, cursor=0, limit=None):
+    """
+    Yield one NDJSON line per pending row.
+    """
+    for row in pending(company, cursor, limit).iterator(chunk_size=batch_limit()):
+        yield ndjson_line(row)
+
+
+def acknowledge(company, ids):
+    """
+    Mark the given rows of ``company`` as synced in one UPDATE and return
+    the number of rows changed. Ids that are unknown, belong to another
+    company or were already acknowledged are ignored.
+    """
+    ids = {int(pk) for pk in ids}
+    if not ids:
+        return 0
+    return AttendanceLog.objects.filter(company=company, sync=False, id__in=ids).update(sync=True)
@@ -0,0 +1,248 @@
+"""
+Background payroll export of a company-month.
+
+request_export() records a PayrollExport and queues the Celery task
+(attendance.tasks.run_payroll_export), which streams one row per employee
+(salary and bank fields plus the month's WorkHours totals, aggregated in
+the same query) with .iterator(chunk_size=...) into a CSV or XLSX file.
+processed_rows is updated after every chunk for the status endpoint.
+
+The finished file is saved through default_storage under a random name:
+it holds salaries and bank accounts, so it must not be reachable from a
+guessable media URL. It is only served by the export's download action.
+
+Every export stores a fingerprint of its source data: the month's WorkHours
+totals, the last refresh of its monthly summaries and the employee
+version of attendance.employee_cache. A repeat request with the same
+fingerprint gets the existing export (finished or still running) instead
+of a new file. Exports still pending or running after
+ATTENDANCE_PAYROLL_EXPORT_TIMEOUT seconds are taken for lost (worker
+killed, task dropped): they are marked failed and a new one is queued.
+"""
+import csv
+import hashlib
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from . import employee_cache
+from .models import Employee, MonthlyAttendanceSummary, PayrollExport, WorkHours
+from .monthly_summary import month_bounds
+from .workhours import chunk_size
+
+# (queryset column, header) of every exported column
+EXPORT_COLUMNS = [
+    ('employee_id', 'Employee ID'),
+    ('name', 'Name'),
+    ('department__name', 'Department'),
+    ('designation', 'Designation'),
+    ('status', 'Status'),
+    ('salary_type', 'Salary Type'),
+    ('salary_amount', 'Salary Amount'),
+    ('bank_name', 'Bank Name'),
+    ('bank_account_number', 'Bank Account Number'),
+    ('bank_ifsc_code', 'Bank IFSC Code'),
+    ('present_days', 'Present Days'),
+    ('late_days', 'Late Days'),
+    ('early_leave_days', 'Early Leave Days'),
+    ('worked_hours', 'Worked Hours'),
+    ('overtime_hours', 'Overtime Hours'),
+]
+
+COLUMN_NAMES = [column for column, _header in EXPORT_COLUMNS]
+
+EXPORT_DIRECTORY = 'payroll_exports'
+
+
+def export_rows(company, year_month):
+    """
+    Employees of a company with their WorkHours totals for the month,
+    as value tuples in EXPORT_COLUMNS order.
+    """
+    start_date, end_date = month_bounds(year_month)
+    in_month = Q(workhours__date__range=(start_date, end_date))
+    return (
+        Employee.objects.filter(company=company)
+        .annotate(
+            present_days=Count('workhours', filter=in_month),
+            late_days=Count('workhours', filter=in_month & Q(workhours__is_late=True)),
+            early_leave_days=Count('workhours', filter=in_month & Q(workhours__is_early_leave=True)),
+            worked_hours=Sum('workhours__total_hours', filter=in_month),
+            overtime_hours=Sum('workhours__overtime_hours', filter=in_month),
+        )
+        .order_by('employee_id', 'id')
+        .values_list(*COLUMN_NAMES)
+    )
+
+
+def hours(value):
+    return round(value.total_seconds() / 3600, 2) if value else 0
+
+
+def format_row(row):
+    """
+    Spreadsheet-friendly values: the salary as a number, durations as hours.
+    """
+    values = dict(zip(COLUMN_NAMES, row))
+    if values['salary_amount'] is not None:
+        values['salary_amount'] = float(values['salary_amount'])
+    values['worked_hours'] = hours(values['worked_hours'])
+    values['overtime_hours'] = hours(values['overtime_hours'])
+    return [values[column] for column in COLUMN_NAMES]
+
+
+def fingerprint(company, year_month):
+    """
+    Digest of everything an export of the month is built from.
+    """
+    start_date, end_date = month_bounds(year_month)
+    work_hours = WorkHours.objects.filter(company=company, date__range=(start_date, end_date)).aggregate(
+        days=Count('id'), worked=Sum('total_hours'), overtime=Sum('overtime_hours'), last_id=Max('id'),
+        late=Count('id', filter=Q(is_late=True)), early=Count('id', filter=Q(is_early_leave=True)),
+    )
+    summaries = MonthlyAttendanceSummary.objects.filter(company=company, year_month=year_month).aggregate(
+        count=Count('id'), updated=Max('updated_at'),
+    )
+    source = repr((sorted(work_hours.items()), sorted(summaries.items()), employee_cache.version(company)))
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def timeout():
+    return getattr(settings, 'ATTENDANCE_PAYROLL_EXPORT_TIMEOUT', 3600)
+
+
+def expire_lost(company):
+    """
+    Mark the exports of a company that are pending or running for longer
+    than timeout() as failed. Returns the number of exports changed.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout())
+    return PayrollExport.objects.filter(
+        Q(status='pending', created_at__lt=cutoff) | Q(status='running', started_at__lt=cutoff),
+        company=company,
+    ).update(status='failed', error="The export did not finish in time.", finished_at=now)
+
+
+def request_export(company, year_month, file_format='csv', user=None):
+    """
+    Return (export, created): the export of the period that is finished or
+    running for the current data, or a new one queued for the worker.
+    """
+    expire_lost(company)
+    digest = fingerprint(company, year_month)
+    existing = (
+        PayrollExport.objects.filter(
+            company=company, year_month=year_month, file_format=file_format, fingerprint=digest,
+            status__in=['pending', 'running', 'done'],
+        )
+        .order_by('-created_at')
+        .first()
+    )
+    if existing is not None and (existing.status != 'done' or default_storage.exists(existing.file.name)):
+        return existing, False
+
+    from .tasks import run_payroll_export
+
+    export = PayrollExport.objects.create(
+        company=company, requested_by=user, year_month=year_month, file_format=file_format, fingerprint=digest,
+    )
+    transaction.on_commit(lambda: run_payroll_export.delay(export.pk))
+    return export, True
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+
+    def writerow(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """
+    Write-only openpyxl workbook: rows are not kept in memory.
+    """
+
+    def __init__(self, path):
+        import openpyxl
+
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Payroll')
+
+    def writerow(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+WRITERS = {'csv': CsvWriter, 'xlsx': XlsxWriter}
+
+
+def run(export):
+    """
+    Write the export file, reporting progress after every chunk.
+    """
+    PayrollExport.objects.filter(pk=export.pk).update(
+        total_rows=Employee.objects.filter(company=export.company_id).count(),
+    )
+    size = chunk_size()
+    processed = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"export.{export.file_format}")
+        writer = WRITERS[export.file_format](path)
+        try:
+            writer.writerow([header for _column, header in EXPORT_COLUMNS])
+            for row in export_rows(export.company_id, export.year_month).iterator(chunk_size=size):
+                writer.writerow(format_row(row))
+                processed += 1
+                if processed % size == 0:
+                    PayrollExport.objects.filter(pk=export.pk).update(processed_rows=processed)
+        finally:
+            writer.close()
+
+        with open(path, 'rb') as file:
+            name = default_storage.save(f"{EXPORT_DIRECTORY}/{uuid.uuid4().hex}.{export.file_format}", File(file))
+
+    # An export expired meanwhile stays failed
+    finished = PayrollExport.objects.filter(pk=export.pk, status='running').update(
+        status='done', processed_rows=processed, file=name, finished_at=timezone.now(),
+    )
+    if not finished:
+        default_storage.delete(name)
+
+
+def run_export(export_id):
+    """
+    Run a queued export; failures are recorded on the export. The export is
+    claimed with one UPDATE, so a redelivered task does not run it twice.
+    """
+    claimed = PayrollExport.objects.filter(pk=export_id, status='pending').update(
+        status='running', started_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    export = PayrollExport.objects.get(pk=export_id)
+    try:
+        run(export)
+    except Exception as e:
+        PayrollExport.objects.filter(pk=export.pk, status='running').update(
+            status='failed', error=str(e), finished_at=timezone.now(),
+        )
+        raise
+    return export.pk
+
@@ -0,0 +1,171 @@
+"""
+Assign punches to the shift instance (employee, business date, shift) they
+belong to, including night shifts that run past midnight.
+
+Every planned shift of the materialized calendar (ShiftCalendar) becomes a
+window from ATTENDANCE_SHIFT_EARLY_MARGIN_MINUTES before its start to
+ATTENDANCE_SHIFT_LATE_MARGIN_MINUTES after its end. Windows are kept sorted
+by (employee, start) in NumPy arrays, so a batch of punches is assigned with
+one searchsorted call: O(log n) per punch. When the margins of two
+neighbouring shifts overlap, a punch goes to the shift whose planned hours
+are closest.
+
+Dates outside the calendar's rolling window are built on demand first.
+Punches outside every window keep their local calendar date.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ShiftCalendar
+
+# window key = employee_id * EMPLOYEE_KEY + UTC timestamp
+EMPLOYEE_KEY = 2 ** 34
+
+
+def margins():
+    """
+    Early and late grace margins in seconds.
+    """
+    return (
+        getattr(settings, 'ATTENDANCE_SHIFT_EARLY_MARGIN_MINUTES', 120) * 60,
+        getattr(settings, 'ATTENDANCE_SHIFT_LATE_MARGIN_MINUTES', 240) * 60,
+    )
+
+
+def shift_bounds(day, start_time, end_time):
+    """
+    UTC timestamps of the planned start and end of a shift starting on ``day``.
+    """
+    tz = timezone.get_current_timezone()
+    end_day = day + timedelta(days=1) if end_time <= start_time else day
+    return (
+        int(timezone.make_aware(datetime.combine(day, start_time), tz).timestamp()),
+        int(timezone.make_aware(datetime.combine(end_day, end_time), tz).timestamp()),
+    )
+
+
+class ShiftWindows:
+    """
+    Interval index of the shift windows of one company between two dates.
+    A window may overlap the windows of the employee's neighbouring shifts,
+    not ones further away.
+    """
+
+    def __init__(self, company, start_date, end_date, employee_ids=None):
+        # shift_calendar depends on the work hours engine, which uses this module
+        from . import shift_calendar
+
+        early, late = margins()
+        shift_calendar.ensure(company, start_date, end_date, employee_ids)
+        queryset = ShiftCalendar.objects.filter(
+            company=company, date__range=(start_date, end_date), is_workday=True, shift__isnull=False
+        )
+        if employee_ids is not None:
+            queryset = queryset.filter(employee_id__in=list(employee_ids))
+
+        bounds = {}
+        rows = []
+        for employee_id, day, shift_id, start_time, end_time in queryset.order_by().values_list(
+            'employee_id', 'date', 'shift_id', 'shift__start_time', 'shift__end_time'
+        ):
+            key = (day, start_time, end_time)
+            if key not in bounds:
+                bounds[key] = shift_bounds(day, start_time, end_time)
+            rows.append((employee_id, *bounds[key], day.toordinal(), shift_id))
+
+        count = len(rows)
+        table = np.array(rows, np.int64).reshape(count, 5)
+        table = table[np.lexsort((table[:, 1], table[:, 0]))]
+        self.employees = table[:, 0]
+        self.starts = table[:, 1]
+        self.ends = table[:, 2]
+        self.ordinals = table[:, 3]
+        self.shift_ids = table[:, 4]
+        self.window_starts = self.employees * EMPLOYEE_KEY + self.starts - early
+        self.window_ends = self.employees * EMPLOYEE_KEY + self.ends + late
+
+    def __len__(self):
+        return len(self.employees)
+
+    def assign(self, employee_ids, timestamps):
+        """
+        Map punches (arrays of employee IDs and UTC timestamps) to arrays of
+        business date ordinals and shift IDs, -1 where no window matches.
+        """
+        employee_ids = np.asarray(employee_ids, np.int64)
+        timestamps = np.asarray(timestamps, np.int64)
+        ordinals = np.full(len(timestamps), -1, np.int64)
+        shift_ids = np.full(len(timestamps), -1, np.int64)
+        if not len(self) or not len(timestamps):
+            return ordinals, shift_ids
+
+        keys = employee_ids * EMPLOYEE_KEY + timestamps
+        # Last window starting at or before the punch, and the one before it
+        latest = np.searchsorted(self.window_starts, keys, side='right') - 1
+        best = np.full(len(keys), -1, np.int64)
+        best_distance = np.full(len(keys), np.iinfo(np.int64).max, np.int64)
+        for candidate in (latest, latest - 1):
+            position = np.clip(candidate, 0, len(self) - 1)
+            inside = (
+                (candidate >= 0)
+                & (self.window_starts[position] <= keys)
+                & (keys <= self.window_ends[position])
+            )
+            distance = np.maximum(
+                np.maximum(self.starts[position] - timestamps, timestamps - self.ends[position]), 0
+            )
+            better = inside & (distance < best_distance)
+            best = np.where(better, position, best)
+            best_distance = np.where(better, distance, best_distance)
+
+        found = best >= 0
+        ordinals[found] = self.ordinals[best[found]]
+        shift_ids[found] = self.shift_ids[best[found]]
+        return ordinals, shift_ids
+
+    def planned(self, employee_ids, ordinals):
+        """
+        Shift ID of the calendar for each (employee, date ordinal) pair, -1
+        where the employee has no shift that day.
+        """
+        employee_ids = np.asarray(employee_ids, np.int64)
+        ordinals = np.asarray(ordinals, np.int64)
+        if not len(self) or not len(employee_ids):
+            return np.full(len(employee_ids), -1, np.int64)
+        # A calendar has one shift per employee and date
+        keys = self.employees * EMPLOYEE_KEY + self.ordinals
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        wanted = employee_ids * EMPLOYEE_KEY + ordinals
+        positions = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        return np.where(keys[positions] == wanted, self.shift_ids[order][positions], -1)
+
+    def assign_one(self, employee_id, punch_time):
+        """
+        (business date, shift ID) of a single punch, or (None, None).
+        """
+        ordinals, shift_ids = self.assign([employee_id], [int(punch_time.timestamp())])
+        if ordinals[0] < 0:
+            return None, None
+        return date.fromordinal(int(ordinals[0])), int(shift_ids[0])
+
+
+def business_dates(company, employee_ids, punch_times):
+    """
+    Business date of each punch of a company: the date of the shift it
+    belongs to, otherwise its local date.
+    """
+    local = [timezone.localtime(value).date() for value in punch_times]
+    if not local:
+        return []
+    windows = ShiftWindows(company, min(local) - timedelta(days=1), max(local) + timedelta(days=1), set(employee_ids))
+    ordinals, _shift_ids = windows.assign(
+        list(employee_ids), [int(value.timestamp()) for value in punch_times]
+    )
+    return [
+        date.fromordinal(ordinal) if ordinal >= 0 else day
+        for ordinal, day in zip(ordinals.tolist(), local)
+    ]
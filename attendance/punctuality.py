@@ -0,0 +1,157 @@
+"""
+Late arrival / early leave report computed in the database.
+
+For every (employee, local date) with punches, one grouped query returns
+the first IN and last OUT (Min/Max over TruncDate of punch_time in the
+current time zone) together with the planned shift, joined from the shift
+calendar. Arrival and departure are compared to the shift as seconds of
+the local day, so the late/early filter and the pagination run in SQL too:
+
+* the first IN is compared to the start of the shift starting that date,
+* the last OUT is compared to the end of the shift ending that date: the
+  same day's shift, or the previous day's shift when it runs past
+  midnight.
+
+Grace periods are ATTENDANCE_LATE_GRACE_MINUTES and
+ATTENDANCE_EARLY_LEAVE_GRACE_MINUTES.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import (
+    Case, DateField, ExpressionWrapper, F, FilteredRelation, IntegerField, Max, Min, Q, When,
+)
+from django.db.models.functions import ExtractHour, ExtractMinute, ExtractSecond, TruncDate
+from django.utils import timezone
+
+from .models import AttendanceLog
+from .workhours import day_bounds, grace
+
+STATUSES = ('all', 'late', 'early', 'exceptions')
+
+
+def page_size():
+    return getattr(settings, 'ATTENDANCE_REPORT_PAGE_SIZE', 100)
+
+
+def max_page_size():
+    return getattr(settings, 'ATTENDANCE_REPORT_MAX_PAGE_SIZE', 1000)
+
+
+def max_days():
+    return getattr(settings, 'ATTENDANCE_REPORT_MAX_DAYS', 31)
+
+
+def local_seconds(field, tz=None):
+    """
+    Seconds since (local) midnight of a datetime or time column.
+    """
+    options = {'tzinfo': tz} if tz else {}
+    return (
+        ExtractHour(field, **options) * 3600 + ExtractMinute(field, **options) * 60 + ExtractSecond(field, **options)
+    )
+
+
+def planned_shift(company, day):
+    """
+    Join of the punch's employee to their shift calendar row on ``day``
+    (the calendar's (company, employee, date) index).
+    """
+    return FilteredRelation('employee__shift_calendar', condition=Q(
+        employee__shift_calendar__company=company,
+        employee__shift_calendar__date=day,
+        employee__shift_calendar__is_workday=True,
+    ))
+
+
+def daily_punches(company, start_date, end_date, employee_ids=None, department=None, status='all'):
+    """
+    Grouped queryset of {employee_id, day, first_in, last_out, shift_id,
+    late_seconds, early_seconds, ...} ordered by day and employee.
+    ``status`` keeps only late days, early leaves or either.
+    """
+    tz = timezone.get_current_timezone()
+    start, end = day_bounds(start_date, end_date)
+    logs = AttendanceLog.objects.filter(company=company, employee__isnull=False, punch_time__gte=start, punch_time__lt=end)
+    if employee_ids is not None:
+        logs = logs.filter(employee_id__in=employee_ids)
+    if department is not None:
+        logs = logs.filter(employee__department_id=department)
+
+    day = TruncDate('punch_time', tzinfo=tz)
+    late_grace, early_grace = grace()
+    queryset = (
+        logs.annotate(
+            day=day,
+            today=planned_shift(company, day),
+            yesterday=planned_shift(company, ExpressionWrapper(day - timedelta(days=1), output_field=DateField())),
+        )
+        .annotate(
+            shift_id=F('today__shift_id'),
+            shift_start=local_seconds('today__shift__start_time'),
+            # The shift ending this day: today's day shift or yesterday's night shift
+            shift_end=Case(
+                When(today__shift__end_time__gt=F('today__shift__start_time'), then=local_seconds('today__shift__end_time')),
+                When(yesterday__shift__end_time__lte=F('yesterday__shift__start_time'), then=local_seconds('yesterday__shift__end_time')),
+                output_field=IntegerField(),
+            ),
+        )
+        .values('employee_id', 'day', 'shift_id', 'shift_start', 'shift_end')
+        .annotate(
+            first_in=Min('punch_time', filter=Q(in_out_status='IN')),
+            last_out=Max('punch_time', filter=Q(in_out_status='OUT')),
+        )
+        .annotate(
+            # Extracted once per group, from the aggregates
+            late_seconds=ExpressionWrapper(
+                local_seconds('first_in', tz) - F('shift_start'), output_field=IntegerField()
+            ),
+            early_seconds=ExpressionWrapper(
+                F('shift_end') - local_seconds('last_out', tz), output_field=IntegerField()
+            ),
+        )
+        .order_by('day', 'employee_id')
+    )
+    late = Q(late_seconds__gt=late_grace)
+    early = Q(early_seconds__gt=early_grace)
+    if status == 'late':
+        queryset = queryset.filter(late)
+    elif status == 'early':
+        queryset = queryset.filter(early)
+    elif status == 'exceptions':
+        queryset = queryset.filter(late | early)
+    return queryset
+
+
+def report_row(row):
+    late_grace, early_grace = grace()
+    late_seconds, early_seconds = row['late_seconds'], row['early_seconds']
+    is_late = late_seconds is not None and late_seconds > late_grace
+    is_early_leave = early_seconds is not None and early_seconds > early_grace
+    return {
+        'employee': row['employee_id'],
+        'date': row['day'].isoformat(),
+        'shift': row['shift_id'],
+        'first_in': timezone.localtime(row['first_in']).isoformat() if row['first_in'] else None,
+        'last_out': timezone.localtime(row['last_out']).isoformat() if row['last_out'] else None,
+        'is_late': is_late,
+        'late_minutes': late_seconds // 60 if is_late else 0,
+        'is_early_leave': is_early_leave,
+        'early_leave_minutes': early_seconds // 60 if is_early_leave else 0,
+    }
+
+
+def report_page(company, start_date, end_date, page=1, size=None, **filters):
+    """
+    One page of the report: {"results", "page", "page_size", "has_next"}.
+    One extra row is fetched to know whether a next page exists.
+    """
+    size = size or page_size()
+    offset = (page - 1) * size
+    rows = list(daily_punches(company, start_date, end_date, **filters)[offset:offset + size + 1])
+    return {
+        'results': [report_row(row) for row in rows[:size]],
+        'page': page,
+        'page_size': size,
+        'has_next': len(rows) > size,
+    }
@@ -0,0 +1,127 @@
+"""
+Weekly roster report of a company: every schedule with its employee,
+shift and workdays, and the shift each employee works on each day of the
+week, temporary overrides included.
+
+Schedules are read with one joined query (employee, shift) plus one
+prefetch of the workdays, and the week's TemporaryShift rows with one more
+query, instead of calling Schedule.__str__ (one workdays query per row).
+The CSV export streams rows from an iterator. The rendered HTML page is
+cached per company and week; schedule, shift and employee changes bump the
+company's version (invalidate).
+"""
+import csv
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Schedule, TemporaryShift
+from .workhours import WEEKDAYS, chunk_size
+
+HEADER = ['Employee ID', 'Name', 'Shift', 'Start', 'End', 'Workdays']
+
+REPORT_CACHE_KEY = 'attendance:schedule_report:{}:{}:{}'
+VERSION_CACHE_KEY = 'attendance:schedule_report_version:{}'
+
+
+def cache_timeout():
+    return getattr(settings, 'ATTENDANCE_SCHEDULE_REPORT_CACHE_TTL', 60 * 60)
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def week_days(start_date):
+    return [start_date + timedelta(days=offset) for offset in range(7)]
+
+
+def header(start_date):
+    return HEADER + [day.strftime('%a %d %b') for day in week_days(start_date)]
+
+
+def overrides(company, start_date):
+    """
+    {(employee_id, date): shift name} of the week's temporary shifts.
+    """
+    return {
+        (employee_id, day): shift_name or ''
+        for employee_id, day, shift_name in TemporaryShift.objects.filter(
+            company=company, date__range=(start_date, start_date + timedelta(days=6))
+        ).values_list('employee_id', 'date', 'shift__name')
+    }
+
+
+def rows(company, start_date):
+    """
+    One list of cells per schedule (header() order), ordered by employee.
+    """
+    days = week_days(start_date)
+    temporary = overrides(company, start_date)
+    schedules = (
+        Schedule.objects.filter(company=company)
+        .select_related('employee', 'shift')
+        .prefetch_related('workdays')
+        .order_by('employee__employee_id', 'id')
+    )
+    for schedule in schedules.iterator(chunk_size=chunk_size()):
+        employee, shift = schedule.employee, schedule.shift
+        workdays = sorted((workday.day for workday in schedule.workdays.all()), key=WEEKDAYS.get)
+        cells = []
+        for day in days:
+            key = (schedule.employee_id, day)
+            if key in temporary:
+                cells.append(f"{temporary[key]} (temporary)")
+            elif shift and day.strftime('%a').upper() in workdays:
+                cells.append(shift.name)
+            else:
+                cells.append('')
+        yield [
+            employee.employee_id if employee else '',
+            employee.name if employee else '',
+            shift.name if shift else '',
+            shift.start_time.strftime('%H:%M') if shift else '',
+            shift.end_time.strftime('%H:%M') if shift else '',
+            ', '.join(workdays),
+        ] + cells
+
+
+class Echo:
+    """
+    File-like object handing each CSV line back to the caller.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(company, start_date):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header(start_date))
+    for row in rows(company, start_date):
+        yield writer.writerow(row)
+
+
+def company_version(company_id):
+    return cache.get_or_set(VERSION_CACHE_KEY.format(company_id), time.time_ns, None)
+
+
+def cached_page(company_id, start_date, render):
+    """
+    Rendered page of a company's week from the cache, or ``render()``.
+    """
+    key = REPORT_CACHE_KEY.format(company_id, company_version(company_id), start_date.isoformat())
+    content = cache.get(key)
+    if content is None:
+        content = render()
+        cache.set(key, content, cache_timeout())
+    return content
+
+
+def invalidate(company_id):
+    """
+    Drop every cached report page of a company.
+    """
+    cache.set(VERSION_CACHE_KEY.format(company_id), time.time_ns(), None)
@@ -0,0 +1,164 @@
+"""
+Materialized effective-shift calendar (ShiftCalendar).
+
+One row per employee and date tells which shift applies, whether the date
+is a workday and whether it is a holiday:
+
+* a TemporaryShift on the date wins,
+* otherwise the employee's Schedule for that weekday,
+* Holiday rows of the company (or without company) flag the date.
+
+Rows are kept for a rolling window around today (ATTENDANCE_SHIFT_CALENDAR_PAST_DAYS
+back, ATTENDANCE_SHIFT_CALENDAR_FUTURE_DAYS ahead). The signals rebuild the
+affected employees/dates when schedules, temporary shifts, holidays or
+employees change, and a nightly task rolls the window forward. Dates outside
+the window are built on demand by ensure() when punches of those dates are
+assigned to shifts, or with the build_shift_calendar command.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication.models import Company
+
+from .ingest import batch_size
+from .models import Employee, Holiday, Schedule, ShiftCalendar, TemporaryShift
+from .workhours import WEEKDAYS, chunk_size
+
+
+def window():
+    """
+    First and last date of the rolling calendar window.
+    """
+    today = timezone.localdate()
+    return (
+        today - timedelta(days=getattr(settings, 'ATTENDANCE_SHIFT_CALENDAR_PAST_DAYS', 62)),
+        today + timedelta(days=getattr(settings, 'ATTENDANCE_SHIFT_CALENDAR_FUTURE_DAYS', 62)),
+    )
+
+
+def dates(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def holidays(company, start_date, end_date):
+    return set(
+        Holiday.objects.filter(Q(company=company) | Q(company__isnull=True), date__range=(start_date, end_date))
+        .values_list('date', flat=True)
+    )
+
+
+def build_chunk(company, employee_ids, days, holiday_dates, changed=None):
+    """
+    Resolve and upsert the calendar of some employees on the given dates.
+    Returns the number of rows written; their (employee_id, date) keys are
+    appended to ``changed`` when a list is given.
+    """
+    start_date, end_date = days[0], days[-1]
+    weekly = {}
+    for employee_id, shift_id, day in Schedule.objects.filter(
+        company=company, employee_id__in=employee_ids, workdays__isnull=False
+    ).values_list('employee_id', 'shift_id', 'workdays__day'):
+        weekly[employee_id, WEEKDAYS[day]] = shift_id
+
+    temporary = {
+        (employee_id, day): shift_id
+        for employee_id, day, shift_id in TemporaryShift.objects.filter(
+            company=company, employee_id__in=employee_ids, date__range=(start_date, end_date)
+        ).values_list('employee_id', 'date', 'shift_id')
+    }
+
+    existing = {
+        (employee_id, day): (shift_id, is_workday, is_holiday)
+        for employee_id, day, shift_id, is_workday, is_holiday in ShiftCalendar.objects.filter(
+            company=company, employee_id__in=employee_ids, date__range=(start_date, end_date)
+        ).values_list('employee_id', 'date', 'shift_id', 'is_workday', 'is_holiday')
+    }
+
+    rows = []
+    for employee_id in employee_ids:
+        for day in days:
+            key = (employee_id, day)
+            if key in temporary:
+                values = (temporary[key], True, day in holiday_dates)
+            elif (employee_id, day.weekday()) in weekly:
+                values = (weekly[employee_id, day.weekday()], True, day in holiday_dates)
+            else:
+                values = (None, False, day in holiday_dates)
+            # Rows that did not change are not written again
+            if existing.get(key) != values:
+                rows.append(ShiftCalendar(
+                    company_id=getattr(company, 'pk', company), employee_id=employee_id, date=day,
+                    shift_id=values[0], is_workday=values[1], is_holiday=values[2],
+                ))
+                if changed is not None:
+                    changed.append(key)
+
+    ShiftCalendar.objects.bulk_create(
+        rows,
+        batch_size=batch_size(),
+        update_conflicts=True,
+        unique_fields=['company', 'employee', 'date'],
+        update_fields=['shift', 'is_workday', 'is_holiday'],
+    )
+    return len(rows)
+
+
+def build(company, start_date=None, end_date=None, employee_ids=None, changed=None):
+    """
+    Rebuild the calendar of a company (instance or ID) for
+    start_date..end_date (default: the rolling window), optionally only for
+    some of its employees. Returns the number of rows written; see
+    build_chunk() for ``changed``.
+    """
+    if start_date is None or end_date is None:
+        start_date, end_date = window()
+    if start_date > end_date:
+        return 0
+    employees = Employee.objects.filter(company=company)
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=list(employee_ids))
+    employee_ids = sorted(employees.values_list('id', flat=True))
+    days = dates(start_date, end_date)
+    holiday_dates = holidays(company, start_date, end_date)
+
+    written = 0
+    size = chunk_size()
+    for offset in range(0, len(employee_ids), size):
+        written += build_chunk(company, employee_ids[offset:offset + size], days, holiday_dates, changed)
+    return written
+
+
+def ensure(company, start_date, end_date, employee_ids=None):
+    """
+    Build the parts of start_date..end_date outside the rolling window, which
+    the signals do not keep up to date. Returns the number of rows written.
+    """
+    first, last = window()
+    return (
+        build(company, start_date, min(end_date, first - timedelta(days=1)), employee_ids)
+        + build(company, max(start_date, last + timedelta(days=1)), end_date, employee_ids)
+    )
+
+
+def build_all(start_date=None, end_date=None):
+    """
+    Rebuild the calendar of every active company. Returns {company_id: rows written}.
+    """
+    return {
+        company.pk: build(company, start_date, end_date)
+        for company in Company.objects.filter(is_active=True)
+    }
+
+
+def days_for(company, start_date, end_date, employee_ids=None):
+    """
+    Calendar rows of a company for start_date..end_date as an index range scan
+    on (company, employee, date), or (company, date) for the whole company.
+    """
+    queryset = ShiftCalendar.objects.filter(company=company, date__range=(start_date, end_date))
+    if employee_ids is not None:
+        queryset = queryset.filter(employee_id__in=employee_ids)
+    return queryset.order_by('employee_id', 'date')
@@ -0,0 +1,237 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authentication.models import Company
+
+from . import dirty, employee_cache, month_calendar, monthly_summary, outbox, schedule_report, shift_calendar
+from .models import (
+    AttendanceLog, Employee, Holiday, LeaveRequest, Schedule, Shift, ShiftCalendar, TemporaryShift,
+)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_company(sender, instance, **kwargs):
+    """
+    Keep the previous company so moving an employee invalidates both maps.
+    """
+    instance._previous_company_id = None
+    if instance.pk:
+        instance._previous_company_id = (
+            Employee.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_employee_map_on_save(sender, instance, created, **kwargs):
+    employee_cache.invalidate(instance.company_id)
+    schedule_report.invalidate(instance.company_id)
+    previous_company_id = getattr(instance, '_previous_company_id', None)
+    moved = previous_company_id and previous_company_id != instance.company_id
+    if moved:
+        employee_cache.invalidate(previous_company_id)
+        ShiftCalendar.objects.filter(employee_id=instance.pk).exclude(company_id=instance.company_id).delete()
+    if (created or moved) and instance.company_id:
+        rebuild_calendar(instance.company_id, employee_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_map_on_delete(sender, instance, **kwargs):
+    employee_cache.invalidate(instance.company_id)
+
+
+@receiver(pre_save, sender=AttendanceLog)
+def remember_punch_day(sender, instance, **kwargs):
+    """
+    Keep the previous employee-day so an edited punch recomputes both days.
+    """
+    instance._previous_punch = None
+    instance._previous_export = None
+    if instance.pk:
+        previous = AttendanceLog.objects.filter(pk=instance.pk).values('sync', *outbox.EXPORTED_COLUMNS).first()
+        if previous:
+            instance._previous_punch = (previous['company'], previous['employee'], previous['punch_time'])
+            instance._previous_export = previous
+
+
+@receiver(post_save, sender=AttendanceLog)
+def mark_work_day_on_save(sender, instance, **kwargs):
+    logs = [instance]
+    previous = getattr(instance, '_previous_punch', None)
+    if previous and all(previous):
+        logs.append(AttendanceLog(company_id=previous[0], employee_id=previous[1], punch_time=previous[2]))
+    dirty.mark_logs(logs)
+
+
+@receiver(post_save, sender=AttendanceLog)
+def reexport_on_change(sender, instance, **kwargs):
+    """
+    Mark an edited log unsynced so the outbox exports it again.
+    """
+    previous = getattr(instance, '_previous_export', None)
+    if not previous or not previous['sync']:
+        return
+    if any(
+        getattr(instance, AttendanceLog._meta.get_field(name).attname) != previous[name]
+        for name in outbox.EXPORTED_COLUMNS
+    ):
+        AttendanceLog.objects.filter(pk=instance.pk).update(sync=False)
+        instance.sync = False
+
+
+@receiver(post_delete, sender=AttendanceLog)
+def mark_work_day_on_delete(sender, instance, **kwargs):
+    dirty.mark_logs([instance])
+
+
+def rebuild_calendar(company_id, start_date=None, end_date=None, employee_ids=None):
+    """
+    Rebuild part of the shift calendar once the current transaction commits,
+    so cascaded deletes and M2M updates are visible.
+    """
+    def rebuild():
+        changed = []
+        shift_calendar.build(company_id, start_date, end_date, employee_ids, changed)
+        # Future days do not count towards any summary yet
+        today = timezone.localdate()
+        monthly_summary.refresh(company_id, [(employee_id, day) for employee_id, day in changed if day <= today])
+        month_calendar.invalidate_company(company_id)
+        schedule_report.invalidate(company_id)
+
+    transaction.on_commit(rebuild)
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_schedule_employee(sender, instance, **kwargs):
+    instance._previous_schedule = None
+    if instance.pk:
+        instance._previous_schedule = (
+            Schedule.objects.filter(pk=instance.pk).values_list('company_id', 'employee_id').first()
+        )
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def rebuild_calendar_on_schedule_change(sender, instance, **kwargs):
+    keys = {(instance.company_id, instance.employee_id), getattr(instance, '_previous_schedule', None) or (None, None)}
+    for company_id, employee_id in keys:
+        if company_id and employee_id:
+            rebuild_calendar(company_id, employee_ids=[employee_id])
+
+
+@receiver(m2m_changed, sender=Schedule.workdays.through)
+def rebuild_calendar_on_workdays_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedules = [(instance.company_id, instance.employee_id)]
+    elif pk_set:
+        schedules = Schedule.objects.filter(pk__in=pk_set).values_list('company_id', 'employee_id')
+    else:
+        # Workday.schedule_set.clear() does not tell which schedules changed
+        schedules = Schedule.objects.values_list('company_id', 'employee_id')
+    for company_id, employee_id in set(schedules):
+        if company_id and employee_id:
+            rebuild_calendar(company_id, employee_ids=[employee_id])
+
+
+@receiver(post_save, sender=Shift)
+@receiver(post_delete, sender=Shift)
+def invalidate_schedule_report_on_shift_change(sender, instance, **kwargs):
+    schedule_report.invalidate(instance.company_id)
+
+
+@receiver(pre_delete, sender=Shift)
+def remember_shift_calendar_days(sender, instance, **kwargs):
+    instance._calendar_days = list(
+        ShiftCalendar.objects.filter(shift=instance).values_list('company_id', 'employee_id', 'date')
+    )
+
+
+@receiver(post_delete, sender=Shift)
+def rebuild_calendar_on_shift_delete(sender, instance, **kwargs):
+    # SET_NULL leaves the days of the deleted shift as workdays without a shift
+    by_company = {}
+    for company_id, employee_id, day in getattr(instance, '_calendar_days', ()):
+        by_company.setdefault(company_id, []).append((employee_id, day))
+    for company_id, days in by_company.items():
+        dates = [day for _employee_id, day in days]
+        rebuild_calendar(company_id, min(dates), max(dates), {employee_id for employee_id, _day in days})
+
+
+@receiver(pre_save, sender=TemporaryShift)
+def remember_temporary_shift_day(sender, instance, **kwargs):
+    instance._previous_day = None
+    if instance.pk:
+        instance._previous_day = (
+            TemporaryShift.objects.filter(pk=instance.pk).values_list('company_id', 'employee_id', 'date').first()
+        )
+
+
+@receiver(post_save, sender=TemporaryShift)
+@receiver(post_delete, sender=TemporaryShift)
+def rebuild_calendar_on_temporary_shift_change(sender, instance, **kwargs):
+    keys = {(instance.company_id, instance.employee_id, instance.date), getattr(instance, '_previous_day', None)}
+    for key in keys:
+        if key and all(key):
+            rebuild_calendar(key[0], key[2], key[2], [key[1]])
+
+
+@receiver(pre_save, sender=Holiday)
+def remember_holiday_date(sender, instance, **kwargs):
+    instance._previous_day = None
+    if instance.pk:
+        instance._previous_day = Holiday.objects.filter(pk=instance.pk).values_list('company_id', 'date').first()
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def rebuild_calendar_on_holiday_change(sender, instance, **kwargs):
+    for key in {(instance.company_id, instance.date), getattr(instance, '_previous_day', None)}:
+        if not key:
+            continue
+        company_id, day = key
+        # Holidays without a company apply to every company
+        company_ids = [company_id] if company_id else Company.objects.filter(is_active=True).values_list('id', flat=True)
+        for company_id in company_ids:
+            rebuild_calendar(company_id, day, day)
+
+
+@receiver(pre_save, sender=LeaveRequest)
+def remember_leave_period(sender, instance, **kwargs):
+    instance._previous_leave = None
+    if instance.pk:
+        instance._previous_leave = (
+            LeaveRequest.objects.filter(pk=instance.pk).values_list('company_id', 'user_id', 'start_date', 'end_date').first()
+        )
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def invalidate_month_calendar_on_leave_change(sender, instance, **kwargs):
+    current = (instance.company_id, instance.user_id, instance.start_date, instance.end_date)
+    for key in {current, getattr(instance, '_previous_leave', None)}:
+        if not key or not all(key):
+            continue
+        company_id, user_id, start_date, end_date = key
+        months = {start_date + timedelta(days=offset) for offset in range(0, (end_date - start_date).days + 1, 28)}
+        months.add(end_date)
+        employee_ids = Employee.objects.filter(company_id=company_id, user_id=user_id).values_list('id', flat=True)
+        days = [(employee_id, day) for employee_id in employee_ids for day in months]
+        month_calendar.invalidate(company_id, days)
+        # Months that have not started yet have no summary
+        today = timezone.localdate()
+        if start_date <= today:
+            refresh_summaries(company_id, [(employee_id, min(day, today)) for employee_id, day in days])
+
+
+def refresh_summaries(company_id, days):
+    """
+    Rebuild the monthly summaries of some (employee_id, date) keys once the
+    current transaction commits.
+    """
+    if days:
+        transaction.on_commit(lambda: monthly_summary.refresh(company_id, days))
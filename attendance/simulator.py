@@ -0,0 +1,206 @@
+"""
+Simulated ZKTeco terminals for load testing the sync pipeline without hardware.
+
+Each SimulatedDevice listens on its own address, answers the subset of the
+ZK TCP protocol used by attendance.zk.ZKClient and serves a synthetic
+attendance log. Latency and a failure rate can be injected per device, new
+punches can be generated while it runs, and the device can optionally push
+them to an ADMS (iclock) endpoint like a real terminal would.
+
+Run a fleet with ``manage.py simulate_devices``.
+"""
+import asyncio
+import ipaddress
+import logging
+import random
+import struct
+import urllib.request
+from datetime import datetime, timedelta
+
+from . import zk
+
+logger = logging.getLogger(__name__)
+
+# Largest CMD_DATA payload sent in one packet
+MAX_CHUNK = 0xFFC0
+
+
+class SimulatedDevice:
+    """
+    One fake terminal.
+
+    ``records`` punches are spread evenly over the ``days`` before start,
+    cycling through ``employee_ids``. ``rate`` adds that many live punches
+    per minute. ``latency`` (seconds) is waited before every reply and
+    ``failure_rate`` is the probability that a connection is dropped or
+    left hanging instead of being served.
+    """
+
+    def __init__(self, serial_number, host, port, employee_ids, records=1000, days=1,
+                 latency=0.0, failure_rate=0.0, rate=0.0, seed=None):
+        self.serial_number = serial_number
+        self.host = host
+        self.port = port
+        self.employee_ids = list(employee_ids) or ['1']
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.server = None
+        self.writers = set()
+        self.punches = []
+        self.pushed = 0
+        self.connections = 0
+        self.failures = 0
+
+        now = datetime.now().replace(microsecond=0)
+        self.started = now
+        self.generated_live = 0
+        step = timedelta(days=days) / max(records, 1)
+        # Offset every device a little so two devices never log the same second
+        offset = timedelta(seconds=self.random.randrange(60))
+        for index in range(records):
+            self.add_punch(now - timedelta(days=days) + offset + step * index, index)
+
+    def add_punch(self, punch_time, index):
+        employee_id = self.employee_ids[index % len(self.employee_ids)]
+        # Alternate IN/OUT per employee
+        punch_state = (index // len(self.employee_ids)) % 2
+        self.punches.append((employee_id, punch_time, punch_state, 1))
+
+    def generate_live_punches(self):
+        if not self.rate:
+            return
+        elapsed = (datetime.now() - self.started).total_seconds()
+        due = int(elapsed / 60 * self.rate)
+        while self.generated_live < due:
+            self.generated_live += 1
+            punch_time = self.started + timedelta(seconds=self.generated_live * 60 / self.rate)
+            self.add_punch(punch_time.replace(microsecond=0), len(self.punches))
+
+    def attendance_buffer(self):
+        self.generate_live_punches()
+        records = b''.join(
+            zk.pack_attendance(employee_id, punch_time, punch_state, verify, uid=index + 1)
+            for index, (employee_id, punch_time, punch_state, verify) in enumerate(self.punches)
+        )
+        return struct.pack('<I', len(records)) + records
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def stop(self):
+        if self.server is None:
+            return
+        self.server.close()
+        # Release connections that are still open (e.g. injected hangs)
+        for writer in list(self.writers):
+            writer.close()
+        await asyncio.sleep(0)
+        await self.server.wait_closed()
+        self.server = None
+
+    def reply(self, writer, command, session_id, reply_id, data=b''):
+        writer.write(zk.build_packet(command, session_id, reply_id, data))
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.add(writer)
+        try:
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                self.failures += 1
+                if self.random.random() < 0.5:
+                    # Hang until the client gives up
+                    await reader.read()
+                return
+            await self.serve(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError, zk.ZKError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def serve(self, reader, writer):
+        session_id = self.random.randrange(1, zk.USHRT_MAX)
+        buffer = b''
+        while True:
+            command, _session_id, reply_id, data = await zk.read_packet(reader)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            if command == zk.CMD_PREPARE_BUFFER:
+                buffer = self.attendance_buffer()
+                self.reply(writer, zk.CMD_ACK_OK, session_id, reply_id, b'\x00' + struct.pack('<I', len(buffer)))
+            elif command == zk.CMD_READ_BUFFER:
+                # Only the requested slice, at most zk.MAX_CHUNK bytes
+                offset, size = struct.unpack('<ii', data[:8])
+                chunk = buffer[offset:offset + min(size, zk.MAX_CHUNK)]
+                self.reply(writer, zk.CMD_PREPARE_DATA, session_id, reply_id, struct.pack('<I', len(chunk)))
+                for start in range(0, len(chunk), MAX_CHUNK):
+                    self.reply(writer, zk.CMD_DATA, session_id, reply_id, chunk[start:start + MAX_CHUNK])
+                self.reply(writer, zk.CMD_ACK_OK, session_id, reply_id)
+            elif command == zk.CMD_FREE_DATA:
+                buffer = b''
+                self.reply(writer, zk.CMD_ACK_OK, session_id, reply_id)
+            else:
+                self.reply(writer, zk.CMD_ACK_OK, session_id, reply_id)
+            await writer.drain()
+
+            if command == zk.CMD_EXIT:
+                break
+
+    def attlog_lines(self, punches):
+        return ''.join(
+            f"{employee_id}\t{punch_time:%Y-%m-%d %H:%M:%S}\t{punch_state}\t{verify}\t0\n"
+            for employee_id, punch_time, punch_state, verify in punches
+        ).encode()
+
+    def send(self, url, body=None):
+        request = urllib.request.Request(url, data=body, method='POST' if body is not None else 'GET')
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.read()
+
+    async def push(self, base_url, interval):
+        """
+        Push punches to an ADMS endpoint every ``interval`` seconds, starting
+        with the whole log, like a terminal that was just pointed at the server.
+        """
+        base_url = base_url.rstrip('/')
+        await asyncio.to_thread(self.send, f"{base_url}/iclock/cdata?SN={self.serial_number}&options=all")
+        while True:
+            self.generate_live_punches()
+            pending = self.punches[self.pushed:]
+            if pending:
+                try:
+                    await asyncio.to_thread(
+                        self.send,
+                        f"{base_url}/iclock/cdata?SN={self.serial_number}&table=ATTLOG",
+                        self.attlog_lines(pending),
+                    )
+                    self.pushed += len(pending)
+                except OSError as e:
+                    logger.warning("ADMS push from %s failed: %r", self.serial_number, e)
+            await asyncio.sleep(interval)
+
+
+def fleet_addresses(count, base_ip, port):
+    """
+    Yield (host, port) for ``count`` devices. Every device gets its own
+    address counting up from ``base_ip`` (any 127.x.y.z address is local on
+    Linux), matching the one-IP-per-device rule of the Device model.
+    """
+    base = ipaddress.ip_address(base_ip)
+    for index in range(count):
+        yield str(base + index), port
+
+
+async def start_fleet(count, employee_ids, base_ip='127.1.0.1', port=4370, prefix='SIM', **options):
+    """
+    Start ``count`` simulated devices and return them.
+    """
+    devices = [
+        SimulatedDevice(f"{prefix}-{index + 1:04d}", host, device_port, employee_ids, seed=index, **options)
+        for index, (host, device_port) in enumerate(fleet_addresses(count, base_ip, port))
+    ]
+    await asyncio.gather(*(device.start() for device in devices))
+    return devices
@@ -0,0 +1,103 @@
+"""
+Pull attendance records from every ZKTeco device of a company concurrently.
+
+All devices are queried at the same time with asyncio, each one bounded by
+its own timeout, so an offline terminal only costs its own timeout instead
+of delaying the rest of the fleet.
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ingest import resolve_employees, write_logs
+from .models import AttendanceLog, Device
+from .zk import ZKClient, ZKError
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_device(device, timeout, semaphore):
+    """
+    Download the records of one device that are newer than its last sync.
+    Returns (device, records, error).
+    """
+    since = None
+    if device.last_sync_time:
+        since = timezone.make_naive(device.last_sync_time)
+
+    async def pull():
+        async with ZKClient(device.ip_address, device.port) as client:
+            return await client.get_attendance(since)
+
+    async with semaphore:
+        try:
+            return device, await asyncio.wait_for(pull(), timeout), None
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ZKError) as e:
+            return device, [], e
+
+
+async def fetch_devices(devices, timeout, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(fetch_device(device, timeout, semaphore) for device in devices))
+
+
+def sync_company_devices(company):
+    """
+    Pull new punches from all devices of ``company`` and store them as
+    AttendanceLog rows. Returns a summary of the run.
+    """
+    devices = list(Device.objects.filter(company=company, ip_address__isnull=False))
+    summary = {'devices': len(devices), 'synced': 0, 'failed': {}, 'records': 0, 'suppressed': 0, 'unknown_employees': 0}
+    if not devices:
+        return summary
+
+    started = timezone.now()
+    results = asyncio.run(fetch_devices(
+        devices,
+        getattr(settings, 'ATTENDANCE_DEVICE_TIMEOUT', 15),
+        getattr(settings, 'ATTENDANCE_DEVICE_CONCURRENCY', 200),
+    ))
+
+    employees = resolve_employees(
+        company, {record[0] for _device, records, _error in results for record in records}
+    )
+    default_tz = timezone.get_default_timezone()
+
+    logs = []
+    synced = []
+    failed = []
+    for device, records, error in results:
+        if error is not None:
+            logger.warning("Sync failed for device %s (%s:%s): %r", device.device_id, device.ip_address, device.port, error)
+            summary['failed'][device.device_id] = repr(error)
+            device.last_sync_attempt = started
+            device.sync_error_count += 1
+            device.last_sync_error = repr(error)[:255]
+            failed.append(device)
+            continue
+
+        synced.append(device.pk)
+        for user_id, punch_time, in_out_status, verification_method in records:
+            employee_id = employees.get(user_id)
+            if employee_id is None:
+                summary['unknown_employees'] += 1
+                continue
+            logs.append(AttendanceLog(
+                employee_id=employee_id,
+                company=company,
+                device=device,
+                punch_time=timezone.make_aware(punch_time, default_tz),
+                in_out_status=in_out_status,
+                verification_method=verification_method,
+            ))
+
+    summary['records'] = write_logs(logs)
+    summary['suppressed'] = len(logs) - summary['records']
+    summary['synced'] = len(synced)
+    Device.objects.filter(pk__in=synced).update(
+        last_sync_time=started, last_sync_attempt=started, sync_error_count=0, last_sync_error=None
+    )
+    Device.objects.bulk_update(failed, ['last_sync_attempt', 'sync_error_count', 'last_sync_error'])
+    return summary
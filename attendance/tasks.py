@@ -0,0 +1,65 @@
+from celery import shared_task
+
+from authentication.models import Company
+
+from . import absence, buffer, payroll_export, shift_calendar, sync, workhours
+
+
+@shared_task(ignore_result=True)
+def sync_company_devices(company_id):
+    """
+    Pull new punches from all devices of one company.
+    """
+    company = Company.objects.filter(pk=company_id, is_active=True).first()
+    if company is None:
+        return None
+    return sync.sync_company_devices(company)
+
+
+@shared_task(ignore_result=True)
+def sync_all_devices():
+    """
+    Queue a device sync for every active company.
+    """
+    for company_id in Company.objects.filter(is_active=True).values_list('id', flat=True):
+        sync_company_devices.delay(company_id)
+
+
+@shared_task(ignore_result=True)
+def flush_punch_buffer():
+    """
+    Drain the write-behind punch buffer.
+    """
+    return buffer.drain()
+
+
+@shared_task(ignore_result=True)
+def recompute_dirty_work_hours():
+    """
+    Recompute WorkHours for the employee-days whose punches changed.
+    """
+    return workhours.recompute_dirty()
+
+
+@shared_task(ignore_result=True)
+def roll_shift_calendar():
+    """
+    Move the shift calendar window forward and repair rows that drifted.
+    """
+    return shift_calendar.build_all()
+
+
+@shared_task(ignore_result=True)
+def detect_absences():
+    """
+    Record yesterday's absences of every active company.
+    """
+    return absence.detect_all()
+
+
+@shared_task(ignore_result=True)
+def run_payroll_export(export_id):
+    """
+    Write the file of a queued payroll export.
+    """
+    return payroll_export.run_export(export_id)
@@ -1,3 +1,456 @@
-from django.test import TestCase
+import asyncio
+import base64
+import itertools
+import json
+import struct
+import unittest
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from authentication.models import Company, CustomUser
+
+from . import zk
+from .api.filters import filter_attendance_logs
+from .models import AttendanceLog, Employee, Shift, TemporaryShift, WorkHours
+from .workhours import compute_work_hours
+
+LOG_TABLE = AttendanceLog._meta.db_table
+
+# The configured cache backend (Redis) is not needed by the tests
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# One value for every attendance log filter of the API
+FILTER_VALUES = {
+    'from': '2024-01-01',
+    'to': '2024-01-31',
+    'employee': '1',
+    'device': '1',
+    'department': '1',
+    'in_out_status': 'IN',
+    'verification_method': 'FP',
+}
+
+
+def log_table_plans(plan):
+    """
+    Yield the access plans of the attendance log table in a MySQL JSON EXPLAIN.
+    """
+    if isinstance(plan, dict):
+        if plan.get('table_name') == LOG_TABLE:
+            yield plan
+        for value in plan.values():
+            yield from log_table_plans(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from log_table_plans(value)
+
+
+class AttendanceLogFilterIndexTests(TestCase):
+    """
+    Every combination of the attendance log filters reads the log table
+    through an index, never with a full table scan.
+    """
+
+    def combinations(self):
+        for count in range(len(FILTER_VALUES) + 1):
+            for names in itertools.combinations(FILTER_VALUES, count):
+                params = QueryDict(mutable=True)
+                params.update({name: FILTER_VALUES[name] for name in names})
+                queryset = filter_attendance_logs(AttendanceLog.objects.filter(company_id=1), params)
+                # The query of one list page
+                yield names, queryset.order_by('-punch_time', '-id')[:101]
+
+    def test_filters_use_an_index(self):
+        if connection.vendor == 'sqlite':
+            check = self.assert_sqlite_index
+        elif connection.vendor == 'mysql':
+            check = self.assert_mysql_index
+        else:
+            raise unittest.SkipTest(f"EXPLAIN checks are written for SQLite and MySQL, not {connection.vendor}")
+        for names, queryset in self.combinations():
+            with self.subTest(filters=names):
+                check(queryset)
+
+    def assert_sqlite_index(self, queryset):
+        plan = queryset.explain()
+        steps = [line for line in plan.splitlines() if f' {LOG_TABLE} ' in f'{line} ']
+        self.assertTrue(steps, plan)
+        for step in steps:
+            # SCAN ... USING INDEX still reads the whole index
+            self.assertRegex(step, r'SEARCH \S+ USING ', plan)
+
+    def assert_mysql_index(self, queryset):
+        plan = json.loads(queryset.explain(format='JSON'))
+        steps = list(log_table_plans(plan))
+        self.assertTrue(steps, plan)
+        for step in steps:
+            # 'index' is a full index scan, like 'ALL' for the table
+            self.assertNotIn(step.get('access_type'), ('ALL', 'index'), plan)
+            self.assertTrue(step.get('key'), plan)
+
+
+def create_employees(company, count):
+    return [
+        Employee.objects.create(
+            company=company, employee_id=str(1000 + i), name=f"Employee {i}", salary_type='Monthly',
+            contact_number=f'01700000{i:03d}', email=f'employee{i}@example.com',
+        )
+        for i in range(count)
+    ]
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ATTENDANCE_LATE_GRACE_MINUTES=5, ATTENDANCE_EARLY_LEAVE_GRACE_MINUTES=5)
+class WorkHoursEngineTests(TestCase):
+    """
+    compute_work_hours() turns punches into one WorkHours row per
+    employee and business day.
+    """
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", address="Dhaka")
+        self.day = timezone.localdate() - timedelta(days=3)
+        day_shift = Shift.objects.create(company=self.company, name="Day", start_time=time(9), end_time=time(17))
+        night_shift = Shift.objects.create(company=self.company, name="Night", start_time=time(22), end_time=time(6))
+        # The shift calendar is rebuilt once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.late, self.early, self.night, self.unscheduled = create_employees(self.company, 4)
+            for employee, shift in ((self.late, day_shift), (self.early, day_shift), (self.night, night_shift)):
+                TemporaryShift.objects.create(company=self.company, employee=employee, date=self.day, shift=shift)
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+    def punch(self, employee, punch_time, in_out_status):
+        return AttendanceLog(company=self.company, employee=employee, punch_time=punch_time, in_out_status=in_out_status)
+
+    def compute(self):
+        return compute_work_hours(self.company, self.day - timedelta(days=1), self.day + timedelta(days=1))
+
+    def rows(self):
+        return {
+            (row.employee_id, row.date): (row.total_hours, row.overtime_hours, row.is_late, row.is_early_leave)
+            for row in WorkHours.objects.filter(company=self.company)
+        }
+
+    def test_day_and_night_shifts(self):
+        next_day = self.day + timedelta(days=1)
+        AttendanceLog.objects.bulk_create([
+            self.punch(self.late, self.at(self.day, 9, 30), 'IN'),
+            self.punch(self.late, self.at(self.day, 18), 'OUT'),
+            self.punch(self.early, self.at(self.day, 8, 55), 'IN'),
+            self.punch(self.early, self.at(self.day, 12), 'BREAK_OUT'),
+            self.punch(self.early, self.at(self.day, 13), 'BREAK_IN'),
+            self.punch(self.early, self.at(self.day, 16), 'OUT'),
+            # Crosses midnight: one business day, the day the shift starts
+            self.punch(self.night, self.at(self.day, 21, 50), 'IN'),
+            self.punch(self.night, self.at(next_day, 6, 30), 'OUT'),
+            self.punch(self.unscheduled, self.at(self.day, 10), 'IN'),
+            self.punch(self.unscheduled, self.at(self.day, 12), 'OUT'),
+        ])
+
+        summary = self.compute()
+
+        self.assertEqual(summary['punches'], 10)
+        self.assertEqual(self.rows(), {
+            (self.late.pk, self.day): (timedelta(hours=8, minutes=30), timedelta(minutes=30), True, False),
+            (self.early.pk, self.day): (timedelta(hours=6, minutes=5), timedelta(0), False, True),
+            (self.night.pk, self.day): (timedelta(hours=8, minutes=40), timedelta(minutes=40), False, False),
+            # No shift: no overtime, never late or early
+            (self.unscheduled.pk, self.day): (timedelta(hours=2), None, False, False),
+        })
+
+    def test_days_without_punches_are_removed(self):
+        AttendanceLog.objects.bulk_create([
+            self.punch(self.late, self.at(self.day, 9), 'IN'),
+            self.punch(self.late, self.at(self.day, 17), 'OUT'),
+        ])
+        # Entered for a day without punches
+        WorkHours.objects.create(
+            company=self.company, employee=self.early, date=self.day, total_hours=timedelta(hours=8),
+        )
+
+        summary = self.compute()
+        self.assertEqual(summary['removed'], 1)
+        self.assertEqual(list(self.rows()), [(self.late.pk, self.day)])
+
+        AttendanceLog.objects.filter(employee=self.late).delete()
+        summary = self.compute()
+        self.assertEqual(summary['removed'], 1)
+        self.assertEqual(self.rows(), {})
+
+
+def create_user(company, email='user@example.com', **extra_fields):
+    """
+    A user of the company with every attendance permission.
+    """
+    user = CustomUser.objects.create_user(email, email.split('@')[0], 'password', company=company, **extra_fields)
+    user.user_permissions.set(Permission.objects.filter(content_type__app_label='attendance'))
+    return user
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AttendanceLogCursorTests(TestCase):
+    """
+    The attendance log list pages newest first on (punch_time, id), and the
+    next and previous links walk it without skipping or repeating a log.
+    """
+    url = '/attendance-api/attendance-logs/'
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", address="Dhaka")
+        employees = create_employees(self.company, 5)
+        self.client = APIClient()
+        self.client.force_authenticate(create_user(self.company))
+        tied = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        # Five employees punch at one instant, so pages break inside the tie
+        punches = [(employees[0], tied - timedelta(minutes=1)), (employees[0], tied + timedelta(minutes=1))]
+        punches += [(employee, tied) for employee in employees]
+        logs = AttendanceLog.objects.bulk_create(
+            AttendanceLog(company=self.company, employee=employee, punch_time=punch_time)
+            for employee, punch_time in punches
+        )
+        self.ids = [log.pk for log in sorted(logs, key=lambda log: (log.punch_time, log.pk), reverse=True)]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_next_and_previous_round_trip(self):
+        pages = [self.page(f'{self.url}?page_size=2')]
+        self.assertIsNone(pages[0]['previous'])
+        while pages[-1]['next']:
+            pages.append(self.page(pages[-1]['next']))
+        forward = [[log['id'] for log in page['data']] for page in pages]
+        self.assertEqual(forward, [self.ids[i:i + 2] for i in range(0, len(self.ids), 2)])
+
+        backward = [forward[-1]]
+        page = pages[-1]
+        while page['previous']:
+            page = self.page(page['previous'])
+            backward.append([log['id'] for log in page['data']])
+            # Every page walked back to links forward again
+            self.assertIsNotNone(page['next'])
+        self.assertEqual(backward, forward[::-1])
+
+    def test_tampered_cursor(self):
+        punch_time = timezone.now().isoformat()
+        cursors = [
+            'not a cursor',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            encode_cursor(['list']),
+            encode_cursor({'t': punch_time}),
+            encode_cursor({'t': 'yesterday', 'i': 1, 'r': 0}),
+            encode_cursor({'t': 12, 'i': 1, 'r': 0}),
+            encode_cursor({'t': punch_time, 'i': 'one', 'r': 0}),
+            # Larger than any primary key the database can compare
+            encode_cursor({'t': punch_time, 'i': 10 ** 30, 'r': 0}),
+            encode_cursor({'t': punch_time, 'i': -1, 'r': 1}),
+        ]
+        employee = Employee.objects.get(company=self.company, employee_id='1000')
+        urls = [self.url, f'{self.url}logs-by-employee/{employee.pk}/']
+        for url, cursor in itertools.product(urls, cursors):
+            with self.subTest(url=url, cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor.'})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkAttendanceLogTests(TestCase):
+    """
+    The bulk endpoint stores the valid rows of a batch and reports the
+    outcome of every row.
+    """
+    url = '/attendance-api/attendance-logs/bulk/'
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", address="Dhaka")
+        self.present, self.stored = create_employees(self.company, 2)
+        self.client = APIClient()
+        self.client.force_authenticate(create_user(self.company))
+        self.punch_time = timezone.now().replace(microsecond=0) - timedelta(hours=2)
+
+    def test_mixed_batch(self):
+        AttendanceLog.objects.create(company=self.company, employee=self.stored, punch_time=self.punch_time)
+        rows = [
+            {'employee_id': self.present.employee_id, 'punch_time': self.punch_time.isoformat()},
+            {'employee_id': self.stored.employee_id, 'punch_time': self.punch_time.isoformat()},
+            {'employee_id': '9999', 'punch_time': self.punch_time.isoformat()},
+            {'employee': self.present.pk, 'punch_time': '2024-02-30T09:00:00'},
+            ['not', 'an', 'object'],
+        ]
+
+        response = self.client.post(self.url, rows, format='json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual(
+            (body['accepted'], body['duplicates'], body['suppressed'], body['rejected']), (1, 1, 0, 3),
+        )
+        self.assertEqual(body['data'], [
+            {'index': 0, 'status': 'accepted', 'errors': []},
+            {'index': 1, 'status': 'duplicate', 'errors': []},
+            {'index': 2, 'status': 'rejected', 'errors': ["Employee not found in your company."]},
+            {'index': 3, 'status': 'rejected', 'errors': ["punch_time is not a valid datetime."]},
+            {'index': 4, 'status': 'rejected', 'errors': ["Row must be a JSON object."]},
+        ])
+        self.assertEqual(
+            set(AttendanceLog.objects.filter(company=self.company).values_list('employee_id', 'punch_time')),
+            {(self.present.pk, self.punch_time), (self.stored.pk, self.punch_time)},
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BufferMetricsTests(TestCase):
+    """
+    The punch buffer is shared by every company, so only staff read its metrics.
+    """
+    url = '/attendance-api/attendance-logs/buffer-metrics/'
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", address="Dhaka")
+        self.client = APIClient()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(create_user(self.company))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.force_authenticate(create_user(self.company, 'staff@example.com', is_staff=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('suppressed_duplicates', response.json()['data'])
+
+
+class StubWriter:
+    """
+    Collects the packets a ZKClient sends.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    def write(self, data):
+        self.sent.append(data)
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def parse_packet(packet):
+    """(command, checksum, session_id, reply_id, data) of a sent TCP packet."""
+    magic_1, magic_2, length = zk.TCP_HEADER.unpack_from(packet)
+    body = packet[zk.TCP_HEADER.size:]
+    return (magic_1, magic_2, length, body) + zk.PACKET_HEADER.unpack_from(body) + (body[zk.PACKET_HEADER.size:],)
+
+
+class ZKProtocolTests(unittest.TestCase):
+    """
+    The ZK TCP client against canned device replies.
+    """
+    session_id = 4321
+
+    def test_build_packet(self):
+        packet = zk.build_packet(zk.CMD_CONNECT, 0, 65534, b'\x01\x02\x03')
+        magic_1, magic_2, length, body, command, checksum, session_id, reply_id, data = parse_packet(packet)
+        self.assertEqual((magic_1, magic_2), (zk.MACHINE_PREPARE_DATA_1, zk.MACHINE_PREPARE_DATA_2))
+        self.assertEqual(length, len(body))
+        self.assertEqual((command, session_id, reply_id, data), (zk.CMD_CONNECT, 0, 65534, b'\x01\x02\x03'))
+        # The checksum is computed over the body with a zero checksum field
+        self.assertEqual(checksum, zk.checksum(zk.PACKET_HEADER.pack(command, 0, session_id, reply_id) + data))
+
+    def test_checksum(self):
+        # One's complement of the little-endian 16 bit word sum, as pyzk computes it
+        self.assertEqual(zk.checksum(b''), 65534)
+        self.assertEqual(zk.checksum(b'\xe8\x03\x00\x00'), 64534)
+        # A trailing odd byte is added as it is
+        self.assertEqual(zk.checksum(b'\x01\x00\x02'), 65531)
+        # Sums above USHRT_MAX wrap around
+        self.assertEqual(zk.checksum(b'\xff\xff\x02\x00'), 65532)
+
+    def reply(self, command, data=b''):
+        return zk.build_packet(command, self.session_id, 0, data)
+
+    def test_get_attendance_reads_the_buffer_in_slices(self):
+        start = datetime(2024, 3, 1, 8, 0)
+        punches = [
+            (str(1000 + i % 7), start + timedelta(minutes=i), i % 2, 15 if i % 3 else 1)
+            for i in range(4000)
+        ]
+        records = b''.join(zk.pack_attendance(user_id, punch_time, punch, verify) for user_id, punch_time, punch, verify in punches)
+        buffer = struct.pack('<I', len(records)) + records
+        # More than two slices of MAX_CHUNK bytes
+        self.assertGreater(len(buffer), 2 * zk.MAX_CHUNK)
+
+        replies = [self.reply(zk.CMD_ACK_OK), self.reply(zk.CMD_ACK_OK, b'\x00' + struct.pack('<I', len(buffer)))]
+        slices = []
+        for offset in range(0, len(buffer), zk.MAX_CHUNK):
+            chunk = buffer[offset:offset + zk.MAX_CHUNK]
+            slices.append((offset, len(chunk)))
+            # Each slice is announced, streamed in smaller packets and acknowledged
+            replies.append(self.reply(zk.CMD_PREPARE_DATA, struct.pack('<I', len(chunk))))
+            replies.extend(self.reply(zk.CMD_DATA, chunk[part:part + 1024]) for part in range(0, len(chunk), 1024))
+            replies.append(self.reply(zk.CMD_ACK_OK))
+        replies += [self.reply(zk.CMD_ACK_OK), self.reply(zk.CMD_ACK_OK)]
+
+        async def download():
+            client = zk.ZKClient('device.invalid')
+            client.reader = asyncio.StreamReader()
+            client.reader.feed_data(b''.join(replies))
+            client.reader.feed_eof()
+            client.writer = writer = StubWriter()
+            client.reply_id = zk.USHRT_MAX - 1
+            reply, session_id, _reply_id, _data = await client.command(zk.CMD_CONNECT)
+            client.session_id = session_id
+            records = await client.get_attendance()
+            await client.disconnect()
+            return records, writer
+
+        records, writer = asyncio.run(download())
+
+        self.assertEqual(records, [
+            (user_id, punch_time, zk.PUNCH_STATES[punch], zk.VERIFY_TYPES[verify])
+            for user_id, punch_time, punch, verify in punches
+        ])
+        sent = [parse_packet(packet) for packet in writer.sent]
+        commands = [packet[4] for packet in sent]
+        self.assertEqual(
+            commands,
+            [zk.CMD_CONNECT, zk.CMD_PREPARE_BUFFER] + [zk.CMD_READ_BUFFER] * len(slices) + [zk.CMD_FREE_DATA, zk.CMD_EXIT],
+        )
+        requested = [struct.unpack('<ii', packet[8]) for packet in sent if packet[4] == zk.CMD_READ_BUFFER]
+        self.assertEqual(requested, slices)
+        self.assertTrue(all(packet[6] == self.session_id for packet in sent[1:]))
+        self.assertTrue(writer.closed)
+
+    def test_get_attendance_since(self):
+        records = zk.pack_attendance('7', datetime(2024, 3, 1, 8, 0)) + zk.pack_attendance('7', datetime(2024, 3, 1, 17, 0), punch=1)
+        buffer = struct.pack('<I', len(records)) + records
+
+        async def download():
+            client = zk.ZKClient('device.invalid')
+            client.reader = asyncio.StreamReader()
+            # Small buffers come back inline with the buffer request
+            client.reader.feed_data(self.reply(zk.CMD_DATA, buffer))
+            client.writer = StubWriter()
+            return await client.get_attendance(since=datetime(2024, 3, 1, 12, 0))
+
+        self.assertEqual(asyncio.run(download()), [('7', datetime(2024, 3, 1, 17, 0), 'OUT', 'FP')])
@@ -1,16 +1,46 @@
-from django.http import HttpResponse
+from datetime import date, timedelta
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render,redirect
 from .models import AttendanceLog,Employee
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from .buffer import record_punch
+from . import schedule_report
 
 
 @staff_member_required  # Ensure only staff members (admin users) can access this view
 def schedule_report_view(request):
-    # এই ভিউতে আপনি কাস্টম ডাটা প্রক্রিয়া করতে পারেন
-    return render(request, 'admin/schedule_report.html', context={})
+    """
+    Weekly roster of the user's company; ?week=YYYY-MM-DD picks the week of
+    that day, ?format=csv downloads it.
+    """
+    try:
+        day = date.fromisoformat(request.GET['week']) if request.GET.get('week') else timezone.localdate()
+    except ValueError:
+        day = timezone.localdate()
+    start_date = schedule_report.week_start(day)
+    company = request.user.company
+
+    if request.GET.get('format') == 'csv':
+        response = StreamingHttpResponse(schedule_report.iter_csv(company, start_date), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="schedule-report-{start_date.isoformat()}.csv"'
+        return response
+
+    def render_page():
+        return render_to_string('schedule_report.html', {
+            'header': schedule_report.header(start_date),
+            'rows': list(schedule_report.rows(company, start_date)),
+            'week': start_date,
+            'previous_week': start_date - timedelta(days=7),
+            'next_week': start_date + timedelta(days=7),
+        }, request=request)
+
+    return HttpResponse(schedule_report.cached_page(getattr(company, 'pk', None), start_date, render_page))
 
 
 
@@ -34,7 +64,8 @@ def give_attendance_view(request):
 
             
             # Now you can proceed to create the attendance log
-            attendance_log = AttendanceLog.objects.create(
+            # Appended to the punch buffer when it is enabled, saved directly otherwise
+            record_punch(
                 employee=employee,
                 latitude=latitude,
                 longitude=longitude,
@@ -48,6 +79,9 @@ def give_attendance_view(request):
         except Employee.DoesNotExist:
             # Handle the case where the employee is not found
             return render(request, 'error.html', {'message': 'Employee not found.'})
+        except ValidationError as e:
+            # e.g. a latitude that is not a number
+            return render(request, 'error.html', {'message': ' '.join(e.messages)})
         except Exception as e:
             # Handle any other exceptions
             return render(request, 'error.html', {'message': str(e)})
@@ -0,0 +1,327 @@
+"""
+Turn AttendanceLog punches into daily WorkHours rows.
+
+Punches are loaded as columns (one values_list query per chunk of
+employees) and paired with NumPy instead of a Python loop per punch:
+
+* IN followed by OUT on the same employee-day counts as presence,
+* BREAK_OUT followed by BREAK_IN counts as break,
+* worked time is presence minus the larger of the recorded breaks and the
+  shift's break_duration,
+* overtime is worked time beyond the shift's planned time,
+* a day is late when the first IN comes after the shift start plus
+  ATTENDANCE_LATE_GRACE_MINUTES, and an early leave when the last OUT comes
+  before the shift end minus ATTENDANCE_EARLY_LEAVE_GRACE_MINUTES.
+
+Punches are grouped by business day: the date of the shift window they fall
+in (attendance.punch_assignment), so a 22:00-06:00 shift counts as one day.
+Punches outside every shift window keep their local calendar date of the
+current time zone. The planned shift of a day is the one its punches were
+assigned to, else the shift calendar's shift of that date. The results are upserted into WorkHours in bulk.
+recompute_dirty only recomputes the employee-days queued by attendance.dirty.
+Both keep MonthlyAttendanceSummary up to date for the months they touch and
+drop the cached month calendars of those months.
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from authentication.models import Company
+
+from . import dirty, month_calendar, monthly_summary
+from .ingest import batch_size
+from .models import AttendanceLog, Employee, Shift, WorkHours
+from .punch_assignment import ShiftWindows, shift_bounds
+
+IN, OUT, BREAK_OUT, BREAK_IN = 0, 1, 2, 3
+STATUS_CODES = {'IN': IN, 'OUT': OUT, 'BREAK_OUT': BREAK_OUT, 'BREAK_IN': BREAK_IN}
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+DAY_SECONDS = 24 * 60 * 60
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# employee-day key = employee_id * DAY_KEY + date ordinal
+DAY_KEY = 10 ** 7
+
+
+def chunk_size():
+    return getattr(settings, 'ATTENDANCE_WORK_HOURS_CHUNK_SIZE', 2000)
+
+
+def grace():
+    """
+    Late and early-leave grace periods in seconds.
+    """
+    return (
+        getattr(settings, 'ATTENDANCE_LATE_GRACE_MINUTES', 5) * 60,
+        getattr(settings, 'ATTENDANCE_EARLY_LEAVE_GRACE_MINUTES', 5) * 60,
+    )
+
+
+def dirty_batch():
+    return getattr(settings, 'ATTENDANCE_WORK_HOURS_DIRTY_BATCH', 10000)
+
+
+def day_bounds(start_date, end_date):
+    """
+    Aware datetimes covering the local days start_date..end_date (inclusive).
+    """
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min), tz),
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz),
+    )
+
+
+def load_punches(company, employee_ids, start, end):
+    """
+    Return (employee, timestamp, status) arrays sorted by employee and time.
+    """
+    rows = list(
+        AttendanceLog.objects.filter(
+            company=company, employee_id__in=employee_ids, punch_time__gte=start, punch_time__lt=end
+        )
+        .order_by('employee_id', 'punch_time')
+        .values_list('employee_id', 'punch_time', 'in_out_status')
+    )
+    count = len(rows)
+    if not count:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int8)
+    employees, times, statuses = zip(*rows)
+    return (
+        np.fromiter(employees, np.int64, count),
+        np.fromiter((int(value.timestamp()) for value in times), np.int64, count),
+        np.fromiter((STATUS_CODES.get(value, IN) for value in statuses), np.int8, count),
+    )
+
+
+def local_ordinals(timestamps):
+    """
+    Date ordinals of UTC timestamps in the current time zone. The UTC offset
+    is looked up once per distinct hour instead of once per punch.
+    """
+    tz = timezone.get_current_timezone()
+    hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+    offsets = np.fromiter(
+        (datetime.fromtimestamp(int(hour) * 3600, tz).utcoffset().total_seconds() for hour in hours),
+        np.int64, len(hours),
+    )
+    return (timestamps + offsets[inverse]) // DAY_SECONDS + EPOCH_ORDINAL
+
+
+def paired_seconds(groups, timestamps, statuses, start_code, end_code, group_count):
+    """
+    Sum, per group, the time between every start punch and an end punch
+    directly following it (other punch types are ignored).
+    """
+    mask = (statuses == start_code) | (statuses == end_code)
+    groups, timestamps, statuses = groups[mask], timestamps[mask], statuses[mask]
+    pairs = (statuses[:-1] == start_code) & (statuses[1:] == end_code) & (groups[:-1] == groups[1:])
+    return np.bincount(
+        groups[:-1][pairs], weights=(timestamps[1:] - timestamps[:-1])[pairs], minlength=group_count
+    )
+
+
+def lookup(table, keys, missing=-1):
+    """
+    Vectorized dict lookup: table[key] for every key, ``missing`` if absent.
+    """
+    if not table:
+        return np.full(len(keys), missing, np.int64)
+    table_keys = np.fromiter(sorted(table), np.int64, len(table))
+    table_values = np.fromiter((table[key] for key in table_keys.tolist()), np.int64, len(table))
+    positions = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+    return np.where(table_keys[positions] == keys, table_values[positions], missing)
+
+
+def shift_seconds(start_time, end_time, break_duration):
+    """
+    Planned seconds of a shift and its break. Shifts ending at or before
+    their start time run past midnight.
+    """
+    start = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+    end = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+    span = (end - start) % DAY_SECONDS or DAY_SECONDS
+    return span, int(break_duration.total_seconds()) if break_duration else 0
+
+
+def compute_chunk(company, employee_ids, start_date, end_date):
+    """
+    Compute and upsert WorkHours for some employees. Returns the number of
+    punches and the employee-day keys (employee_id * DAY_KEY + date ordinal)
+    that had punches.
+    """
+    # Night shifts reach into the neighbouring days
+    start, end = day_bounds(start_date - timedelta(days=1), end_date + timedelta(days=1))
+    employees, timestamps, statuses = load_punches(company, employee_ids, start, end)
+    if len(employees):
+        windows = ShiftWindows(company, start_date - timedelta(days=1), end_date + timedelta(days=1), employee_ids)
+        days, punch_shifts = windows.assign(employees, timestamps)
+        days = np.where(days >= 0, days, local_ordinals(timestamps))
+        inside = (days >= start_date.toordinal()) & (days <= end_date.toordinal())
+        employees, timestamps, statuses, days = employees[inside], timestamps[inside], statuses[inside], days[inside]
+        punch_shifts = punch_shifts[inside]
+    if not len(employees):
+        return 0, np.empty(0, np.int64)
+
+    keys, groups = np.unique(employees * DAY_KEY + days, return_inverse=True)
+    group_count = len(keys)
+    group_employees, group_days = keys // DAY_KEY, keys % DAY_KEY
+
+    presence = paired_seconds(groups, timestamps, statuses, IN, OUT, group_count)
+    breaks = paired_seconds(groups, timestamps, statuses, BREAK_OUT, BREAK_IN, group_count)
+
+    # The shift the punches were assigned to, otherwise the calendar's shift
+    # of that day (punches outside every window): the shift calendar is the
+    # only source of planned shifts
+    shift_ids = np.full(group_count, -1, np.int64)
+    np.maximum.at(shift_ids, groups, punch_shifts)
+    shift_ids = np.where(shift_ids >= 0, shift_ids, windows.planned(group_employees, group_days))
+    planned, scheduled_break, times = {}, {}, {}
+    for pk, start_time, end_time, break_duration in Shift.objects.filter(
+        pk__in=set(shift_ids[shift_ids >= 0].tolist())
+    ).values_list('id', 'start_time', 'end_time', 'break_duration'):
+        planned[pk], scheduled_break[pk] = shift_seconds(start_time, end_time, break_duration)
+        times[pk] = (start_time, end_time)
+    planned = lookup(planned, shift_ids, 0)
+    scheduled_break = lookup(scheduled_break, shift_ids, 0)
+
+    worked = np.maximum(presence - np.maximum(breaks, scheduled_break), 0).astype(np.int64)
+    overtime = np.maximum(worked - (planned - scheduled_break), 0)
+    has_shift = shift_ids >= 0
+
+    # Planned start and end per employee-day, computed once per (day, shift)
+    shift_starts = np.zeros(group_count, np.int64)
+    shift_ends = np.zeros(group_count, np.int64)
+    pairs, pair_index = np.unique(group_days[has_shift] * DAY_KEY + shift_ids[has_shift], return_inverse=True)
+    bounds = np.array(
+        [shift_bounds(date.fromordinal(int(pair // DAY_KEY)), *times[int(pair % DAY_KEY)]) for pair in pairs],
+        np.int64,
+    ).reshape(len(pairs), 2)
+    shift_starts[has_shift], shift_ends[has_shift] = bounds[pair_index, 0], bounds[pair_index, 1]
+
+    late_grace, early_grace = grace()
+    first_in = np.full(group_count, np.iinfo(np.int64).max, np.int64)
+    last_out = np.full(group_count, np.iinfo(np.int64).min, np.int64)
+    np.minimum.at(first_in, groups[statuses == IN], timestamps[statuses == IN])
+    np.maximum.at(last_out, groups[statuses == OUT], timestamps[statuses == OUT])
+    late = has_shift & (first_in != np.iinfo(np.int64).max) & (first_in > shift_starts + late_grace)
+    early = has_shift & (last_out != np.iinfo(np.int64).min) & (last_out < shift_ends - early_grace)
+
+    existing = {
+        (employee_id, day): values
+        for employee_id, day, *values in WorkHours.objects.filter(
+            employee_id__in=employee_ids, date__range=(start_date, end_date)
+        ).values_list('employee_id', 'date', 'total_hours', 'overtime_hours', 'is_late', 'is_early_leave')
+    }
+    rows = []
+    for employee_id, day, seconds, extra, shifted, is_late, is_early_leave in zip(
+        group_employees.tolist(), group_days.tolist(), worked.tolist(), overtime.tolist(), has_shift.tolist(),
+        late.tolist(), early.tolist(),
+    ):
+        day = date.fromordinal(day)
+        values = [timedelta(seconds=seconds), timedelta(seconds=extra) if shifted else None, is_late, is_early_leave]
+        # Rows that did not change are not written again
+        if existing.get((employee_id, day)) != values:
+            rows.append(WorkHours(
+                employee_id=employee_id, company_id=getattr(company, 'pk', company), date=day,
+                total_hours=values[0], overtime_hours=values[1], is_late=is_late, is_early_leave=is_early_leave,
+            ))
+
+    WorkHours.objects.bulk_create(
+        rows,
+        batch_size=batch_size(),
+        update_conflicts=True,
+        unique_fields=['employee', 'date'],
+        update_fields=['company', 'total_hours', 'overtime_hours', 'is_late', 'is_early_leave'],
+    )
+    return len(employees), keys
+
+
+def compute_work_hours(company, start_date, end_date, employee_ids=None):
+    """
+    Recompute WorkHours of a company for the days start_date..end_date and
+    the monthly summaries of those months. Employee-days without punches
+    lose their WorkHours row, as in recompute_days().
+    Returns {"employees", "punches", "days", "removed"}.
+    """
+    if employee_ids is None:
+        employee_ids = Employee.objects.filter(company=company).values_list('id', flat=True)
+    employee_ids = sorted(employee_ids)
+
+    months = {
+        (start_date + timedelta(days=offset)).replace(day=1) for offset in range((end_date - start_date).days + 1)
+    }
+    summary = {'employees': len(employee_ids), 'punches': 0, 'days': 0, 'removed': 0}
+    size = chunk_size()
+    for offset in range(0, len(employee_ids), size):
+        chunk = employee_ids[offset:offset + size]
+        punches, keys = compute_chunk(company, chunk, start_date, end_date)
+        summary['punches'] += punches
+        summary['days'] += len(keys)
+        computed = set(keys.tolist())
+        empty = [
+            pk for pk, employee_id, day in WorkHours.objects.filter(
+                employee_id__in=chunk, date__range=(start_date, end_date)
+            ).values_list('id', 'employee_id', 'date')
+            if employee_id * DAY_KEY + day.toordinal() not in computed
+        ]
+        for start in range(0, len(empty), batch_size()):
+            summary['removed'] += WorkHours.objects.filter(pk__in=empty[start:start + batch_size()]).delete()[0]
+        touched = [(employee_id, month) for employee_id in chunk for month in months]
+        monthly_summary.refresh(company, touched)
+        month_calendar.invalidate(company, touched)
+    return summary
+
+
+def recompute_days(company, days):
+    """
+    Recompute WorkHours for a set of (employee_id, date) keys of a company.
+    Days whose punches were all removed lose their WorkHours row.
+    Returns {"punches", "days", "removed"}.
+    """
+    by_date = {}
+    for employee_id, day in days:
+        by_date.setdefault(day, []).append(employee_id)
+
+    summary = {'punches': 0, 'days': 0, 'removed': 0}
+    size = chunk_size()
+    for day, employee_ids in sorted(by_date.items()):
+        employee_ids.sort()
+        for offset in range(0, len(employee_ids), size):
+            chunk = employee_ids[offset:offset + size]
+            punches, keys = compute_chunk(company, chunk, day, day)
+            summary['punches'] += punches
+            summary['days'] += len(keys)
+            computed = set((keys // DAY_KEY).tolist())
+            empty = [employee_id for employee_id in chunk if employee_id not in computed]
+            if empty:
+                summary['removed'] += WorkHours.objects.filter(employee_id__in=empty, date=day).delete()[0]
+    monthly_summary.refresh(company, days)
+    month_calendar.invalidate(company, days)
+    return summary
+
+
+def recompute_dirty(limit=None):
+    """
+    Recompute the employee-days queued by attendance.dirty, at most ``limit``
+    (ATTENDANCE_WORK_HOURS_DIRTY_BATCH) per call. Each company's keys leave
+    the queue once they are recomputed; the rest are queued again if the
+    recomputation fails. Returns {"punches", "days", "removed", "pending"}.
+    """
+    token, claimed = dirty.claim(limit or dirty_batch())
+    summary = {'punches': 0, 'days': 0, 'removed': 0}
+    companies = Company.objects.in_bulk(list(claimed))
+    try:
+        for company_id, days in claimed.items():
+            company = companies.get(company_id)
+            if company is not None:
+                for key, value in recompute_days(company, days).items():
+                    summary[key] += value
+            dirty.release(token, company_id)
+    except Exception:
+        dirty.unclaim(token)
+        raise
+    summary['pending'] = dirty.pending_count()
+    return summary
@@ -0,0 +1,270 @@
+"""
+Minimal asyncio client for the ZKTeco TCP protocol (port 4370).
+
+Only the commands needed to download the attendance log are implemented:
+connect, read the ATTLOG buffer, free the buffer and disconnect.
+"""
+import asyncio
+import struct
+from datetime import datetime
+
+# Protocol commands
+CMD_CONNECT = 1000
+CMD_EXIT = 1001
+CMD_ATTLOG_RRQ = 13
+CMD_PREPARE_DATA = 1500
+CMD_DATA = 1501
+CMD_FREE_DATA = 1502
+CMD_PREPARE_BUFFER = 1503
+CMD_READ_BUFFER = 1504
+CMD_ACK_OK = 2000
+CMD_ACK_ERROR = 2001
+CMD_ACK_UNAUTH = 2005
+
+# Every TCP packet starts with these two magic words and the payload length
+MACHINE_PREPARE_DATA_1 = 20560
+MACHINE_PREPARE_DATA_2 = 32130
+USHRT_MAX = 65535
+
+# Largest slice of a prepared buffer requested with one CMD_READ_BUFFER
+MAX_CHUNK = 0xFFC0
+
+TCP_HEADER = struct.Struct('<HHI')
+PACKET_HEADER = struct.Struct('<4H')
+
+# 40 byte attendance record: uid, user id, verify type, timestamp, punch state
+ATTENDANCE_RECORD = struct.Struct('<H24sB4sB8x')
+
+# Device punch state -> AttendanceLog.in_out_status
+PUNCH_STATES = {
+    0: 'IN',
+    1: 'OUT',
+    2: 'BREAK_OUT',
+    3: 'BREAK_IN',
+    4: 'IN',   # Overtime in
+    5: 'OUT',  # Overtime out
+}
+
+# Device verify type -> AttendanceLog.verification_method
+VERIFY_TYPES = {
+    0: 'PWD',
+    1: 'FP',
+    2: 'CARD',
+    4: 'CARD',
+    15: 'FACE',
+}
+
+
+class ZKError(Exception):
+    """Raised when a device answers with an unexpected reply."""
+
+
+def checksum(payload):
+    """
+    Return the 16 bit one's complement checksum used by ZK devices.
+    """
+    total = 0
+    length = len(payload)
+    index = 0
+    while length > 1:
+        total += payload[index] | (payload[index + 1] << 8)
+        if total > USHRT_MAX:
+            total -= USHRT_MAX
+        index += 2
+        length -= 2
+    if length:
+        total += payload[-1]
+    while total > USHRT_MAX:
+        total -= USHRT_MAX
+    total = ~total
+    while total < 0:
+        total += USHRT_MAX
+    return total
+
+
+def build_packet(command, session_id, reply_id, data=b''):
+    """
+    Build a complete TCP packet (transport header + command header + data).
+    """
+    body = PACKET_HEADER.pack(command, 0, session_id, reply_id) + data
+    body = PACKET_HEADER.pack(command, checksum(body), session_id, reply_id) + data
+    return TCP_HEADER.pack(MACHINE_PREPARE_DATA_1, MACHINE_PREPARE_DATA_2, len(body)) + body
+
+
+def encode_time(value):
+    """
+    Encode a naive datetime the way the device stores it.
+    """
+    return (
+        ((value.year % 100) * 12 * 31 + ((value.month - 1) * 31) + value.day - 1) * (24 * 60 * 60)
+        + (value.hour * 60 + value.minute) * 60 + value.second
+    )
+
+
+def decode_time(value):
+    """
+    Decode a device timestamp into a naive datetime (device local time).
+    """
+    second = value % 60
+    value //= 60
+    minute = value % 60
+    value //= 60
+    hour = value % 24
+    value //= 24
+    day = value % 31 + 1
+    value //= 31
+    month = value % 12 + 1
+    value //= 12
+    return datetime(value + 2000, month, day, hour, minute, second)
+
+
+def pack_attendance(user_id, punch_time, punch=0, verify=1, uid=0):
+    """
+    Pack a single attendance record (used by the simulator and tests).
+    """
+    return ATTENDANCE_RECORD.pack(
+        uid,
+        str(user_id).encode(),
+        verify,
+        struct.pack('<I', encode_time(punch_time)),
+        punch,
+    )
+
+
+def unpack_attendance(buffer):
+    """
+    Yield (user_id, punch_time, in_out_status, verification_method) tuples
+    from a raw ATTLOG buffer.
+    """
+    size = ATTENDANCE_RECORD.size
+    for offset in range(0, len(buffer) - size + 1, size):
+        _uid, user_id, verify, timestamp, punch = ATTENDANCE_RECORD.unpack_from(buffer, offset)
+        yield (
+            user_id.split(b'\x00')[0].decode(errors='ignore'),
+            decode_time(struct.unpack('<I', timestamp)[0]),
+            PUNCH_STATES.get(punch, 'IN'),
+            VERIFY_TYPES.get(verify, 'FP'),
+        )
+
+
+async def read_packet(reader):
+    """
+    Read one packet from the stream and return (command, session_id, reply_id, data).
+    """
+    magic_1, magic_2, length = TCP_HEADER.unpack(await reader.readexactly(TCP_HEADER.size))
+    if (magic_1, magic_2) != (MACHINE_PREPARE_DATA_1, MACHINE_PREPARE_DATA_2):
+        raise ZKError("Invalid packet header.")
+    body = await reader.readexactly(length)
+    command, _checksum, session_id, reply_id = PACKET_HEADER.unpack_from(body)
+    return command, session_id, reply_id, body[PACKET_HEADER.size:]
+
+
+class ZKClient:
+    """
+    Async connection to a single ZKTeco terminal.
+
+    Usage:
+        async with ZKClient(ip, port) as client:
+            records = await client.get_attendance()
+    """
+
+    def __init__(self, host, port=4370):
+        self.host = host
+        self.port = port
+        self.session_id = 0
+        self.reply_id = USHRT_MAX - 1
+        self.reader = None
+        self.writer = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    async def command(self, command, data=b''):
+        """
+        Send a command and return the device reply.
+        """
+        self.reply_id = (self.reply_id + 1) % USHRT_MAX
+        self.writer.write(build_packet(command, self.session_id, self.reply_id, data))
+        await self.writer.drain()
+        return await read_packet(self.reader)
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        reply, session_id, _reply_id, _data = await self.command(CMD_CONNECT)
+        if reply == CMD_ACK_UNAUTH:
+            raise ZKError("Device requires a communication password.")
+        if reply != CMD_ACK_OK:
+            raise ZKError(f"Unexpected reply {reply} to connect.")
+        self.session_id = session_id
+
+    async def disconnect(self):
+        if self.writer is None:
+            return
+        try:
+            if not self.writer.is_closing():
+                await self.command(CMD_EXIT)
+        except (OSError, asyncio.IncompleteReadError, ZKError):
+            pass
+        finally:
+            self.writer.close()
+            self.writer = None
+
+    async def receive_data(self, reply, data):
+        """
+        Collect the payload of a data reply. Small payloads arrive inline in a
+        CMD_DATA packet; larger ones are announced with CMD_PREPARE_DATA and
+        streamed as CMD_DATA packets terminated by CMD_ACK_OK.
+        """
+        if reply == CMD_DATA:
+            return data
+        if reply != CMD_PREPARE_DATA:
+            raise ZKError(f"Unexpected reply {reply} while reading data.")
+
+        chunks = []
+        while True:
+            reply, _session_id, _reply_id, data = await read_packet(self.reader)
+            if reply == CMD_DATA:
+                chunks.append(data)
+            elif reply == CMD_ACK_OK:
+                return b''.join(chunks)
+            else:
+                raise ZKError(f"Unexpected reply {reply} while reading data.")
+
+    async def read_buffer(self, command):
+        """
+        Ask the device to prepare a buffer for ``command`` and read it back.
+        """
+        reply, _session_id, _reply_id, data = await self.command(
+            CMD_PREPARE_BUFFER, struct.pack('<bhii', 1, command, 0, 0)
+        )
+        if reply == CMD_DATA:
+            return data
+        if reply != CMD_ACK_OK or len(data) < 5:
+            raise ZKError(f"Unexpected reply {reply} to buffer request.")
+
+        size = struct.unpack('<I', data[1:5])[0]
+        # Devices only serve the buffer in slices of at most MAX_CHUNK bytes
+        chunks = []
+        for start in range(0, size, MAX_CHUNK):
+            reply, _session_id, _reply_id, data = await self.command(
+                CMD_READ_BUFFER, struct.pack('<ii', start, min(MAX_CHUNK, size - start))
+            )
+            chunks.append(await self.receive_data(reply, data))
+        await self.command(CMD_FREE_DATA)
+        return b''.join(chunks)
+
+    async def get_attendance(self, since=None):
+        """
+        Download the attendance log, optionally keeping only records after ``since``
+        (a naive datetime in device local time).
+        """
+        buffer = await self.read_buffer(CMD_ATTLOG_RRQ)
+        # The first four bytes hold the size of the record area
+        records = unpack_attendance(buffer[4:])
+        if since is None:
+            return list(records)
+        return [record for record in records if record[1] > since]
@@ -56,7 +56,7 @@ class CompanyAdmin(admin.ModelAdmin):
             'fields': ('name', 'address', 'logo','employee_limit')
         }),
         ('Limits', {
-            'fields': ('is_active', 'subscription',),
+            'fields': ('is_active', 'subscription', 'punch_debounce_seconds',),
             'classes': ('wide',)  # Make this section collapsible
         }),
     )
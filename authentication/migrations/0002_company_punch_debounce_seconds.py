@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='punch_debounce_seconds',
+            field=models.PositiveIntegerField(default=60, help_text='Punches by the same employee within this many seconds of another punch are ignored. Use 0 to disable.', verbose_name='Punch Debounce Window (seconds)'),
+        ),
+    ]
@@ -163,6 +163,11 @@ class Company(models.Model):
         verbose_name=_("Employee Limit"),
         help_text=_("Maximum number of employees allowed in this company.")
     )
+    punch_debounce_seconds = models.PositiveIntegerField(
+        default=60,
+        verbose_name=_("Punch Debounce Window (seconds)"),
+        help_text=_("Punches by the same employee within this many seconds of another punch are ignored. Use 0 to disable.")
+    )
     logo = models.ImageField(
         upload_to='uploads/company_logos/',
         blank=True,